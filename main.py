@@ -193,6 +193,7 @@ DOOR     = 'door'
 POKEBALL = 'pokeball'
 FOXFOX   = 'foxfox'
 PARTICLE_BLOCK = 'particleblock'
+AIR_BLOCK = 'air' # Stored where sea water was removed (a drained sea cell); get_block reads it as None
 
 BLOCK_TYPES = [ # Ensure this list is comprehensive for inventory/UI purposes
     'dirt','grass','stone','water','sponge',
@@ -205,9 +206,14 @@ BLOCK_TYPES = [ # Ensure this list is comprehensive for inventory/UI purposes
     'snow', 'sandstone' # Added new biome blocks
 ]
 
-door_entities = {}
-pokeball_entities = {}
-foxfox_entities = {}
+THUMBNAIL_BLOCK_COLORS = { # Top-down colour of the highest block of a column in save thumbnails
+    'grass': (95, 159, 53), 'dirt': (134, 96, 67), 'stone': (125, 125, 125), 'water': (52, 95, 218),
+    'sand': (219, 207, 163), 'sandstone': (216, 200, 148), 'snow': (240, 240, 250),
+    'treeleaves': (58, 118, 38), 'treetrunkdark': (82, 62, 40), 'treetrunklight': (150, 120, 80),
+}
+THUMBNAIL_DEFAULT_COLOR = (170, 170, 170) # Player-placed and other blocks
+THUMBNAIL_SIZE = 64 # Block columns (= pixels) per side, centered on the player
+
 particleblock_entities = {}
 
 #############################################
@@ -323,10 +329,49 @@ FACE_NORMALS = {
     'east': Vec3(1,0,0),
     'west': Vec3(-1,0,0)
 }
+# Same normals as int tuples, for neighbour lookups (integer positions take VoxelWorld.get_block's fast path)
+FACE_NEIGHBOR_OFFSETS = {face_name: (int(face_normal.x), int(face_normal.y), int(face_normal.z))
+                         for face_name, face_normal in FACE_NORMALS.items()}
 
 #############################################
 # 8) Special Block Entities
 #############################################
+ENTITY_FAR_DISTANCE = 32 # Active entities anchored farther than this from the player tick at a reduced rate
+ENTITY_FAR_TICK_INTERVAL = 0.1 # Seconds between ticks of far active entities
+
+class EntityTickScheduler: # Ticks only entities that are doing something (animating, falling, expiring); idle ones cost nothing
+    def __init__(self):
+        self.active = {} # entity -> [anchor (x,y,z) or None, seconds since its last tick]
+
+    def activate(self, entity, anchor_pos=None): # entity.tick(dt) is called until it returns False
+        if entity in self.active: return
+        self.active[entity] = [anchor_pos, 0.0] # Without an anchor the entity ticks every frame
+
+    def deactivate(self, entity):
+        self.active.pop(entity, None)
+
+    def update(self): # Called every frame
+        if not self.active: return
+        dt_ticks = time.dt
+        far_distance_sq = ENTITY_FAR_DISTANCE ** 2
+        for entity, tick_state in list(self.active.items()):
+            if entity not in self.active: continue # Destroyed by an earlier tick this frame
+            tick_state[1] += dt_ticks
+            anchor_pos = tick_state[0]
+            if anchor_pos is not None and player and tick_state[1] < ENTITY_FAR_TICK_INTERVAL:
+                if ((anchor_pos[0] - player.x)**2 + (anchor_pos[1] - player.y)**2 +
+                        (anchor_pos[2] - player.z)**2) > far_distance_sq:
+                    continue
+            elapsed_ticks = tick_state[1]
+            tick_state[1] = 0.0
+            if not entity.tick(elapsed_ticks):
+                self.active.pop(entity, None)
+
+    def clear(self):
+        self.active.clear()
+
+entity_scheduler = EntityTickScheduler()
+
 class Door(Entity):
     def __init__(self, base_pos):
         super().__init__()
@@ -344,18 +389,21 @@ class Door(Entity):
         self.closed_rotation = 0
         self.open_rotation = -90
         self.target_rot = 0
-    def update(self):
-        if self.is_animating:
-            step = 150 * time.dt
-            diff = self.target_rot - self.pivot.rotation_y
-            if abs(diff) < step:
-                self.pivot.rotation_y = self.target_rot
-                self.is_animating = False
-            else:
-                self.pivot.rotation_y += step if diff > 0 else -step
+    def tick(self, dt): # Scheduled only while the door swings
+        step = 150 * dt
+        diff = self.target_rot - self.pivot.rotation_y
+        if abs(diff) < step:
+            self.pivot.rotation_y = self.target_rot
+            self.is_animating = False
+        else:
+            self.pivot.rotation_y += step if diff > 0 else -step
+        return self.is_animating
+    def on_destroy(self):
+        entity_scheduler.deactivate(self)
     def toggle(self):
         if door_sound: door_sound.play()
         self.is_animating = True
+        entity_scheduler.activate(self, (self.base_pos.x, self.base_pos.y, self.base_pos.z))
         if self.open: # If open, close it
             self.target_rot = self.closed_rotation
             # Re-enable collider when closed, adjust its position/size if needed
@@ -366,31 +414,181 @@ class Door(Entity):
             self.collider = None # Disable collider when open
             self.open = True
 
-class PokeballEntity(Entity):
-    def __init__(self, base_pos):
+SPECIAL_MODEL_CACHE_DIR = 'assets/model_cache' # Compiled .bam copies of glTF models, rebuilt when the glTF is newer
+special_models = {} # model path -> node loaded once and shared by every entity of that type
+
+def get_special_model(model_path, fallback_model):
+    if model_path in special_models: return special_models[model_path]
+    loaded_model = None
+    bam_path = os.path.join(SPECIAL_MODEL_CACHE_DIR, os.path.splitext(os.path.basename(model_path))[0] + '.bam')
+    if os.path.exists(bam_path) and os.path.exists(model_path) and os.path.getmtime(bam_path) >= os.path.getmtime(model_path):
+        try:
+            loaded_model = load_model(bam_path) # Skips glTF parsing and conversion
+        except Exception as e_bam_load:
+            print(f"[MODEL CACHE] Could not load '{bam_path}': {e_bam_load}")
+    if not loaded_model:
+        loaded_model = load_model(model_path)
+        if loaded_model:
+            try:
+                os.makedirs(SPECIAL_MODEL_CACHE_DIR, exist_ok=True)
+                loaded_model.writeBamFile(bam_path)
+            except Exception as e_bam_write:
+                print(f"[MODEL CACHE] Could not write '{bam_path}': {e_bam_write}")
+    if not loaded_model:
+        print(f"[MODEL CACHE] '{model_path}' not found, using '{fallback_model}'")
+        loaded_model = load_model(fallback_model)
+    special_models[model_path] = loaded_model
+    return loaded_model
+
+class SpecialModelBatcher: # One flattened node per (chunk, model) instead of a scene node per decorative entity
+    def __init__(self):
+        self.members = {} # (chunk origin, model path) -> set of entities drawn by that batch
+        self.batches = {} # (chunk origin, model path) -> Entity holding the flattened geometry
+        self.dirty = set() # Batches rebuilt once at the end of the frame, however many members changed
+
+    def batch_key(self, entity):
+        return ((floor(entity.base_pos.x / CHUNK_SIZE) * CHUNK_SIZE, 0, floor(entity.base_pos.z / CHUNK_SIZE) * CHUNK_SIZE),
+                entity.model_path)
+
+    def add(self, entity):
+        key = self.batch_key(entity)
+        self.members.setdefault(key, set()).add(entity)
+        self.dirty.add(key)
+
+    def remove(self, entity):
+        key = self.batch_key(entity)
+        batch_members = self.members.get(key)
+        if batch_members is None or entity not in batch_members: return
+        batch_members.discard(entity)
+        if not batch_members: del self.members[key]
+        self.dirty.add(key)
+
+    def mark_dirty(self, entity): # After moving or rotating a member
+        self.dirty.add(self.batch_key(entity))
+
+    def update(self): # Called every frame
+        if not self.dirty: return
+        for key in self.dirty:
+            self.rebuild(key)
+        self.dirty.clear()
+
+    def rebuild(self, key):
+        old_batch = self.batches.pop(key, None)
+        if old_batch: destroy(old_batch)
+        batch_members = self.members.get(key)
+        if not batch_members: return
+        shared_model = get_special_model(key[1], next(iter(batch_members)).fallback_model)
+        new_batch = Entity(parent=scene)
+        for member_entity in batch_members:
+            instance_holder = new_batch.attachNewNode('instance')
+            instance_holder.setTransform(member_entity.getTransform(scene))
+            shared_model.instanceTo(instance_holder)
+        new_batch.flattenStrong() # Merge all instances into as few geoms (draw calls) as possible
+        self.batches[key] = new_batch
+
+    def clear(self):
+        for old_batch in self.batches.values():
+            destroy(old_batch)
+        self.members.clear()
+        self.batches.clear()
+        self.dirty.clear()
+
+special_model_batcher = SpecialModelBatcher()
+
+VEGETATION_MODELS = {'grass': 'assets/grass.gltf', 'redflower': 'assets/redflower.gltf'} # Plant kind -> model
+VEGETATION_DENSITY_BANDS = ((2, 1.0), (4, 0.5), (6, 0.2)) # (max chunk distance from the player, share of plants drawn); none beyond
+VEGETATION_SCAN_INTERVAL = 0.5 # Seconds between checks of which chunks need their plant batch rebuilt
+VEGETATION_REBUILDS_PER_FRAME = 2 # Nearest chunks first; spreads the flattening cost over frames
+
+class VegetationManager: # Plants from TerrainGenerator.scatter_vegetation, drawn as one flattened node per chunk
+    def __init__(self):
+        self.pending = set() # Chunk positions whose batch is out of date
+        self.scan_timer = 0.0
+
+    def density_for(self, chunk_pos, player_chunk_pos):
+        chunk_distance = max(abs(chunk_pos[0] - player_chunk_pos[0]), abs(chunk_pos[1] - player_chunk_pos[1])) // CHUNK_SIZE
+        for max_chunk_distance, band_density in VEGETATION_DENSITY_BANDS:
+            if chunk_distance <= max_chunk_distance: return band_density
+        return 0.0
+
+    def update(self, vworld_veg, player_pos): # Called every frame
+        player_chunk_pos = ((floor(player_pos.x) // CHUNK_SIZE) * CHUNK_SIZE, (floor(player_pos.z) // CHUNK_SIZE) * CHUNK_SIZE)
+        self.scan_timer += time.dt
+        if self.scan_timer >= VEGETATION_SCAN_INTERVAL:
+            self.scan_timer = 0.0
+            for chunk_pos_veg, chunk_veg in vworld_veg.chunks.items():
+                if chunk_veg.vegetation_dirty or chunk_veg.vegetation_density != self.density_for(chunk_pos_veg, player_chunk_pos):
+                    self.pending.add(chunk_pos_veg)
+        for _ in range(min(VEGETATION_REBUILDS_PER_FRAME, len(self.pending))):
+            nearest_chunk_pos = min(self.pending, key=lambda chunk_pos_veg: max(abs(chunk_pos_veg[0] - player_chunk_pos[0]),
+                                                                                abs(chunk_pos_veg[1] - player_chunk_pos[1])))
+            self.pending.discard(nearest_chunk_pos)
+            chunk_veg = vworld_veg.chunks.get(nearest_chunk_pos)
+            if chunk_veg is not None: # Unloaded meanwhile otherwise
+                self.rebuild(vworld_veg, chunk_veg, self.density_for(nearest_chunk_pos, player_chunk_pos))
+
+    def rebuild(self, vworld_veg, chunk_veg, density):
+        chunk_veg.clear_vegetation()
+        chunk_veg.vegetation_density = density
+        if density <= 0: return
+        if chunk_veg.vegetation_points is None:
+            chunk_veg.vegetation_points = vworld_veg.generator.scatter_vegetation(chunk_veg.chunk_pos,
+                                                                                   vworld_veg.get_column_context(chunk_veg.chunk_pos))
+        vegetation_batch = None
+        for plant_x, plant_y, plant_z, plant_kind, plant_yaw, plant_scale, plant_rank in chunk_veg.vegetation_points:
+            if plant_rank >= density: continue
+            plant_cell = (floor(plant_x), plant_y, floor(plant_z))
+            ground_cell = (plant_cell[0], plant_y - 1, plant_cell[2])
+            if vworld_veg.get_block(ground_cell) != 'grass' or vworld_veg.get_block(plant_cell) is not None:
+                continue # Built over, dug away or flooded
+            if vegetation_batch is None: vegetation_batch = Entity(parent=scene)
+            plant_holder = vegetation_batch.attachNewNode('plant')
+            plant_holder.setPos(plant_x, plant_y, plant_z)
+            plant_holder.setH(plant_yaw)
+            plant_holder.setScale(plant_scale)
+            get_special_model(VEGETATION_MODELS[plant_kind], 'quad').instanceTo(plant_holder)
+            chunk_veg.vegetation_cells.add(plant_cell)
+            chunk_veg.vegetation_cells.add(ground_cell)
+        if vegetation_batch is not None:
+            vegetation_batch.flattenStrong() # All plants of the chunk in a few geoms
+            chunk_veg.vegetation_entity = vegetation_batch
+
+    def clear(self):
+        self.pending.clear()
+        self.scan_timer = 0.0
+
+vegetation_manager = VegetationManager()
+
+class BatchedModelEntity(Entity): # Collider and logic only; the model is drawn by special_model_batcher
+    model_path = None
+    fallback_model = 'cube'
+    def __init__(self, base_pos, y_offset, entity_scale):
         super().__init__()
         self.base_pos = Vec3(*base_pos)
-        self.position = self.base_pos + Vec3(0.5,0.25,0.5) # Centered on block, slightly above ground
-        self.model = load_model('assets/pokeball.gltf') # Ensure this path is correct
-        if not self.model: self.model = 'sphere' # Fallback model
-        self.scale = 0.25 # Smaller scale
+        self.position = self.base_pos + Vec3(0.5,y_offset,0.5) # Centered on block
+        self.scale = entity_scale
         self.collider = BoxCollider(self, center=Vec3(0,0.5,0), size=Vec3(1,1,1)) # Relative to entity's origin
-        self.color = color.white # In case model has no color/texture
+        special_model_batcher.add(self) # Batch is built at the end of the frame, after any saved rotation is applied
     def rotate_self(self):
         self.rotation_y += 30
+        special_model_batcher.mark_dirty(self)
+    def on_destroy(self):
+        special_model_batcher.remove(self)
 
-class FoxfoxEntity(Entity):
+class PokeballEntity(BatchedModelEntity):
+    model_path = 'assets/pokeball.gltf'
+    fallback_model = 'sphere'
     def __init__(self, base_pos):
-        super().__init__()
-        self.base_pos = Vec3(*base_pos)
-        self.position = self.base_pos + Vec3(0.5,0.375,0.5) # Centered, adjust Y based on model
-        self.model = load_model('assets/foxfox.gltf') # Ensure path is correct
-        if not self.model: self.model = 'cube' # Fallback
-        self.scale = 0.375 # Adjust scale
-        self.collider = BoxCollider(self, center=Vec3(0,0.5,0), size=Vec3(1,1,1)) # Relative
-        self.color = color.white
-    def rotate_self(self):
-        self.rotation_y += 30
+        super().__init__(base_pos, 0.25, 0.25) # Slightly above ground, smaller scale
+
+class FoxfoxEntity(BatchedModelEntity):
+    model_path = 'assets/foxfox.gltf'
+    fallback_model = 'cube'
+    def __init__(self, base_pos):
+        super().__init__(base_pos, 0.375, 0.375) # Adjust Y and scale based on model
+
+def destroy_special_entity(special_entity): # A door hangs from its own pivot entity, which has to go with it
+    destroy(getattr(special_entity, 'pivot', special_entity))
 
 class ParticleBlockEntity(Entity): # This is a standard block, not an entity to be placed separately usually
     def __init__(self, base_pos): # This class might be redundant if PARTICLE_BLOCK is just a type
@@ -405,106 +603,211 @@ class ParticleBlockEntity(Entity): # This is a standard block, not an entity to
         # If it's just an effect manager, it might not need a collider.
         # For now, assume it's an effect tied to a 'particleblock' type in self.blocks.
         self.visible = False # The effect manager itself is not visible.
-    def update(self):
-        # Logic for spawning particles based on self.settings if this is an emitter
-        pass
+        # An emitter would spawn particles from a tick(dt) registered with entity_scheduler.activate
 
 
 #############################################
 # 9) BFS Water Spread Functions
 #############################################
-water_spread_queue = []
-def process_water_spread():
-    now = time.time()
-    processed_in_step = 0
-    max_processed_per_step = 10 # Limit water spread per frame
-
-    for ev_idx in range(len(water_spread_queue) -1, -1, -1): # Iterate backwards for safe removal
-        if processed_in_step >= max_processed_per_step:
-            break
-        
-        ev = water_spread_queue[ev_idx]
-        if ev['time_to_spread'] <= now:
-            water_spread_queue.pop(ev_idx) # Remove event
-            pos_to_fill = ev['pos']
-            dist_remaining = ev['dist']
-            # direction_of_spread = ev['direction'] # Not used in current spread logic
-
-            # Check if block at pos_to_fill is air (None)
-            if world.get_block(pos_to_fill) is None:
-                world.set_block(pos_to_fill, 'water') # Place water block
-                processed_in_step += 1
-                if dist_remaining > 0:
-                    # Schedule further spread from the newly placed water block
-                    # Spread to horizontal neighbors and one block down
-                    # Original function spread_water_slowly had more complex directionality
-                    # This is a simplified re-spread:
-                    simple_spread_offsets = [(1,0,0), (-1,0,0), (0,0,1), (0,0,-1), (0,-1,0)]
-                    for off in simple_spread_offsets:
-                        next_pos = (pos_to_fill[0]+off[0], pos_to_fill[1]+off[1], pos_to_fill[2]+off[2])
-                        # Check if next_pos is air before scheduling
-                        if world.get_block(next_pos) is None:
-                             # Spread with slightly less distance, fixed delay
-                            schedule_water_spread(next_pos, dist_remaining -1, Vec3(0,0,0), delay=0.3)
+import heapq # Time-ordered fluid updates
 
+FLUID_TICK_SECONDS = 0.1 # Fluids advance in fixed steps, independent of the frame rate
+FLUID_CELLS_PER_TICK = 256 # Most cells filled per step; the rest wait for the next step
+FLUID_MAX_TICKS_PER_FRAME = 3 # After a long frame, skip steps instead of stalling to catch up
+FLUID_SPREAD_OFFSETS = ((1,0,0), (-1,0,0), (0,0,1), (0,0,-1), (0,-1,0)) # Sideways and down
 
-def schedule_water_spread(pos, dist, direction, delay=0.2): # Direction currently not used in simplified spread
-    # Check if a spread event for this position is already scheduled to avoid duplicates
-    for existing_event in water_spread_queue:
-        if existing_event['pos'] == pos:
+
+class FluidSimulator: # Event-driven spread of one fluid block type
+    def __init__(self, fluid_type):
+        self.fluid_type = fluid_type
+        self.pending_cells = [] # Heap of (due tick, sequence, pos, spread distance left)
+        self.scheduled_cells = set() # Positions with an entry in pending_cells, so scheduling is O(1)
+        self.current_tick = 0
+        self.tick_time_accumulator = 0.0
+        self.schedule_sequence = 0 # Keeps cells due in the same tick in the order they were scheduled
+
+    def schedule(self, pos, dist, delay=0.2): # Fill pos (if still air) after delay seconds
+        if pos in self.scheduled_cells:
             return # Already scheduled for this position
+        due_tick = self.current_tick + max(1, round(delay / FLUID_TICK_SECONDS))
+        self.schedule_sequence += 1
+        heapq.heappush(self.pending_cells, (due_tick, self.schedule_sequence, pos, dist))
+        self.scheduled_cells.add(pos)
+
+    def update(self, dt, world_to_update): # Called every frame
+        self.tick_time_accumulator += dt
+        ticks_run = 0
+        while self.tick_time_accumulator >= FLUID_TICK_SECONDS and ticks_run < FLUID_MAX_TICKS_PER_FRAME:
+            self.tick_time_accumulator -= FLUID_TICK_SECONDS
+            self.tick(world_to_update)
+            ticks_run += 1
+        if ticks_run == FLUID_MAX_TICKS_PER_FRAME:
+            self.tick_time_accumulator = min(self.tick_time_accumulator, FLUID_TICK_SECONDS)
+
+    def tick(self, world_to_update):
+        self.current_tick += 1
+        filled_cells = {} # pos -> fluid, written in one batch so each chunk is remeshed once
+        while self.pending_cells and self.pending_cells[0][0] <= self.current_tick and len(filled_cells) < FLUID_CELLS_PER_TICK:
+            _, _, pos_to_fill, dist_remaining = heapq.heappop(self.pending_cells)
+            self.scheduled_cells.discard(pos_to_fill)
+            if pos_to_fill in filled_cells or world_to_update.get_block(pos_to_fill) is not None:
+                continue # Filled by something else since it was scheduled
+            if world_to_update.vworld.chunk_at(pos_to_fill) is None:
+                continue # Reached the edge of the loaded world (set_blocks would skip it anyway)
+            filled_cells[pos_to_fill] = self.fluid_type
+            if dist_remaining > 0:
+                for off_x, off_y, off_z in FLUID_SPREAD_OFFSETS:
+                    next_pos = (pos_to_fill[0] + off_x, pos_to_fill[1] + off_y, pos_to_fill[2] + off_z)
+                    if next_pos not in filled_cells and world_to_update.get_block(next_pos) is None:
+                        self.schedule(next_pos, dist_remaining - 1, delay=0.3)
+        if filled_cells:
+            world_to_update.set_blocks(filled_cells.items())
+
+    def clear(self): # New world: drop everything still pending
+        self.pending_cells = []
+        self.scheduled_cells.clear()
+        self.tick_time_accumulator = 0.0
+
+
+water_simulator = FluidSimulator('water')
+
+
+def process_water_spread(): # Called every frame from update()
+    water_simulator.update(time.dt, world)
 
-    water_spread_queue.append({
-        'pos': pos,
-        'dist': dist,
-        'direction': direction, # Retained for potential future use
-        'time_to_spread': time.time() + delay
-    })
 
-# Original spread_water_slowly is effectively replaced by logic in process_water_spread
-# and schedule_water_spread. If more complex directional spread is needed, it would be revived.
+def schedule_water_spread(pos, dist, direction, delay=0.2): # Direction currently not used in simplified spread
+    water_simulator.schedule(pos, dist, delay)
 
-def soak_up_water(center_pos, radius=5): # BFS for soaking
-    visited_soak = set()
-    queue_soak = deque()
-    queue_soak.append((center_pos, 0)) # (position, distance_traveled)
-    
-    # 3D offsets for checking all neighbors
-    soak_offsets = []
-    for dx_soak in [-1,0,1]:
-        for dy_soak in [-1,0,1]:
-            for dz_soak in [-1,0,1]:
-                if dx_soak==0 and dy_soak==0 and dz_soak==0:
-                    continue
-                soak_offsets.append((dx_soak,dy_soak,dz_soak))
-
-    blocks_soaked = 0
-    while queue_soak:
-        (current_x, current_y, current_z), dist = queue_soak.popleft()
-
-        if dist > radius: # Stop if beyond soak radius
-            continue
-        if (current_x, current_y, current_z) in visited_soak: # Already processed
-            continue
-        visited_soak.add((current_x, current_y, current_z))
-
-        if world.get_block((current_x, current_y, current_z)) == 'water':
-            world.set_block((current_x, current_y, current_z), None) # Remove water
-            blocks_soaked +=1
-
-        # Add neighbors to queue
-        for off_s_x, off_s_y, off_s_z in soak_offsets:
-            next_x, next_y, next_z = current_x + off_s_x, current_y + off_s_y, current_z + off_s_z
-            next_dist = dist + 1
-            if next_dist <= radius: # Only add if within radius
-                queue_soak.append(((next_x, next_y, next_z), next_dist))
+def soak_up_water(center_pos, radius=5): # Clears water within radius (a cube, like the old 26-neighbor flood)
+    cx_soak, cy_soak, cz_soak = center_pos
+    blocks_soaked = world.replace_in_box((cx_soak - radius, cy_soak - radius, cz_soak - radius),
+                                         (cx_soak + radius, cy_soak + radius, cz_soak + radius), 'water', None)
     if blocks_soaked > 0: print(f"Sponge soaked {blocks_soaked} water blocks.")
 
 
 #############################################
-# 10) Bubble Particles
+# 10) Bubble Particles and Pooled Particle Systems
 #############################################
-class BubbleParticle(Entity):
+try:
+    import numpy as np # Pooled particle state; without it particles fall back to one Entity each
+except ImportError:
+    np = None
+
+PARTICLE_CORNERS = ((-1, -1), (1, -1), (1, 1), (-1, 1)) # Quad corners in camera right/up units
+DEBRIS_PARTICLE_CAPACITY = 512 # Oldest debris is recycled once the pool is full
+BUBBLE_PARTICLE_CAPACITY = 128
+
+class ParticleSystem(Entity): # Fixed-size particle pool integrated in one vectorized step, drawn as a single dynamic mesh
+    def __init__(self, capacity, texture=None, gravity=0.0):
+        super().__init__(parent=scene, model=Mesh(vertices=[], static=False), texture=texture, double_sided=True)
+        self.capacity = capacity
+        self.gravity = gravity # Units/s^2 pulled off the y velocity every frame
+        self.positions = np.zeros((capacity, 3), dtype=np.float32)
+        self.velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self.ages = np.zeros(capacity, dtype=np.float32)
+        self.lifetimes = np.ones(capacity, dtype=np.float32)
+        self.sizes = np.zeros(capacity, dtype=np.float32) # Quad half-extent
+        self.colors = np.zeros((capacity, 4), dtype=np.float32) # RGBA 0..1, alpha fades out over the lifetime
+        self.alive = np.zeros(capacity, dtype=bool)
+        # Index and UV buffers never change; each frame uses the first 6/4 entries per live particle
+        self.quad_triangles = (np.arange(capacity, dtype=np.uint32)[:, None] * 4 +
+                               np.array([0, 1, 2, 2, 3, 0], dtype=np.uint32)).ravel()
+        self.quad_uvs = np.tile(np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=np.float32), (capacity, 1))
+        self.corner_signs = np.array(PARTICLE_CORNERS, dtype=np.float32)
+        self.mesh_is_empty = True
+
+    def emit(self, positions, velocities, lifetimes, sizes, colors): # Arrays with one row per new particle
+        count_new = min(len(positions), self.capacity)
+        if count_new <= 0: return
+        # Free slots first, then the particles closest to the end of their life
+        slot_priority = np.where(self.alive, self.ages / self.lifetimes, 2.0)
+        slots = np.argpartition(-slot_priority, count_new - 1)[:count_new]
+        self.positions[slots] = positions[:count_new]
+        self.velocities[slots] = velocities[:count_new]
+        self.lifetimes[slots] = lifetimes[:count_new]
+        self.sizes[slots] = sizes[:count_new]
+        self.colors[slots] = colors[:count_new]
+        self.ages[slots] = 0.0
+        self.alive[slots] = True
+        entity_scheduler.activate(self)
+
+    def tick(self, dt): # Scheduled while any particle is alive
+        if not self.alive.any():
+            if not self.mesh_is_empty: self.clear()
+            return False
+        dt_particles = min(dt, 0.1) # A long frame should not fling debris across the map
+        if self.gravity:
+            self.velocities[:, 1] -= self.gravity * dt_particles
+        self.positions += self.velocities * dt_particles # Dead slots move too; cheaper than masking
+        self.ages += dt_particles
+        self.alive &= self.ages < self.lifetimes
+        self.rebuild_mesh()
+        return True
+
+    def rebuild_mesh(self):
+        live_slots = np.flatnonzero(self.alive)
+        live_count = len(live_slots)
+        if live_count == 0:
+            self.clear()
+            return
+        camera_right = np.array(tuple(camera.right), dtype=np.float32)
+        camera_up = np.array(tuple(camera.up), dtype=np.float32)
+        corner_offsets = self.corner_signs[:, 0:1] * camera_right + self.corner_signs[:, 1:2] * camera_up # (4, 3)
+        quad_vertices = (self.positions[live_slots][:, None, :] +
+                         corner_offsets[None, :, :] * self.sizes[live_slots][:, None, None]) # (n, 4, 3)
+        quad_colors = self.colors[live_slots].copy()
+        quad_colors[:, 3] *= 1.0 - self.ages[live_slots] / self.lifetimes[live_slots]
+        mesh_particles = self.model
+        mesh_particles.vertices = quad_vertices.reshape(-1)
+        mesh_particles.colors = np.repeat(quad_colors, 4, axis=0).reshape(-1)
+        mesh_particles.uvs = self.quad_uvs[:live_count * 4].reshape(-1)
+        mesh_particles.triangles = self.quad_triangles[:live_count * 6]
+        mesh_particles.generate()
+        self.mesh_is_empty = False
+
+    def clear(self):
+        self.alive[:] = False
+        self.model.vertices = []
+        self.model.colors = []
+        self.model.uvs = []
+        self.model.triangles = []
+        self.model.generate()
+        self.mesh_is_empty = True
+
+debris_particles = None # ParticleSystem for block-break debris, created on first use
+bubble_particles = None # ParticleSystem for underwater bubbles
+
+def spawn_debris(block_world_position, block_type_debris, debris_count):
+    global debris_particles
+    if np is None:
+        for _ in range(debris_count): Debris(block_world_position, block_type_debris)
+        return
+    if debris_particles is None:
+        debris_particles = ParticleSystem(DEBRIS_PARTICLE_CAPACITY, gravity=9.8)
+    block_rgb = THUMBNAIL_BLOCK_COLORS.get(block_type_debris, THUMBNAIL_DEFAULT_COLOR)
+    debris_colors = np.empty((debris_count, 4), dtype=np.float32)
+    debris_colors[:, :3] = (np.array(block_rgb, dtype=np.float32) / 255.0 *
+                            np.random.uniform(0.75, 1.0, (debris_count, 1))) # Slight shade variation per chip
+    debris_colors[:, 3] = 1.0
+    debris_velocities = np.random.uniform((-2, 2, -2), (2, 5, 2), (debris_count, 3)) # Upwards pop
+    debris_particles.emit(np.tile(np.array(block_world_position, dtype=np.float32) + 0.5, (debris_count, 1)), # Center of block
+                          debris_velocities, np.random.uniform(0.8, 1.5, debris_count),
+                          np.random.uniform(0.025, 0.075, debris_count), debris_colors)
+
+def spawn_bubble(start_pos):
+    global bubble_particles
+    if np is None:
+        BubbleParticle(start_pos)
+        return
+    if bubble_particles is None:
+        bubble_particles = ParticleSystem(BUBBLE_PARTICLE_CAPACITY, texture='circle')
+    bubble_velocity = np.array([(random.uniform(-0.1, 0.1), random.uniform(0.3, 0.8), random.uniform(-0.1, 0.1))])
+    bubble_color = np.array([(180/255, 180/255, 1.0, random.randint(100, 180)/255)]) # Light blueish
+    bubble_particles.emit(np.array([tuple(start_pos)]), bubble_velocity, np.array([random.uniform(1.0, 2.5)]),
+                          np.array([random.uniform(0.025, 0.075)]), bubble_color)
+
+class BubbleParticle(Entity): # Fallback bubble when NumPy is unavailable
     def __init__(self, start_pos):
         super().__init__(parent=scene, model='quad', texture='circle', # Ensure 'circle' texture exists
                          scale=random.uniform(0.05, 0.15), position=start_pos, billboard=True)
@@ -514,28 +817,31 @@ class BubbleParticle(Entity):
         self.y_vel = random.uniform(0.3, 0.8) # Upward velocity
         self.x_drift = random.uniform(-0.1, 0.1) # Sideways drift
         self.z_drift = random.uniform(-0.1, 0.1)
+        entity_scheduler.activate(self)
 
-    def update(self):
-        dt_bubbles = time.dt
+    def tick(self, dt_bubbles):
         self.position += Vec3(self.x_drift*dt_bubbles, self.y_vel*dt_bubbles, self.z_drift*dt_bubbles)
         
         age = time.time() - self.spawn_time
         if age > self.lifetime:
             destroy(self)
-            return
+            return False
         
         # Fade out based on age
         ratio_bubbles = age / self.lifetime
         self.alpha = 1 - ratio_bubbles
+        return True
 
 bubble_timer = 0 # Global timer for bubble spawning
+bubble_head_watch = None # BlockWatch of the player's head cell, created on first use
 def spawn_bubbles_update(): # Call this in main update loop
-    global bubble_timer
+    global bubble_timer, bubble_head_watch
     if not player or not world: return
+    if bubble_head_watch is None: bubble_head_watch = BlockWatch()
     
     # Check if player's head is in water
     player_head_y = player.y + player.height - 0.1 # Approximate head position
-    if world.get_block((floor(player.x), floor(player_head_y), floor(player.z))) == 'water':
+    if bubble_head_watch.read(world.vworld, ((floor(player.x), floor(player_head_y), floor(player.z)),))[0] == 'water':
         bubble_timer += time.dt
         if bubble_timer > 0.5: # Spawn bubbles every 0.5 seconds
             bubble_timer = 0
@@ -544,13 +850,13 @@ def spawn_bubbles_update(): # Call this in main update loop
                 spawn_pos_bubbles = player.camera_pivot.world_position +                                     player.camera_pivot.forward * random.uniform(0.1, 0.5) +                                     Vec3(random.uniform(-0.3,0.3), 
                                          random.uniform(-0.2,0.2), 
                                          random.uniform(-0.3,0.3))
-                BubbleParticle(spawn_pos_bubbles)
+                spawn_bubble(spawn_pos_bubbles)
 
 
 #############################################
 # 11) Debris and Pickup Items
 #############################################
-class Debris(Entity): # Visual effect for block breaking
+class Debris(Entity): # Visual effect for block breaking (fallback when NumPy is unavailable)
     def __init__(self, block_world_position, block_type_debris):
         # Ensure texture exists for debris, fallback if not
         debris_texture = texture_mapping.get(block_type_debris, stone_texture) 
@@ -570,10 +876,9 @@ class Debris(Entity): # Visual effect for block breaking
                                             random.uniform(-180,180),
                                             random.uniform(-180,180))
         self.gravity_debris = 9.8
+        entity_scheduler.activate(self)
 
-    def update(self):
-        dt_debris = time.dt
-        
+    def tick(self, dt_debris):
         # Basic physics: gravity and velocity
         self.velocity_debris.y -= self.gravity_debris * dt_debris
         self.position += self.velocity_debris * dt_debris
@@ -586,55 +891,171 @@ class Debris(Entity): # Visual effect for block breaking
         # Lifetime check
         if time.time() - self.start_time_debris > self.lifetime_debris:
             destroy(self)
-
-class PickupItem(Entity): # Item that can be collected by player
-    def __init__(self, item_type_pickup, world_position_pickup):
+            return False
+        return True
+
+PICKUP_CELL_SIZE = 4 # Blocks per spatial-hash cell side (must exceed the pickup radius)
+PICKUP_RADIUS = 1.5 # Horizontal distance at which the player collects a pickup
+PICKUP_MERGE_RADIUS = 1.0 # Landed pickups of the same type closer than this become one stack
+PICKUP_MAX_STACK = 100 # Same as an inventory slot
+PICKUP_LIFETIME = 45.0 # Seconds before an uncollected stack despawns
+PICKUP_ANIMATE_CELL_RADIUS = 3 # Cells around the player whose resting pickups spin and bob
+PICKUP_VOID_Y = -64 # Falling pickups below this height are dropped
+
+class PickupItem(Entity): # Item stack lying in the world; moved and collected by PickupManager
+    def __init__(self, item_type_pickup, world_position_pickup, count=1):
         pickup_texture = texture_mapping.get(item_type_pickup, stone_texture) # Fallback texture
         
         super().__init__(parent=scene, model='cube', texture=pickup_texture,
                          scale=0.25, # Slightly larger than debris
-                         position=Vec3(*world_position_pickup) + Vec3(0.5,0.5,0.5), # Center of block
-                         collider='box' # Add collider for raycast or collision based pickup
-                        )
+                         position=Vec3(*world_position_pickup) + Vec3(0.5,0.5,0.5)) # Center of block
         self.item_type_pickup = item_type_pickup
+        self.count = count # Items in this stack
         self.velocity_pickup = Vec3(random.uniform(-0.5,0.5), 2, random.uniform(-0.5,0.5)) # Slight pop up
-        self.gravity_pickup = 9.8
-        self.pickup_radius_sq = 1.5**2 # Radius for player to pick up (squared for efficiency)
-        self.lifetime_pickup = 45.0 # Longer lifetime for pickups (e.g., 45 seconds)
-        self.spawn_time_pickup = time.time()
-        self.grounded_pickup = False
+        self.expire_time = time.time() + PICKUP_LIFETIME
+        self.resting_on = None # Block position this pickup sleeps on, None while falling
+        self.cell = None # Spatial-hash cell while resting
+        self.ground_y = 0.0 # Resting height the bobbing animation is relative to
+        self.removed_pickup = False
 
-    def update(self):
-        dt_pickup = time.dt
+class PickupManager: # Moves falling pickups, collects and animates those near the player; resting pickups elsewhere cost nothing
+    def __init__(self):
+        self.falling = set() # Pickups integrated every frame
+        self.cells = {} # (cell_x, cell_z) -> set of resting pickups
+        self.resting_on = {} # (x,y,z) of a supporting block -> set of pickups sleeping on it
+        self.expiry_heap = [] # (expire_time, serial, pickup); stale entries are skipped when popped
+        self.serial = 0
+
+    def cell_of(self, x, z):
+        return (floor(x / PICKUP_CELL_SIZE), floor(z / PICKUP_CELL_SIZE))
+
+    def spawn(self, item_type_to_spawn, spawn_pos, count=1):
+        new_pickup = PickupItem(item_type_to_spawn, spawn_pos, count)
+        self.falling.add(new_pickup)
+        self.push_expiry(new_pickup)
+        return new_pickup
+
+    def push_expiry(self, pickup):
+        self.serial += 1
+        heapq.heappush(self.expiry_heap, (pickup.expire_time, self.serial, pickup))
+
+    def remove(self, pickup):
+        if pickup.removed_pickup: return # Merged or collected before its expiry entry came up
+        pickup.removed_pickup = True
+        self.falling.discard(pickup)
+        if pickup.cell is not None:
+            cell_pickups = self.cells.get(pickup.cell)
+            if cell_pickups is not None:
+                cell_pickups.discard(pickup)
+                if not cell_pickups: del self.cells[pickup.cell]
+            pickup.cell = None
+        if pickup.resting_on is not None:
+            supported_pickups = self.resting_on.get(pickup.resting_on)
+            if supported_pickups is not None:
+                supported_pickups.discard(pickup)
+                if not supported_pickups: del self.resting_on[pickup.resting_on]
+            pickup.resting_on = None
+        destroy(pickup)
+
+    def land(self, pickup, block_below_pos):
+        self.falling.discard(pickup)
+        pickup.ground_y = block_below_pos[1] + 1.125 # Settle on the block (half the 0.25 scale above its top)
+        pickup.position = Vec3(pickup.x, pickup.ground_y, pickup.z)
+        pickup.velocity_pickup = Vec3(0,0,0) # Stop movement
+        if self.merge_into_neighbor(pickup): return
+        pickup.cell = self.cell_of(pickup.x, pickup.z)
+        pickup.resting_on = block_below_pos
+        self.cells.setdefault(pickup.cell, set()).add(pickup)
+        self.resting_on.setdefault(block_below_pos, set()).add(pickup)
+
+    def merge_into_neighbor(self, pickup): # Fold a landed pickup into a resting stack of the same type nearby
+        cell_x, cell_z = self.cell_of(pickup.x, pickup.z)
+        merge_radius_sq = PICKUP_MERGE_RADIUS ** 2
+        for dx_cell in (-1, 0, 1):
+            for dz_cell in (-1, 0, 1):
+                for other_pickup in self.cells.get((cell_x + dx_cell, cell_z + dz_cell), ()):
+                    if other_pickup.item_type_pickup != pickup.item_type_pickup: continue
+                    if other_pickup.count + pickup.count > PICKUP_MAX_STACK: continue
+                    if abs(other_pickup.ground_y - pickup.ground_y) > 0.5: continue
+                    if distance_xz_sq(other_pickup.position, pickup.position) > merge_radius_sq: continue
+                    other_pickup.count += pickup.count
+                    if pickup.expire_time > other_pickup.expire_time: # The stack lives as long as its newest item
+                        other_pickup.expire_time = pickup.expire_time
+                        self.push_expiry(other_pickup)
+                    self.remove(pickup)
+                    return True
+        return False
 
-        if not self.grounded_pickup:
-            self.velocity_pickup.y -= self.gravity_pickup * dt_pickup
-            self.position += self.velocity_pickup * dt_pickup
-            
-            # Simple ground collision check (assuming ground is around y=integer levels)
-            # This would be more robust with raycasting or checking actual block below
-            block_below_pos = (floor(self.position.x), floor(self.position.y - 0.1), floor(self.position.z))
-            if world.get_block(block_below_pos) is not None:
-                self.position.y = floor(self.position.y) + 0.25 # Settle on ground (adjust 0.25 to half of scale)
-                self.grounded_pickup = True
-                self.velocity_pickup = Vec3(0,0,0) # Stop movement
-
-        # Bobbing animation when grounded
-        if self.grounded_pickup:
-            self.rotation_y += 30 * dt_pickup # Gentle rotation
-            self.position.y = floor(self.position.y) + 0.25 + sin(time.time() * 2) * 0.05 # Bobbing
+    def blocks_changed(self, block_changes): # BlockChangeBus subscriber: wake pickups sleeping on edited blocks
+        if not self.resting_on: return
+        for block_pos, _ in block_changes:
+            supported_pickups = self.resting_on.pop(block_pos, None)
+            if not supported_pickups: continue
+            for pickup in supported_pickups:
+                pickup.resting_on = None
+                cell_pickups = self.cells.get(pickup.cell)
+                if cell_pickups is not None:
+                    cell_pickups.discard(pickup)
+                    if not cell_pickups: del self.cells[pickup.cell]
+                pickup.cell = None
+                pickup.position = Vec3(pickup.x, pickup.ground_y, pickup.z) # Drop from the un-bobbed height
+                self.falling.add(pickup)
+
+    def try_collect(self, pickup):
+        if abs(pickup.world_position.y - (player.world_position.y + player.height/2)) >= player.height: return False
+        while pickup.count > 0 and add_item_to_inventory(pickup.item_type_pickup):
+            pickup.count -= 1
+        if pickup.count == 0:
+            self.remove(pickup) # Item picked up
+            return True
+        return False
 
-        # Lifetime check
-        if time.time() - self.spawn_time_pickup > self.lifetime_pickup:
-            destroy(self)
-            return
-        
-        # Player pickup check
-        if player and distance_xz_sq(self.world_position, player.world_position) < self.pickup_radius_sq:
-            # Check Y distance as well
-            if abs(self.world_position.y - (player.world_position.y + player.height/2)) < player.height:
-                if add_item_to_inventory(self.item_type_pickup):
-                    destroy(self) # Item picked up
+    def update(self):
+        if not world: return
+        dt_pickup = time.dt
+        now_pickup = time.time()
+
+        # Lifetime: only the soonest-expiring stacks are looked at
+        while self.expiry_heap and self.expiry_heap[0][0] <= now_pickup:
+            expire_time, _, pickup = heapq.heappop(self.expiry_heap)
+            if pickup.expire_time == expire_time: self.remove(pickup)
+
+        for pickup in list(self.falling):
+            pickup.velocity_pickup.y -= 9.8 * dt_pickup
+            pickup.position += pickup.velocity_pickup * dt_pickup
+            block_below_pos = (floor(pickup.x), floor(pickup.y - 0.125), floor(pickup.z))
+            if pickup.velocity_pickup.y <= 0 and world.get_block(block_below_pos) is not None:
+                self.land(pickup, block_below_pos)
+            elif pickup.y < PICKUP_VOID_Y: # Fell out of the world
+                self.remove(pickup)
+
+        if not player: return
+        pickup_radius_sq = PICKUP_RADIUS ** 2
+        for pickup in list(self.falling):
+            if distance_xz_sq(pickup.world_position, player.world_position) < pickup_radius_sq:
+                self.try_collect(pickup)
+        player_cell_x, player_cell_z = self.cell_of(player.x, player.z)
+        bob_offset = sin(now_pickup * 2) * 0.05
+        for dx_cell in range(-PICKUP_ANIMATE_CELL_RADIUS, PICKUP_ANIMATE_CELL_RADIUS + 1):
+            for dz_cell in range(-PICKUP_ANIMATE_CELL_RADIUS, PICKUP_ANIMATE_CELL_RADIUS + 1):
+                cell_pickups = self.cells.get((player_cell_x + dx_cell, player_cell_z + dz_cell))
+                if not cell_pickups: continue
+                is_collect_cell = abs(dx_cell) <= 1 and abs(dz_cell) <= 1
+                for pickup in list(cell_pickups):
+                    pickup.rotation_y += 30 * dt_pickup # Gentle rotation
+                    pickup.y = pickup.ground_y + bob_offset # Bobbing
+                    if is_collect_cell and distance_xz_sq(pickup.world_position, player.world_position) < pickup_radius_sq:
+                        self.try_collect(pickup)
+
+    def clear(self): # Drop every pickup, e.g. when another world is loaded
+        for pickup in list(self.falling) + [p for cell_pickups in self.cells.values() for p in cell_pickups]:
+            destroy(pickup)
+        self.falling.clear()
+        self.cells.clear()
+        self.resting_on.clear()
+        self.expiry_heap.clear()
+
+pickup_manager = PickupManager()
 
 def distance_xz_sq(pos1, pos2): # Helper for squared XZ distance
     return (pos1.x - pos2.x)**2 + (pos1.z - pos2.z)**2
@@ -678,7 +1099,7 @@ def add_item_to_inventory(item_type_to_add):
 def spawn_pickup(item_type_to_spawn, block_world_pos_spawn):
     # Spawn slightly above the block's original position
     pickup_spawn_pos = (block_world_pos_spawn[0], block_world_pos_spawn[1] + 0.5, block_world_pos_spawn[2])
-    PickupItem(item_type_to_spawn, pickup_spawn_pos)
+    pickup_manager.spawn(item_type_to_spawn, pickup_spawn_pos)
 
 
 #############################################
@@ -982,6 +1403,9 @@ class CustomPlayer(FirstPersonController):
         self.swim_move_force = 300.0 # Force for swimming movement
         self.max_swim_speed_vertical = 2.0 # Max speed for bobbing/sinking
         self.max_swim_speed_horizontal = 4.0 # Max speed for horizontal swimming
+        # Blocks probed every frame, re-read only when the player crosses into other cells or they are edited
+        self.water_watch = BlockWatch()
+        self.head_feet_watch = BlockWatch()
 
 
     def update(self):
@@ -1048,12 +1472,11 @@ class CustomPlayer(FirstPersonController):
         
         head_check_world_y = self.y + player_height - 0.1 
         head_block_coord = (floor(self.x), floor(head_check_world_y), floor(self.z))
-        block_at_head = world.get_block(head_block_coord)
+        feet_check_world_y = self.y + 0.1 
+        feet_block_coord = (floor(self.x), floor(feet_check_world_y), floor(self.z))
+        block_at_head, block_at_feet = self.head_feet_watch.read(world.vworld, (head_block_coord, feet_block_coord))
 
         if block_at_head and block_at_head != 'water':
-            feet_check_world_y = self.y + 0.1 
-            feet_block_coord = (floor(self.x), floor(feet_check_world_y), floor(self.z))
-            block_at_feet = world.get_block(feet_block_coord)
 
             if not block_at_feet or block_at_feet == 'water':
                 if hasattr(self, 'previous_position') and self.previous_position != self.position:
@@ -1095,12 +1518,8 @@ class CustomPlayer(FirstPersonController):
             self.position + Vec3(0, self.height * 0.5, 0), # Waist
             self.position + Vec3(0, self.height * 0.9, 0)  # Head
         ]
-        self.in_water = False
-        for pos_w_check in positions_to_check:
-            block_at_pos = world.get_block((floor(pos_w_check.x), floor(pos_w_check.y), floor(pos_w_check.z)))
-            if block_at_pos == 'water':
-                self.in_water = True
-                break
+        self.in_water = 'water' in self.water_watch.read(world.vworld, tuple((floor(pos_w_check.x), floor(pos_w_check.y), floor(pos_w_check.z))
+                                                                             for pos_w_check in positions_to_check))
     
     def input(self, key): # Player specific inputs (like camera toggle)
         super().input(key) # Allow FPC to handle its inputs (movement, jump)
@@ -1176,41 +1595,17 @@ def toggle_free_camera():
 # 16) Voxel World Classes (Chunk, World, etc.)
 #############################################
 from math import ceil # Added for atlas calculation
+from collections import OrderedDict # LRU cache of per-chunk column context
+import shutil # Removing region folders of overwritten worlds
+import threading # World saves are written on a background thread
 
-# Global constant for terrain generation, can be tuned
-BIOME_NOISE_FREQUENCY = 0.008 # Controls the size of biomes
-
-def generate_terrain_height(x, z, seed, max_terrain_height): # Renamed for clarity
-    base_freq_height = 0.012
-    hill_freq_height = 0.04
-    detail_freq_height = 0.08
-    
-    # Multiple noise layers for more interesting height variation
-    base_noise = pnoise2(x * base_freq_height, z * base_freq_height, octaves=2, persistence=0.5, lacunarity=2.0, base=seed)
-    hill_noise = pnoise2(x * hill_freq_height, z * hill_freq_height, octaves=3, persistence=0.4, lacunarity=2.0, base=seed + 1)
-    detail_noise = pnoise2(x * detail_freq_height, z * detail_freq_height, octaves=4, persistence=0.3, lacunarity=2.0, base=seed + 2)
-    
-    # Combine noise layers with different weights
-    # base_noise is usually -1 to 1. Scale to 0-1 for combining.
-    combined_noise = ( (base_noise + 1)/2 * 0.6 +    # Base terrain shape
-                       (hill_noise + 1)/2 * 0.3 +    # Hills and valleys
-                       (detail_noise + 1)/2 * 0.1 )  # Finer details
-    
-    # Apply a non-linear transformation (e.g., power) to shape terrain
-    # Power > 1 flattens valleys and sharpens peaks. Power < 1 does opposite.
-    shaped_noise = combined_noise ** 1.2 # Experiment with this value
-    
-    # Scale to desired max_terrain_height
-    # Ensure minimum height (e.g., at least 1 block above world bottom if using -max_height)
-    # Let's assume height is relative to y=0 for simplicity here.
-    # So, final height is how many blocks *above* y=0.
-    calculated_height = floor(shaped_noise * max_terrain_height)
-    
-    # Ensure height is at least a minimum, e.g. 1, so there's always a ground layer
-    # This depends on how y-coordinates are handled (0 as sea level vs. 0 as world bottom)
-    # If max_terrain_height is the height *above* a base_level (e.g. y=0 is water plane)
-    final_height = max(1, calculated_height) 
-    return final_height
+# Terrain generation itself lives in worldgen.py (no Ursina dependency) so it is deterministic
+# and can run outside the game process.
+from worldgen import TerrainGenerator, DEFAULT_WORLD_SEED, GENERATOR_VERSION, WATER_LEVEL, WORLD_BOTTOM_Y, seed_from_text, add_explicit_sea_water
+from worldstore import GenerationCache, RegionStore, COMPRESSION_NAMES, region_dir_for_save, index_json_save, read_json_chunk, write_json_save
+from worldstore import EditJournal, journal_path_for_save, read_journal_edits
+from worldstore import (world_meta_from_settings, read_world_meta, write_world_meta, load_world_meta, remove_world_meta,
+                        thumbnail_path_for_save, write_png)
 
 
 class Chunk:
@@ -1218,6 +1613,21 @@ class Chunk:
         self.world = world_ref # Reference to the VoxelWorld instance
         self.chunk_pos = chunk_pos # Base position of this chunk (e.g., (0,0), (16,0))
         self.blocks = {} # Dictionary to store blocks: (world_x,y,z) -> block_type_string
+        self.edited_blocks = {} # Player edits since generation/load: (world_x,y,z) -> block (None = removed)
+        self.dirty = False # Changed since it was last written to the save (autosave only rewrites dirty chunks)
+        self.edit_version = 0 # Bumped on every edit; a save only clears dirty if nothing changed meanwhile
+        self.sea_floor_heights = None # {(wx, wz): lowest sea water y} of this chunk's sea columns, computed on first use
+        self.special_entities = {} # (world_x,y,z) -> Door/PokeballEntity/FoxfoxEntity; destroyed with the chunk
+        self.vegetation_points = None # Scattered plants of this chunk, computed when its batch is first built
+        self.vegetation_entity = None # Flattened plant batch (see VegetationManager)
+        self.vegetation_cells = set() # Plant cells and the grass under them; editing one rebuilds the batch
+        self.vegetation_density = 0.0 # Share of plants the current batch draws
+        self.vegetation_dirty = False
+        # Lazy worlds (see VoxelWorld.lazy_deep_generation) only generate a shell near the surface at first:
+        # {(wx, wz): y below which the column is not generated yet}, None once the chunk is complete
+        self.shell_floors = None
+        self.mesh_built = False
+        self.deep_borders_checked = False # Neighbours' ungenerated cells next to open cells of this chunk handled
 
         # Combined mesh entity for opaque terrain using a texture atlas
         self.opaque_terrain_entity = Entity(model=None, collider='mesh', shader=block_lighting_shader,
@@ -1232,312 +1642,76 @@ class Chunk:
             self.generate_terrain()
 
     def generate_terrain(self):
-        seed = 42 # World seed
-        max_height_gen = 30  # Max height of terrain generation from y=0
-        water_level_gen = 10 # Y-level for water surface
-        
-        # Use the global BIOME_NOISE_FREQUENCY
-        biome_freq_local = BIOME_NOISE_FREQUENCY 
-
-        for x_offset_chunk in range(CHUNK_SIZE):
-            for z_offset_chunk in range(CHUNK_SIZE):
-                wx = self.chunk_pos[0] + x_offset_chunk # World X
-                wz = self.chunk_pos[1] + z_offset_chunk # World Z
-
-                # Generate terrain height for this column (relative to y=0)
-                terrain_column_height = generate_terrain_height(wx, wz, seed, max_height_gen)
-                
-                # Biome determination based on noise (temperature, humidity) and height
-                temp_noise_val = (pnoise2(wx * biome_freq_local, wz * biome_freq_local, octaves=2, base=seed + 10) + 1) / 2 # 0-1
-                humidity_noise_val = (pnoise2(wx * biome_freq_local, wz * biome_freq_local, octaves=2, base=seed + 20) + 1) / 2 # 0-1
-
-                current_biome_name = "plains" # Default
-                top_block_terrain = "grass"
-                surface_material_terrain = "dirt"
-                underwater_ground_material = "sand" # Default for under water bodies
-
-                # --- Biome Logic ---
-                # Mountainous terrain (high elevation)
-                if terrain_column_height > max_height_gen * 0.65: 
-                    current_biome_name = "mountains"
-                    if temp_noise_val < 0.35: # Cold high mountains -> Snow
-                        top_block_terrain = "snow"
-                        surface_material_terrain = "snow" # Snow all the way down a bit
-                    else: # Rocky mountains
-                        top_block_terrain = "stone"
-                        surface_material_terrain = "stone"
-                # Desert (hot and dry, not too high)
-                elif temp_noise_val > 0.7 and humidity_noise_val < 0.3 and terrain_column_height <= max_height_gen * 0.5:
-                    current_biome_name = "desert"
-                    top_block_terrain = "sand"
-                    surface_material_terrain = "sandstone" # Or just more 'sand'
-                # Forest (moderate temp, high humidity, not too high)
-                elif temp_noise_val > 0.35 and temp_noise_val < 0.75 and humidity_noise_val > 0.55 and terrain_column_height <= max_height_gen * 0.6:
-                    current_biome_name = "forest"
-                    top_block_terrain = "grass" # Could be 'forest_floor' or 'podzol'
-                    surface_material_terrain = "dirt"
-                # Plains (default for moderate conditions)
-                else: 
-                    current_biome_name = "plains"
-                    top_block_terrain = "grass"
-                    surface_material_terrain = "dirt"
-
-                # Beach areas if land is near water level (and not a mountain)
-                if terrain_column_height > water_level_gen -1 and terrain_column_height <= water_level_gen + 2                     and current_biome_name not in ["mountains", "desert"]: # Beaches don't form on steep mountains
-                    current_biome_name = "beach" # Override biome if it's a beach
-                    top_block_terrain = "sand"
-                    surface_material_terrain = "sand"
-
-
-                # --- Block Placement Loop (from world bottom up to terrain_column_height) ---
-                # Assuming world bottom is at y = -max_height_gen or some negative value.
-                # For simplicity, let's assume y=0 is a base reference, and terrain goes above/below.
-                # Let's define world_bottom_y for clarity.
-                world_bottom_y = -max_height_gen // 2 # Example: terrain can go down to -15 if max_height_gen is 30
-
-                for y_current in range(world_bottom_y, terrain_column_height):
-                    if y_current == terrain_column_height - 1: # Topmost block of the land
-                        self.blocks[(wx, y_current, wz)] = top_block_terrain
-                    elif y_current >= terrain_column_height - 4: # Surface layer (3 blocks below top)
-                        self.blocks[(wx, y_current, wz)] = surface_material_terrain
-                    else: # Deeper underground
-                        self.blocks[(wx, y_current, wz)] = "stone"
-                
-                # --- Water Placement ---
-                # Fill with water from terrain_column_height up to water_level_gen if terrain is below water level
-                if terrain_column_height <= water_level_gen:
-                    for y_water_fill in range(terrain_column_height, water_level_gen + 1):
-                        # Place underwater ground material if this level was meant to be land but is now water due to biome context
-                        if y_water_fill == terrain_column_height -1 and current_biome_name in ["ocean", "lake", "river"]: # A bit redundant, top_block would be this
-                             self.blocks[(wx, y_water_fill, wz)] = underwater_ground_material
-                        else: # Fill with water
-                             self.blocks[(wx, y_water_fill, wz)] = "water"
-                    # Ensure the block just below water surface (if it's land) is appropriate (e.g. sand for beach)
-                    if self.blocks.get((wx, water_level_gen, wz)) == 'water' and                        current_biome_name == "beach": # If it's a beach and water is at water_level_gen
-                        if self.blocks.get((wx, water_level_gen -1, wz)) != 'water': # and block below is land
-                           self.blocks[(wx, water_level_gen -1, wz)] = "sand" # Make it sand
-
-
-        self.carve_caves(seed) 
-        self.place_ores_in_chunk(seed) # Call ore placement
-        self.place_trees_in_chunk(seed, water_level_gen, max_height_gen) # Pass water_level for tree checks
-
-    def place_ores_in_chunk(self, seed):
-        ore_types_info = {
-            'gold': {'texture': gold_texture, 'chance': 0.02, 'min_y': -25, 'max_y': 10, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 50},
-            'emerald': {'texture': emerald_texture, 'chance': 0.015, 'min_y': -30, 'max_y': 5, 'host': ['stone'], 'noise_octaves': 2, 'noise_seed_offset': 60},
-            'ruby': {'texture': ruby_texture, 'chance': 0.018, 'min_y': -28, 'max_y': 8, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 70}
-        }
-        ore_noise_freq = 0.08
-
-        # Iterate over a copy of block positions as self.blocks might be modified
-        block_positions = list(self.blocks.keys()) 
-        for b_pos in block_positions:
-            bx, by, bz = b_pos
-            current_block = self.blocks.get(b_pos) # Use .get() for safety, though key should exist
-
-            if current_block is None: # Skip if block was already removed (e.g. by cavegen)
-                continue
+        # Pristine chunks are cached on disk per (seed, generator version, chunk), so revisits
+        # and restarts skip the noise evaluation entirely
+        cached_blocks = self.world.generation_cache.load(self.world.seed, self.chunk_pos, CHUNK_SIZE)
+        if cached_blocks is not None:
+            self.blocks = cached_blocks
+        elif self.world.lazy_deep_generation:
+            # Only the shell around the surface; the rest follows when something reaches it (see generate_deep),
+            # and only then is the chunk cached.
+            column_context = self.world.get_column_context(self.chunk_pos)
+            self.blocks, self.shell_floors = self.world.generator.generate_chunk_shell(self.chunk_pos, CHUNK_SIZE, column_context,
+                                                                                       self.world.get_column_context)
+        else:
+            # Height, climate and biome for every column, sampled once and reused by all passes
+            column_context = self.world.get_column_context(self.chunk_pos)
+            self.blocks = self.world.generator.generate_chunk(self.chunk_pos, CHUNK_SIZE, column_context,
+                                                              self.world.get_column_context) # Neighbours' trees reach in
+            self.world.generation_cache.store(self.world.seed, self.chunk_pos, CHUNK_SIZE, self.blocks)
+        if self.world.sea_level is None: # World saved before the sea was implicit: water is real blocks
+            add_explicit_sea_water(self.blocks, self.world.generator.sea_floor_heights(self.world.get_column_context(self.chunk_pos)))
+
+    def generate_deep(self): # Adds the cells under the shell; VoxelWorld.materialize_deep also remeshes what that exposes
+        if self.shell_floors is None:
+            return False
+        self.world.generator.generate_chunk_deep(self.blocks, self.world.get_column_context(self.chunk_pos), self.shell_floors)
+        self.shell_floors = None
+        if not self.edited_blocks and self.world.sea_level is not None: # Still pristine: delta saves and revisits read it back
+            self.world.generation_cache.store(self.world.seed, self.chunk_pos, CHUNK_SIZE, self.blocks)
+        return True
+
+    def touches_deep(self, pos): # Would a change at pos open up cells of this chunk that are not generated yet?
+        if self.shell_floors is None:
+            return False
+        px, py, pz = pos
+        # The column itself down to the cell below pos, and the four columns beside it at the same height
+        for column_pos, lowest_touched_y in (((px, pz), py - 1), ((px + 1, pz), py), ((px - 1, pz), py),
+                                             ((px, pz + 1), py), ((px, pz - 1), py)):
+            if lowest_touched_y < self.shell_floors.get(column_pos, WORLD_BOTTOM_Y):
+                return True
+        return False
 
-            for ore_name, ore_data in ore_types_info.items():
-                if current_block in ore_data['host']:
-                    if ore_data['min_y'] <= by <= ore_data['max_y']:
-                        # pnoise3 returns values between -1 and 1.
-                        noise_val = pnoise3(bx * ore_noise_freq, 
-                                            by * ore_noise_freq, 
-                                            bz * ore_noise_freq, 
-                                            octaves=ore_data['noise_octaves'], 
-                                            base=seed + ore_data['noise_seed_offset'])
-                        
-                        # Normalize noise_val to be 0-1 for comparison with chance
-                        normalized_noise_val = (noise_val + 1) / 2.0 
-                        
-                        # If chance is 0.02 (2%), we want to place ore if noise is in the top 2% of its range.
-                        # So, if normalized_noise_val (0 to 1) is greater than (1.0 - 0.02) = 0.98.
-                        if normalized_noise_val > (1.0 - ore_data['chance']):
-                            self.blocks[b_pos] = ore_name
-                            # The ore_name (e.g., 'gold') should already be in texture_mapping and collectible_blocks
-                            # from the global setup. No need to add them here.
-                            break # Ore placed, no need to check other ore types for this block position
-    
-    def place_ores_in_chunk(self, seed):
-        ore_types_info = {
-            'gold': {'texture': gold_texture, 'chance': 0.02, 'min_y': -25, 'max_y': 10, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 50},
-            'emerald': {'texture': emerald_texture, 'chance': 0.015, 'min_y': -30, 'max_y': 5, 'host': ['stone'], 'noise_octaves': 2, 'noise_seed_offset': 60},
-            'ruby': {'texture': ruby_texture, 'chance': 0.018, 'min_y': -28, 'max_y': 8, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 70}
-        }
-        ore_noise_freq = 0.08
-
-        block_positions = list(self.blocks.keys()) # Iterate over a copy
-        for b_pos in block_positions:
-            bx, by, bz = b_pos
-            current_block = self.blocks.get(b_pos)
-
-            for ore_name, ore_data in ore_types_info.items():
-                if current_block in ore_data['host']:
-                    if ore_data['min_y'] <= by <= ore_data['max_y']:
-                        # pnoise3 returns values between -1 and 1.
-                        noise_val = pnoise3(bx * ore_noise_freq, 
-                                            by * ore_noise_freq, 
-                                            bz * ore_noise_freq, 
-                                            octaves=ore_data['noise_octaves'], 
-                                            base=seed + ore_data['noise_seed_offset'])
-                        
-                        # Normalize noise_val to be 0-1
-                        normalized_noise_val = (noise_val + 1) / 2.0 
-                        
-                        if normalized_noise_val > (1.0 - ore_data['chance']):
-                            self.blocks[b_pos] = ore_name
-                            # Textures and collectible status are handled by global lists/dicts
-                            break # Ore placed, move to next block position
-    
-    def place_ores_in_chunk(self, seed):
-        ore_types_info = {
-            'gold': {'texture': gold_texture, 'chance': 0.02, 'min_y': -25, 'max_y': 10, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 50},
-            'emerald': {'texture': emerald_texture, 'chance': 0.015, 'min_y': -30, 'max_y': 5, 'host': ['stone'], 'noise_octaves': 2, 'noise_seed_offset': 60},
-            'ruby': {'texture': ruby_texture, 'chance': 0.018, 'min_y': -28, 'max_y': 8, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 70}
-        }
-        ore_noise_freq = 0.08
-
-        block_positions = list(self.blocks.keys()) # Iterate over a copy
-        for b_pos in block_positions:
-            bx, by, bz = b_pos
-            current_block = self.blocks.get(b_pos)
-
-            for ore_name, ore_data in ore_types_info.items():
-                if current_block in ore_data['host']:
-                    if ore_data['min_y'] <= by <= ore_data['max_y']:
-                        # pnoise3 returns values between -1 and 1.
-                        noise_val = pnoise3(bx * ore_noise_freq, 
-                                            by * ore_noise_freq, 
-                                            bz * ore_noise_freq, 
-                                            octaves=ore_data['noise_octaves'], 
-                                            base=seed + ore_data['noise_seed_offset'])
-                        
-                        # To use 'chance' as a direct probability (e.g., 0.02 for 2% chance),
-                        # we can scale noise_val (which is -1 to 1) to a 0-1 range,
-                        # and then check if a random number is less than the chance,
-                        # potentially modulated by the noise value to create veins.
-                        # A simpler approach for vein-like structures is to use a threshold on noise.
-                        # If noise_val (raw, -1 to 1) is above a certain high threshold, place ore.
-                        # The provided logic "noise_val > (1.0 - ore_data['chance'])" assumes noise_val is 0-1.
-                        # Let's normalize noise_val to 0-1 for this.
-                        normalized_noise_val = (noise_val + 1) / 2.0 # Now 0.0 to 1.0
-                        
-                        # The condition `normalized_noise_val > (1.0 - ore_data['chance'])` means:
-                        # if chance is 0.02, then 1.0 - chance is 0.98. We need noise > 0.98.
-                        # This makes ore very rare, which is often desired.
-                        if normalized_noise_val > (1.0 - ore_data['chance']):
-                            self.blocks[b_pos] = ore_name
-                            # Global texture_mapping and collectible_blocks should already contain these ores.
-                            break # Ore placed, no need to check other ore types for this block
-    
-    def place_ores_in_chunk(self, seed):
-        ore_types_info = {
-            'gold': {'texture': gold_texture, 'chance': 0.02, 'min_y': -25, 'max_y': 10, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 50},
-            'emerald': {'texture': emerald_texture, 'chance': 0.015, 'min_y': -30, 'max_y': 5, 'host': ['stone'], 'noise_octaves': 2, 'noise_seed_offset': 60},
-            'ruby': {'texture': ruby_texture, 'chance': 0.018, 'min_y': -28, 'max_y': 8, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 70}
-        }
-        ore_noise_freq = 0.08
-
-        block_positions = list(self.blocks.keys()) # Iterate over a copy
-        for b_pos in block_positions:
-            bx, by, bz = b_pos
-            current_block = self.blocks.get(b_pos)
-
-            for ore_name, ore_data in ore_types_info.items():
-                if current_block in ore_data['host']:
-                    if ore_data['min_y'] <= by <= ore_data['max_y']:
-                        noise_val = pnoise3(bx * ore_noise_freq, by * ore_noise_freq, bz * ore_noise_freq, 
-                                            octaves=ore_data['noise_octaves'], base=seed + ore_data['noise_seed_offset'])
-                        # Normalize noise_val to be 0-1 if it's not already (pnoise3 output is -1 to 1)
-                        normalized_noise_val = (noise_val + 1) / 2 
-                        
-                        # Compare with chance. Higher chance means more ore.
-                        # So if normalized_noise_val is very high (close to 1), it's more likely to pass the check.
-                        # If ore_data['chance'] is 0.02, then we need noise > 0.98 for it to be ore.
-                        # This seems reversed. Let's try: if normalized_noise_val < ore_data['chance']
-                        # No, the original logic: noise_val > (1.0 - ore_data['chance']) is correct if noise_val is 0-1
-                        # Let's stick to the brief's example: noise_val > (1.0 - ore_data['chance'])
-                        # but ensure noise_val is in 0-1 range for this comparison.
-                        # So, if pnoise3 gives -1 to 1, then (pnoise3_val + 1) / 2 gives 0 to 1.
-                        if normalized_noise_val > (1.0 - ore_data['chance']):
-                            self.blocks[b_pos] = ore_name
-                            # Textures and collectible status should already be handled by global lists/dicts
-                            break # Ore placed, move to next block position
-    
-    def place_ores_in_chunk(self, seed):
-        ore_types_info = {
-            'gold': {'texture': gold_texture, 'chance': 0.02, 'min_y': -25, 'max_y': 10, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 50},
-            'emerald': {'texture': emerald_texture, 'chance': 0.015, 'min_y': -30, 'max_y': 5, 'host': ['stone'], 'noise_octaves': 2, 'noise_seed_offset': 60},
-            'ruby': {'texture': ruby_texture, 'chance': 0.018, 'min_y': -28, 'max_y': 8, 'host': ['stone'], 'noise_octaves': 1, 'noise_seed_offset': 70}
-        }
-        ore_noise_freq = 0.08
-
-        block_positions = list(self.blocks.keys()) # Iterate over a copy
-        for b_pos in block_positions:
-            bx, by, bz = b_pos
-            current_block = self.blocks.get(b_pos)
-
-            for ore_name, ore_data in ore_types_info.items():
-                if current_block in ore_data['host']:
-                    if ore_data['min_y'] <= by <= ore_data['max_y']:
-                        noise_val = pnoise3(bx * ore_noise_freq, by * ore_noise_freq, bz * ore_noise_freq, 
-                                            octaves=ore_data['noise_octaves'], base=seed + ore_data['noise_seed_offset'])
-                        # Normalize noise_val to be 0-1 if it's not already (pnoise3 output is -1 to 1)
-                        normalized_noise_val = (noise_val + 1) / 2 
-                        
-                        # Compare with chance. Higher chance means more ore.
-                        # So if normalized_noise_val is very high (close to 1), it's more likely to pass the check.
-                        # If ore_data['chance'] is 0.02, then we need noise > 0.98 for it to be ore.
-                        # This seems reversed. Let's try: if normalized_noise_val < ore_data['chance']
-                        # No, the original logic: noise_val > (1.0 - ore_data['chance']) is correct if noise_val is 0-1
-                        # Let's stick to the brief's example: noise_val > (1.0 - ore_data['chance'])
-                        # but ensure noise_val is in 0-1 range for this comparison.
-                        # So, if pnoise3 gives -1 to 1, then (pnoise3_val + 1) / 2 gives 0 to 1.
-                        if normalized_noise_val > (1.0 - ore_data['chance']):
-                            self.blocks[b_pos] = ore_name
-                            # Textures and collectible status should already be handled by global lists/dicts
-                            break # Ore placed, move to next block position
-    
-    def carve_caves(self, seed):
-        cave_noise_freq = 0.05 # Frequency of cave noise
-        cave_threshold_val = 0.75 # Noise values above this become caves
-        
-        # To avoid carving surface too much, find approx surface Y for each column
-        surface_y_map = {}
-        for wx_cave in range(self.chunk_pos[0], self.chunk_pos[0] + CHUNK_SIZE):
-            for wz_cave in range(self.chunk_pos[1], self.chunk_pos[1] + CHUNK_SIZE):
-                max_y_col = -1000
-                for y_col_check in range(30, -30, -1): # Scan a reasonable height range
-                    if (wx_cave, y_col_check, wz_cave) in self.blocks and                        self.blocks[(wx_cave, y_col_check, wz_cave)] != 'water':
-                        max_y_col = y_col_check
-                        break
-                if max_y_col > -1000:
-                    surface_y_map[(wx_cave, wz_cave)] = max_y_col
-        
-        # Iterate through blocks that are 'stone' or 'dirt' (or biome specific like 'sandstone')
-        # Create a copy of keys to iterate over, as self.blocks might change
-        blocks_to_check_for_caves = list(self.blocks.keys())
-
-        for b_pos_key in blocks_to_check_for_caves:
-            bx, by, bz = b_pos_key
-            current_block_type_cave = self.blocks.get(b_pos_key)
-
-            if current_block_type_cave in ['stone', 'dirt', 'sandstone', 'snow']: # Blocks that can be carved
-                # Protect surface layers (e.g., don't carve within 5 blocks of surface)
-                surface_y_current_col = surface_y_map.get((bx,bz), by) # Default to current y if no surface found (should not happen)
-                if by > surface_y_current_col - 6: 
-                    continue
+    def get_block(self, block_pos, materialize=True): # Integer world position inside this chunk; see VoxelWorld.get_block
+        block_value = self.blocks.get(block_pos)
+        if block_value is None:
+            px, py, pz = block_pos
+            if self.shell_floors is not None and py < self.shell_floors.get((px, pz), WORLD_BOTTOM_Y):
+                if not materialize: # Meshing looks at every neighbour; unknown cells count as solid there
+                    return 'stone'
+                self.world.materialize_deep(self)
+                return self.get_block(block_pos)
+            if self.world.sea_level is not None and py <= self.world.sea_level and self.is_sea_cell(block_pos):
+                return 'water'
+            return None
+        if block_value == AIR_BLOCK:
+            return None
+        return block_value
+
+    def get_sea_floor_heights(self):
+        if self.sea_floor_heights is None:
+            if self.world.sea_level is None:
+                self.sea_floor_heights = {}
+            else:
+                self.sea_floor_heights = self.world.generator.sea_floor_heights(self.world.get_column_context(self.chunk_pos),
+                                                                                self.world.sea_level)
+        return self.sea_floor_heights
 
-                # 3D Perlin noise for cave generation
-                cave_noise_3d = pnoise3(bx * cave_noise_freq, 
-                                        by * cave_noise_freq, 
-                                        bz * cave_noise_freq, 
-                                        octaves=2, base=seed + 30)
-                
-                if abs(cave_noise_3d) > cave_threshold_val: # abs() creates more tunnel-like caves
-                    self.blocks[b_pos_key] = None # Carve out block (set to air)
+    def is_sea_cell(self, pos): # In the implicit sea layer: between a sea column's floor and the sea level
+        if self.world.sea_level is None or pos[1] > self.world.sea_level:
+            return False
+        sea_floor_y = self.get_sea_floor_heights().get((pos[0], pos[2]))
+        return sea_floor_y is not None and pos[1] >= sea_floor_y
 
     def is_near_water(self, pos, radius): # Helper to check if near water (used by old cavegen, might be useful)
         x_check,y_check,z_check = pos
@@ -1545,154 +1719,34 @@ class Chunk:
             for dy_water_check in range(-radius, radius+1):
                 for dz_water_check in range(-radius, radius+1):
                     check_pos_water = (x_check+dx_water_check, y_check+dy_water_check, z_check+dz_water_check)
-                    if self.blocks.get(check_pos_water) == 'water':
+                    if self.world.get_block(check_pos_water) == 'water':
                         return True
         return False
 
-    def place_ores_in_chunk(self, seed):
-        ore_types_info = { # Define ore types, their rarity, depth, and host block
-            'gold': {'texture': gold_texture, 'chance': 0.02, 'min_y': -25, 'max_y': 10, 'host': ['stone']},
-            'emerald': {'texture': emerald_texture, 'chance': 0.015, 'min_y': -30, 'max_y': 5, 'host': ['stone']},
-            'ruby': {'texture': ruby_texture, 'chance': 0.018, 'min_y': -28, 'max_y': 8, 'host': ['stone']}
-            # Add more ores: 'coal', 'iron', 'diamond' with different params
-        }
-        ore_noise_freq = 0.08 # Frequency for ore vein noise
-
-        # Iterate through stone blocks primarily for ore placement
-        # Make a copy of block positions to iterate, as we might modify self.blocks
-        block_positions_in_chunk = list(self.blocks.keys())
-
-        for b_pos_ore in block_positions_in_chunk:
-            bx_ore, by_ore, bz_ore = b_pos_ore
-            current_block_for_ore = self.blocks.get(b_pos_ore)
-
-            for ore_name, ore_data in ore_types_info.items():
-                if current_block_for_ore in ore_data['host']: # Check if current block can host this ore
-                    if ore_data['min_y'] <= by_ore <= ore_data['max_y']: # Check depth
-                        # Use 3D Perlin noise to create ore veins/patches
-                        ore_vein_noise = pnoise3(bx_ore * ore_noise_freq, 
-                                                 by_ore * ore_noise_freq, 
-                                                 bz_ore * ore_noise_freq, 
-                                                 octaves=1, base=seed + 50 + hash(ore_name)%100) # Seed per ore
-                        
-                        if ore_vein_noise > (1.0 - ore_data['chance']): # Higher noise value = higher chance
-                            self.blocks[b_pos_ore] = ore_name # Replace block with ore
-                            # Add this ore to texture_mapping if not already (though it should be)
-                            if ore_name not in texture_mapping:
-                                texture_mapping[ore_name] = ore_data['texture']
-                            if ore_name not in collectible_blocks:
-                                collectible_blocks.append(ore_name)
-                            break # Ore placed, no need to check other ore types for this block
-
-
-    def place_trees_in_chunk(self, seed, current_water_level, current_max_height): # Pass relevant levels
-        tree_seed_offset = seed + 200
-        tree_density_noise_freq = 0.06 
-        tree_placement_noise_freq = 0.12
-        
-        # Use global BIOME_NOISE_FREQUENCY for consistency
-        biome_freq_tree = BIOME_NOISE_FREQUENCY
-        
-        min_tree_spacing_sq = 3**2 # Squared distance for faster checks
-
-        placed_tree_locations = [] # Store (wx, wz) of placed trees for spacing
-
-        for x_offset_tree in range(CHUNK_SIZE):
-            for z_offset_tree in range(CHUNK_SIZE):
-                wx_t = self.chunk_pos[0] + x_offset_tree
-                wz_t = self.chunk_pos[1] + z_offset_tree
-
-                # Find the actual surface Y and block type at (wx_t, wz_t)
-                surface_y_tree = -1000 # Default if no ground
-                block_on_surface_tree = None
-                # Scan from a bit above max_height down to world bottom for ground
-                for y_scan_tree in range(current_max_height + 5, -current_max_height // 2 -1, -1):
-                    b_check = self.blocks.get((wx_t, y_scan_tree, wz_t))
-                    if b_check is not None and b_check != 'water': # Found solid ground
-                        surface_y_tree = y_scan_tree
-                        block_on_surface_tree = b_check
-                        break 
-                
-                if block_on_surface_tree is None: continue # No suitable ground
-
-                # --- Biome check for tree suitability ---
-                temp_tree_raw = (pnoise2(wx_t * biome_freq_tree, wz_t * biome_freq_tree, octaves=2, base=seed + 10) + 1) / 2
-                humidity_tree_raw = (pnoise2(wx_t * biome_freq_tree, wz_t * biome_freq_tree, octaves=2, base=seed + 20) + 1) / 2
-                
-                tree_can_grow_here = False
-                tree_type_to_place = 'treetrunkdark' # Default tree type
-                leaves_type_to_place = 'treeleaves'
-                
-                if block_on_surface_tree == 'grass': # Trees mostly on grass
-                    if temp_tree_raw > 0.4 and humidity_tree_raw > 0.55: # Forest-like conditions
-                        tree_can_grow_here = True
-                        # Could vary tree_type_to_place here based on more specific biome checks
-                    elif 0.25 <= temp_tree_raw <= 0.75 and 0.25 <= humidity_tree_raw <= 0.7: # Plains
-                        if random.random() < 0.15: # Lower chance for trees in plains
-                             tree_can_grow_here = True
-                elif block_on_surface_tree == 'sand' and temp_tree_raw > 0.6 and humidity_tree_raw < 0.35: # Oasis in desert?
-                    if random.random() < 0.05: # Very rare palm-like trees on sand
-                        tree_can_grow_here = True
-                        # tree_type_to_place = 'palmtrunk' # If palm tree assets existed
-                        # leaves_type_to_place = 'palmleaves'
-
-                if not tree_can_grow_here or surface_y_tree <= current_water_level: # No trees underwater
-                    continue
-
-                # Check spacing from other trees
-                too_close_to_other_tree = False
-                for prev_tx, prev_tz in placed_tree_locations:
-                    if (wx_t - prev_tx)**2 + (wz_t - prev_tz)**2 < min_tree_spacing_sq:
-                        too_close_to_other_tree = True; break
-                if too_close_to_other_tree: continue
-
-                # Check for clear space above for tree height (e.g., 5-7 blocks)
-                required_clear_height = 6
-                clear_space_for_tree = True
-                for y_clear_offset in range(1, required_clear_height + 1):
-                    if self.blocks.get((wx_t, surface_y_tree + y_clear_offset, wz_t)) is not None:
-                        clear_space_for_tree = False; break
-                if not clear_space_for_tree: continue
-
-                # Use Perlin noise for final tree placement chance
-                tree_placement_noise_val = (pnoise2(wx_t * tree_placement_noise_freq, wz_t * tree_placement_noise_freq, octaves=1, base=tree_seed_offset) +1)/2
-                
-                # Modulate placement chance by a biome-density factor (e.g. from tree_density_noise)
-                density_mod_noise = (pnoise2(wx_t * tree_density_noise_freq, wz_t * tree_density_noise_freq, octaves=1, base=tree_seed_offset+5) +1)/2
-                final_tree_chance = tree_placement_noise_val * (density_mod_noise * 0.5 + 0.5) # Bias towards denser areas
-
-                if final_tree_chance > 0.65: # Adjust threshold for overall density
-                    actual_trunk_height = random.randint(4, 7)
-                    
-                    # Place trunk blocks
-                    for y_trunk_offset in range(1, actual_trunk_height + 1):
-                        self.blocks[(wx_t, surface_y_tree + y_trunk_offset, wz_t)] = tree_type_to_place
-                    
-                    # Place leaves (example: simple spherical or conical canopy)
-                    canopy_base_y = surface_y_tree + actual_trunk_height
-                    canopy_radius = random.randint(2,3) # Radius of leaves from trunk top
-                    for ly_offset in range(canopy_radius +1): # Iterate vertically for canopy height
-                        for lx_offset in range(-canopy_radius, canopy_radius + 1):
-                            for lz_offset in range(-canopy_radius, canopy_radius + 1):
-                                # Simple sphere-like canopy shape
-                                if lx_offset**2 + lz_offset**2 + (ly_offset - canopy_radius/2)**2 <= canopy_radius**2:
-                                    # Ensure leaves don't replace trunk top, and are above trunk base
-                                    if not (lx_offset == 0 and lz_offset == 0 and ly_offset == 0):
-                                        # Check if block is already occupied (e.g. by another part of this tree's leaves)
-                                        if self.blocks.get((wx_t + lx_offset, canopy_base_y + ly_offset, wz_t + lz_offset)) is None:
-                                             self.blocks[(wx_t + lx_offset, canopy_base_y + ly_offset, wz_t + lz_offset)] = leaves_type_to_place
-                    
-                    # Ensure top of trunk has leaves directly above it
-                    self.blocks[(wx_t, canopy_base_y +1, wz_t)] = leaves_type_to_place 
-                    placed_tree_locations.append((wx_t, wz_t))
-
     def remove(self):
         # Destroy Ursina entities associated with this chunk
         destroy(self.opaque_terrain_entity)
         destroy(self.water_entity)
+        for special_entity in self.special_entities.values():
+            destroy_special_entity(special_entity)
+        self.special_entities.clear()
+        self.clear_vegetation()
         self.blocks.clear() # Clear block data
 
+    def clear_vegetation(self):
+        if self.vegetation_entity is not None:
+            destroy(self.vegetation_entity)
+            self.vegetation_entity = None
+        self.vegetation_cells.clear()
+        self.vegetation_density = 0.0
+        self.vegetation_dirty = False
+
     def build_mesh(self):
+        if not self.deep_borders_checked: # First mesh: open cells along the border may look into a lazy neighbour
+            self.deep_borders_checked = True
+            for exposed_chunk in self.world.deep_exposed_chunks(self):
+                self.world.materialize_deep(exposed_chunk)
+
         # Combined geometry lists for opaque terrain
         combined_vertices = []
         combined_uvs = []
@@ -1733,21 +1787,24 @@ class Chunk:
         uv_scale_y = 1.0 / ATLAS_GRID_HEIGHT
         # --- End Texture Atlas Setup ---
 
-        for bpos, bdata_mesh in self.blocks.items():
+        own_blocks = self.blocks
+        for bpos, bdata_mesh in own_blocks.items():
             actual_type_mesh = bdata_mesh if not isinstance(bdata_mesh, dict) else bdata_mesh.get("type", bdata_mesh)
 
-            if actual_type_mesh in (DOOR, POKEBALL, FOXFOX, PARTICLE_BLOCK): 
+            if actual_type_mesh in (DOOR, POKEBALL, FOXFOX, PARTICLE_BLOCK, AIR_BLOCK): 
                 continue # Skip special entities for combined meshes
             
             is_water_block = (actual_type_mesh == 'water')
             
             bx_mesh, by_mesh, bz_mesh = bpos
             for face_name_mesh, face_verts_mesh in CUBE_FACES.items():
-                nx_mesh = bx_mesh + FACE_NORMALS[face_name_mesh].x
-                ny_mesh = by_mesh + FACE_NORMALS[face_name_mesh].y
-                nz_mesh = bz_mesh + FACE_NORMALS[face_name_mesh].z
-                
-                neighbor_block_data_mesh = self.world.get_block((nx_mesh, ny_mesh, nz_mesh))
+                offset_x, offset_y, offset_z = FACE_NEIGHBOR_OFFSETS[face_name_mesh]
+                neighbor_pos_mesh = (bx_mesh + offset_x, by_mesh + offset_y, bz_mesh + offset_z)
+
+                # Most neighbours are solid blocks of this chunk; only air, water and other chunks need the full lookup
+                neighbor_block_data_mesh = own_blocks.get(neighbor_pos_mesh)
+                if neighbor_block_data_mesh is None or neighbor_block_data_mesh == AIR_BLOCK:
+                    neighbor_block_data_mesh = self.world.get_block(neighbor_pos_mesh, materialize=False)
                 neighbor_type_mesh = neighbor_block_data_mesh if not isinstance(neighbor_block_data_mesh, dict) \
                                    else neighbor_block_data_mesh.get("type", neighbor_block_data_mesh)
 
@@ -1835,6 +1892,21 @@ class Chunk:
                 else:
                     opaque_idx_offset += 4
         
+        # --- Implicit sea: one water surface quad per sea column that is open to the air above ---
+        sea_level_mesh = self.world.sea_level
+        for (sea_x, sea_z), sea_floor_y in self.get_sea_floor_heights().items():
+            if self.world.get_block((sea_x, sea_level_mesh, sea_z)) != 'water' or \
+               self.world.get_block((sea_x, sea_level_mesh + 1, sea_z)) is not None:
+                continue # Surface cell filled/drained, or covered by a block
+            for i_vert, v_local_mesh in enumerate(CUBE_FACES['up']):
+                water_vertices.append((sea_x + v_local_mesh[0], sea_level_mesh + v_local_mesh[1], sea_z + v_local_mesh[2]))
+                water_normals.append(FACE_NORMALS['up'])
+                water_colors.append(color.white)
+                water_uvs.append((i_vert in (1, 2), i_vert >= 2))
+            water_triangles.extend([(water_idx_offset + 0, water_idx_offset + 1, water_idx_offset + 2),
+                                    (water_idx_offset + 2, water_idx_offset + 3, water_idx_offset + 0)])
+            water_idx_offset += 4
+
         # --- Finalize Opaque Terrain Mesh ---
         if combined_vertices:
             self.opaque_terrain_entity.model = Mesh(vertices=combined_vertices, uvs=combined_uvs,
@@ -1856,50 +1928,315 @@ class Chunk:
         else:
             self.water_entity.model = None
             self.water_entity.visible = False
+        self.mesh_built = True
             
+    def apply_saved_edits(self, saved_edits): # Replays a delta save ({(x,y,z): block or None}) on top of the terrain
+        if any(self.touches_deep(block_pos) for block_pos in saved_edits):
+            self.generate_deep() # Edits dug below the shell; neighbours are checked on the first build_mesh
+        for block_pos, block_value in saved_edits.items():
+            if block_value is None:
+                self.blocks.pop(block_pos, None)
+            else:
+                self.blocks[block_pos] = block_value
+            self.edited_blocks[block_pos] = block_value
+
     def set_block(self, pos, btype): # pos is world coordinates
-        # Update own block dictionary
+        self.store_block(pos, btype)
+        self.build_mesh() # Rebuild this chunk's mesh first
+        # If the modified block is on a boundary, the neighbor's faces along it change too
+        for neighbor_chunk_pos in self.neighbors_touched_by(pos):
+            self.world.rebuild_chunk_at(neighbor_chunk_pos)
+        # Optional: Could also rebuild diagonal neighbors if on a corner, though less critical for visuals.
+
+    def store_block(self, pos, btype): # Updates block data only; the caller rebuilds meshes
+        if self.is_sea_cell(pos):
+            if btype == 'water':
+                btype = None # Sea water is implicit, nothing to store
+            elif btype is None and self.world.get_block(pos) == 'water':
+                btype = AIR_BLOCK # Removing the water itself (e.g. a sponge) leaves air instead of letting the sea back in
         if btype is None: # Removing block
             if pos in self.blocks:
                 del self.blocks[pos]
         else: # Placing or changing block
             self.blocks[pos] = btype
-        
-        self.build_mesh() # Rebuild this chunk's mesh first
+        self.edited_blocks[pos] = btype # Tracked for delta saves
+        self.dirty = True
+        self.edit_version += 1
+        if pos in self.vegetation_cells: self.vegetation_dirty = True
 
-        # Determine if the modified block is on a boundary and rebuild neighbors if so
+    def neighbors_touched_by(self, pos): # -> chunk positions whose mesh borders the block at pos
+        neighbor_chunk_positions = []
         # Relative position of the block within this chunk
         block_x_rel_to_chunk = pos[0] - self.chunk_pos[0]
         block_z_rel_to_chunk = pos[2] - self.chunk_pos[1]
-
         # Check X boundaries
         if block_x_rel_to_chunk == 0:
-            self.world.rebuild_chunk_at((self.chunk_pos[0] - CHUNK_SIZE, self.chunk_pos[1]))
+            neighbor_chunk_positions.append((self.chunk_pos[0] - CHUNK_SIZE, self.chunk_pos[1]))
         elif block_x_rel_to_chunk == CHUNK_SIZE - 1:
-            self.world.rebuild_chunk_at((self.chunk_pos[0] + CHUNK_SIZE, self.chunk_pos[1]))
+            neighbor_chunk_positions.append((self.chunk_pos[0] + CHUNK_SIZE, self.chunk_pos[1]))
         # Check Z boundaries
         if block_z_rel_to_chunk == 0:
-            self.world.rebuild_chunk_at((self.chunk_pos[0], self.chunk_pos[1] - CHUNK_SIZE))
+            neighbor_chunk_positions.append((self.chunk_pos[0], self.chunk_pos[1] - CHUNK_SIZE))
         elif block_z_rel_to_chunk == CHUNK_SIZE - 1:
-            self.world.rebuild_chunk_at((self.chunk_pos[0], self.chunk_pos[1] + CHUNK_SIZE))
-        
-        # Optional: Could also rebuild diagonal neighbors if on a corner, though less critical for visuals.
+            neighbor_chunk_positions.append((self.chunk_pos[0], self.chunk_pos[1] + CHUNK_SIZE))
+        return neighbor_chunk_positions
 
 
-class VoxelWorld: # Container for all Chunks
+class BlockChangeBus: # Notifies subscribers of block edits, so systems react to changes instead of polling the world
+    # Callbacks get the list of ((x,y,z), block) changes (block None = removed), once per set_block/set_blocks.
+    # Chunk and box subscriptions only hear about changes inside their chunk or box (a box once per chunk it spans).
+    def __init__(self):
+        self.next_subscription_id = 0
+        self.subscribers = {} # subscription id -> callback, for every change
+        self.chunk_subscribers = {} # (cx, cz) -> {subscription id: callback}
+        self.subscription_chunks = {} # subscription id -> chunk positions it is registered under
+
+    def subscribe(self, callback): # -> subscription id, for unsubscribe
+        self.next_subscription_id += 1
+        self.subscribers[self.next_subscription_id] = callback
+        return self.next_subscription_id
+
+    def subscribe_chunk(self, chunk_pos, callback):
+        self.next_subscription_id += 1
+        self.chunk_subscribers.setdefault(chunk_pos, {})[self.next_subscription_id] = callback
+        self.subscription_chunks[self.next_subscription_id] = [chunk_pos]
+        return self.next_subscription_id
+
+    def subscribe_box(self, corner_a, corner_b, callback): # Changes between the two corners (inclusive)
+        min_x, max_x = sorted((floor(corner_a[0]), floor(corner_b[0])))
+        min_y, max_y = sorted((floor(corner_a[1]), floor(corner_b[1])))
+        min_z, max_z = sorted((floor(corner_a[2]), floor(corner_b[2])))
+        def box_callback(chunk_changes):
+            box_changes = [block_change for block_change in chunk_changes
+                           if min_x <= block_change[0][0] <= max_x and min_y <= block_change[0][1] <= max_y and min_z <= block_change[0][2] <= max_z]
+            if box_changes:
+                callback(box_changes)
+        self.next_subscription_id += 1
+        box_chunks = [(chunk_x, chunk_z)
+                      for chunk_x in range((min_x // CHUNK_SIZE) * CHUNK_SIZE, max_x + 1, CHUNK_SIZE)
+                      for chunk_z in range((min_z // CHUNK_SIZE) * CHUNK_SIZE, max_z + 1, CHUNK_SIZE)]
+        for chunk_pos in box_chunks:
+            self.chunk_subscribers.setdefault(chunk_pos, {})[self.next_subscription_id] = box_callback
+        self.subscription_chunks[self.next_subscription_id] = box_chunks
+        return self.next_subscription_id
+
+    def unsubscribe(self, subscription_id):
+        self.subscribers.pop(subscription_id, None)
+        for chunk_pos in self.subscription_chunks.pop(subscription_id, ()):
+            chunk_callbacks = self.chunk_subscribers.get(chunk_pos)
+            if chunk_callbacks is not None:
+                chunk_callbacks.pop(subscription_id, None)
+                if not chunk_callbacks: del self.chunk_subscribers[chunk_pos]
+
+    def publish(self, block_changes): # [((x,y,z), block)] with integer positions, already written to the world
+        if not block_changes: return
+        for callback in list(self.subscribers.values()):
+            callback(block_changes)
+        if not self.chunk_subscribers: return
+        changes_by_chunk = {}
+        for block_change in block_changes:
+            block_pos = block_change[0]
+            chunk_pos = ((block_pos[0] // CHUNK_SIZE) * CHUNK_SIZE, (block_pos[2] // CHUNK_SIZE) * CHUNK_SIZE)
+            if chunk_pos in self.chunk_subscribers:
+                changes_by_chunk.setdefault(chunk_pos, []).append(block_change)
+        for chunk_pos, chunk_changes in changes_by_chunk.items():
+            for callback in list(self.chunk_subscribers.get(chunk_pos, {}).values()):
+                callback(chunk_changes)
+
+
+class BlockWatch: # A few cells probed every frame; read from the world again only when they move or an edit hits them
     def __init__(self):
+        self.cells = None
+        self.blocks = None # Cached blocks of self.cells; None = read again
+        self.block_events = None # Bus of the world the subscription belongs to
+        self.subscription_id = None
+
+    def read(self, vworld, cells): # cells: tuple of integer (x,y,z) -> tuple of their blocks
+        if cells != self.cells or self.block_events is not vworld.block_events:
+            self.watch(vworld, cells)
+        if self.blocks is not None:
+            return self.blocks
+        cell_blocks = tuple(vworld.get_blocks(cells))
+        # Cells of chunks that are not loaded yet read as air, and loading one is not an edit: keep asking
+        if all(vworld.chunk_at(cell) is not None for cell in cells):
+            self.blocks = cell_blocks
+        return cell_blocks
+
+    def watch(self, vworld, cells):
+        if self.subscription_id is not None:
+            self.block_events.unsubscribe(self.subscription_id)
+        self.cells = cells
+        self.blocks = None
+        self.block_events = vworld.block_events
+        self.subscription_id = self.block_events.subscribe_box(
+            (min(cell[0] for cell in cells), min(cell[1] for cell in cells), min(cell[2] for cell in cells)),
+            (max(cell[0] for cell in cells), max(cell[1] for cell in cells), max(cell[2] for cell in cells)),
+            self.blocks_changed)
+
+    def blocks_changed(self, block_changes):
+        self.blocks = None
+
+
+class VoxelWorld: # Container for all Chunks
+    COLUMN_CONTEXT_CACHE_LIMIT = 1024 # Max chunks of column context kept around (LRU)
+
+    def __init__(self, seed=DEFAULT_WORLD_SEED, sea_level=None):
         self.chunks = {} # (cx, cz) -> Chunk instance
+        # Air at or below sea_level above a column's terrain reads as water (see Chunk.is_sea_cell).
+        # None for worlds saved before that: their sea is stored as water blocks.
+        self.sea_level = sea_level
+        # (cx, cz, chunk_size) -> {(wx, wz): ColumnContext}. Kept independently of self.chunks so
+        # neighbor chunks, LOD and minimap consumers can reuse it without sampling the noise again.
+        self.column_contexts = OrderedDict()
+        self.generation_cache = GenerationCache() # On-disk cache of pristine generated chunks
+        # Generate new chunks as a surface shell and the deep underground only once it is queried, dug into
+        # or exposed. Only for delta saves: a full save writes chunk.blocks as they are.
+        self.lazy_deep_generation = False
+        self.block_events = BlockChangeBus() # Edits made through set_block/set_blocks, for systems that react to them
+        self.set_seed(seed)
+
+    def set_seed(self, seed): # Every generation stage is driven by this one seed
+        self.seed = seed
+        self.generator = TerrainGenerator(seed)
+        self.column_contexts.clear() # Contexts of the old seed are meaningless now
+
+    def get_column_context(self, chunk_pos):
+        cache_key = (chunk_pos[0], chunk_pos[1], CHUNK_SIZE)
+        column_context = self.column_contexts.get(cache_key)
+        if column_context is None:
+            column_context = self.generator.column_context(chunk_pos, CHUNK_SIZE)
+            self.column_contexts[cache_key] = column_context
+            if len(self.column_contexts) > self.COLUMN_CONTEXT_CACHE_LIMIT:
+                self.column_contexts.popitem(last=False) # Evict least recently used
+        else:
+            self.column_contexts.move_to_end(cache_key)
+        return column_context
+
+    def chunk_at(self, world_pos): # Loaded chunk containing world_pos, or None
+        return self.chunks.get(((floor(world_pos[0]) // CHUNK_SIZE) * CHUNK_SIZE, (floor(world_pos[2]) // CHUNK_SIZE) * CHUNK_SIZE))
+
+    def get_block(self, world_pos, materialize=True): # world_pos is (x,y,z)
+        # The most frequently run code in the game: integer positions (nearly every caller floors already)
+        # skip flooring, and only air, sea water and ungenerated cells leave this function (see Chunk.get_block)
+        px, py, pz = world_pos
+        if px.__class__ is not int or py.__class__ is not int or pz.__class__ is not int: # Entity positions are floats
+            px, py, pz = floor(px), floor(py), floor(pz)
+
+        target_chunk = self.chunks.get(((px // CHUNK_SIZE) * CHUNK_SIZE, (pz // CHUNK_SIZE) * CHUNK_SIZE))
+        if target_chunk is None:
+            return None # Chunk not found
+        block_value = target_chunk.blocks.get((px, py, pz))
+        if block_value is None or block_value == AIR_BLOCK: # Air, sea water or not generated yet
+            return target_chunk.get_block((px, py, pz), materialize)
+        return block_value
+
+    def get_blocks(self, block_positions, materialize=True): # -> [block] for many positions: (x,y,z) tuples or an (N, 3) array
+        # Only a convenience wrapper around get_block: callers ask for a handful of cells, too few for grouping by chunk to pay off
+        if np is not None and isinstance(block_positions, np.ndarray): # Floor the whole batch at once
+            block_positions = np.floor(block_positions).astype(np.int64).tolist()
+        get_block = self.get_block
+        return [get_block(block_pos, materialize) for block_pos in block_positions]
+
+    def materialize_deep(self, chunk_inst): # Completes a lazy chunk, and every neighbour its new caves open into
+        pending_chunks = [chunk_inst]
+        while pending_chunks:
+            pending_chunk = pending_chunks.pop()
+            old_shell_floors = pending_chunk.shell_floors
+            if not pending_chunk.generate_deep():
+                continue
+            if pending_chunk.mesh_built:
+                pending_chunk.build_mesh()
+            exposed_chunks = self.deep_exposed_chunks(pending_chunk)
+            pending_chunks.extend(exposed_chunks) # Remeshed once they are complete
+            # Meshed neighbours drew no faces toward the cells that were not generated (they read as solid)
+            chunk_x, chunk_z = pending_chunk.chunk_pos
+            for offset_x, offset_z in ((CHUNK_SIZE, 0), (-CHUNK_SIZE, 0), (0, CHUNK_SIZE), (0, -CHUNK_SIZE)):
+                neighbor_chunk = self.chunks.get((chunk_x + offset_x, chunk_z + offset_z))
+                if neighbor_chunk is not None and neighbor_chunk.mesh_built and neighbor_chunk not in exposed_chunks and \
+                   self._opened_toward(pending_chunk, old_shell_floors, neighbor_chunk):
+                    neighbor_chunk.build_mesh()
+
+    def materialize_deep_around(self, block_pos): # Before block_pos changes: complete chunks whose deep cells it opens
+        owner_chunk = self.chunk_at(block_pos)
+        if owner_chunk is None:
+            return
+        for chunk_inst in [owner_chunk] + [self.chunks.get(key) for key in owner_chunk.neighbors_touched_by(block_pos)]:
+            if chunk_inst is not None and chunk_inst.touches_deep(block_pos):
+                self.materialize_deep(chunk_inst)
+
+    def deep_exposed_chunks(self, chunk_inst): # -> lazy chunks among chunk_inst and its loaded neighbours facing an open cell
+        exposed_chunks = []
+        chunk_x, chunk_z = chunk_inst.chunk_pos
+        for offset_x, offset_z in ((CHUNK_SIZE, 0), (-CHUNK_SIZE, 0), (0, CHUNK_SIZE), (0, -CHUNK_SIZE)):
+            neighbor_chunk = self.chunks.get((chunk_x + offset_x, chunk_z + offset_z))
+            if neighbor_chunk is None:
+                continue
+            for open_chunk, lazy_chunk in ((chunk_inst, neighbor_chunk), (neighbor_chunk, chunk_inst)):
+                if lazy_chunk.shell_floors is not None and lazy_chunk not in exposed_chunks and \
+                   self._opens_into_deep(open_chunk, lazy_chunk):
+                    exposed_chunks.append(lazy_chunk)
+        return exposed_chunks
+
+    def _opens_into_deep(self, open_chunk, lazy_chunk): # Air or water of open_chunk beside ungenerated cells of lazy_chunk?
+        step_x = (open_chunk.chunk_pos[0] - lazy_chunk.chunk_pos[0]) // CHUNK_SIZE
+        step_z = (open_chunk.chunk_pos[1] - lazy_chunk.chunk_pos[1]) // CHUNK_SIZE
+        open_floors = open_chunk.shell_floors
+        open_blocks = open_chunk.blocks
+        for (lazy_x, lazy_z), lazy_floor_y in lazy_chunk.shell_floors.items():
+            open_x, open_z = lazy_x + step_x, lazy_z + step_z
+            if open_x // CHUNK_SIZE * CHUNK_SIZE != open_chunk.chunk_pos[0] or open_z // CHUNK_SIZE * CHUNK_SIZE != open_chunk.chunk_pos[1]:
+                continue # Not on the shared border
+            open_floor_y = open_floors.get((open_x, open_z), WORLD_BOTTOM_Y) if open_floors is not None else WORLD_BOTTOM_Y
+            for check_y in range(open_floor_y, lazy_floor_y):
+                if open_blocks.get((open_x, check_y, open_z)) in (None, AIR_BLOCK, 'water'):
+                    return True
+        return False
 
-    def get_block(self, world_pos): # world_pos is (x,y,z)
-        px, py, pz = floor(world_pos[0]), floor(world_pos[1]), floor(world_pos[2])
-        
-        chunk_coord_x = (px // CHUNK_SIZE) * CHUNK_SIZE
-        chunk_coord_z = (pz // CHUNK_SIZE) * CHUNK_SIZE
-        target_chunk_coord = (chunk_coord_x, chunk_coord_z)
+    def _opened_toward(self, deep_chunk, old_shell_floors, facing_chunk): # Air or water among the cells deep_chunk just generated, on its border with facing_chunk?
+        step_x = (facing_chunk.chunk_pos[0] - deep_chunk.chunk_pos[0]) // CHUNK_SIZE
+        step_z = (facing_chunk.chunk_pos[1] - deep_chunk.chunk_pos[1]) // CHUNK_SIZE
+        deep_blocks = deep_chunk.blocks
+        for (deep_x, deep_z), old_floor_y in old_shell_floors.items():
+            facing_x, facing_z = deep_x + step_x, deep_z + step_z
+            if facing_x // CHUNK_SIZE * CHUNK_SIZE != facing_chunk.chunk_pos[0] or facing_z // CHUNK_SIZE * CHUNK_SIZE != facing_chunk.chunk_pos[1]:
+                continue # Not on the shared border
+            for check_y in range(WORLD_BOTTOM_Y, old_floor_y):
+                if deep_blocks.get((deep_x, check_y, deep_z)) in (None, AIR_BLOCK, 'water'):
+                    return True
+        return False
 
-        if target_chunk_coord in self.chunks:
-            return self.chunks[target_chunk_coord].blocks.get((px, py, pz), None)
-        return None # Chunk not found
+    def get_special_entity(self, world_pos): # Door/pokeball/foxfox entity at world_pos, or None
+        owner_chunk = self.chunk_at(world_pos)
+        if owner_chunk is None: return None
+        return owner_chunk.special_entities.get((floor(world_pos[0]), floor(world_pos[1]), floor(world_pos[2])))
+
+    def set_special_entity(self, world_pos, special_entity): # None removes; any previous entity there is destroyed
+        block_pos = (floor(world_pos[0]), floor(world_pos[1]), floor(world_pos[2]))
+        owner_chunk = self.chunk_at(block_pos)
+        if owner_chunk is None: # Nothing would ever unload it
+            if special_entity is not None: destroy_special_entity(special_entity)
+            return False
+        previous_entity = owner_chunk.special_entities.pop(block_pos, None)
+        if previous_entity is not None and previous_entity is not special_entity:
+            destroy_special_entity(previous_entity)
+        if special_entity is not None:
+            owner_chunk.special_entities[block_pos] = special_entity
+        return True
+
+    def special_entities_in_box(self, corner_a, corner_b, entity_class=None): # -> [((x,y,z), entity)] inside the box
+        min_x, max_x = sorted((floor(corner_a[0]), floor(corner_b[0])))
+        min_y, max_y = sorted((floor(corner_a[1]), floor(corner_b[1])))
+        min_z, max_z = sorted((floor(corner_a[2]), floor(corner_b[2])))
+        found_entities = []
+        for (chunk_x, chunk_z), chunk_inst in self.chunks.items():
+            if not chunk_inst.special_entities: continue
+            if chunk_x > max_x or chunk_x + CHUNK_SIZE <= min_x or chunk_z > max_z or chunk_z + CHUNK_SIZE <= min_z:
+                continue
+            for (ex, ey, ez), special_entity in chunk_inst.special_entities.items():
+                if min_x <= ex <= max_x and min_y <= ey <= max_y and min_z <= ez <= max_z:
+                    if entity_class is None or isinstance(special_entity, entity_class):
+                        found_entities.append(((ex, ey, ez), special_entity))
+        return found_entities
 
     def set_block(self, world_pos, block_type_set): # world_pos is (x,y,z)
         px_set, py_set, pz_set = floor(world_pos[0]), floor(world_pos[1]), floor(world_pos[2])
@@ -1918,8 +2255,34 @@ class VoxelWorld: # Container for all Chunks
             # generate_terrain=False because we are about to set a specific block, not bulk generate.
             # If this new chunk needs terrain, it should be handled by a separate call.
 
+        self.materialize_deep_around((px_set, py_set, pz_set))
         self.chunks[target_chunk_coord_set].set_block((px_set, py_set, pz_set), block_type_set)
         # The Chunk's set_block method now handles rebuilding itself and its direct neighbors.
+        self.block_events.publish([((px_set, py_set, pz_set), block_type_set)])
+
+    def set_blocks(self, block_changes): # Bulk set_block: [((x,y,z), block)] -> number of blocks set
+        # Block data is updated first and every touched chunk (plus border neighbors) is remeshed
+        # once at the end, instead of once per block. Blocks in chunks that are not loaded are skipped:
+        # an empty stand-in chunk would be saved over the terrain it has never generated.
+        chunks_to_rebuild = set()
+        blocks_set = 0
+        published_changes = []
+        for world_pos, block_type_set in block_changes:
+            block_pos = (floor(world_pos[0]), floor(world_pos[1]), floor(world_pos[2]))
+            target_chunk_coord_set = ((block_pos[0] // CHUNK_SIZE) * CHUNK_SIZE, (block_pos[2] // CHUNK_SIZE) * CHUNK_SIZE)
+            target_chunk = self.chunks.get(target_chunk_coord_set)
+            if target_chunk is None:
+                continue
+            self.materialize_deep_around(block_pos)
+            target_chunk.store_block(block_pos, block_type_set)
+            chunks_to_rebuild.add(target_chunk_coord_set)
+            chunks_to_rebuild.update(target_chunk.neighbors_touched_by(block_pos))
+            published_changes.append((block_pos, block_type_set))
+            blocks_set += 1
+        for chunk_coord_rebuild in chunks_to_rebuild:
+            self.rebuild_chunk_at(chunk_coord_rebuild)
+        self.block_events.publish(published_changes) # One notification for the whole batch
+        return blocks_set
 
     def rebuild_chunk_at(self, chunk_coord_rebuild): # Helper for Chunk to call
         if chunk_coord_rebuild in self.chunks:
@@ -1929,13 +2292,39 @@ class VoxelWorld: # Container for all Chunks
 class World: # High-level game world manager
     def __init__(self, filename=None, force_new_world=False, use_streaming_mode=False): # Renamed args
         self.streaming_mode = use_streaming_mode
-        self.vworld = VoxelWorld() # Underlying voxel data and chunk container
+        self.vworld = VoxelWorld(seed=WORLD_SEED, sea_level=DEFAULT_SEA_LEVEL) # Underlying voxel data and chunk container
         self.chunks = self.vworld.chunks # Direct reference for convenience (active chunks)
-        self.saved_chunk_data = {} # Cache for chunk data from save file in streaming mode
+        # Block reads are the hottest path in the game, so they are bound straight to VoxelWorld instead of wrapped
+        self.get_block = self.vworld.get_block
+        self.get_blocks = self.vworld.get_blocks
+        self.saved_chunk_data = {} # (cx,cz) -> {(x,y,z): block} for saved chunks that are not loaded right now
+        # "full": every block of every chunk is saved. "delta": only blocks that differ from what
+        # the world seed generates (player edits) are saved; loading regenerates the rest.
+        self.save_format = DEFAULT_SAVE_FORMAT
+        self.vworld.lazy_deep_generation = self.save_format == "delta"
+        # "json": chunks live in the save's .json file. "region": the .json only holds settings and the
+        # chunks are in binary region files (save/<name>.regions/) that can be read one chunk at a time.
+        self.storage = DEFAULT_SAVE_STORAGE
+        self.region_store = None # RegionStore of the loaded save when storage is "region"
+        self.region_compression = DEFAULT_REGION_COMPRESSION # "none" payloads are decoded straight from the mmap
+        self.save_file_path = None # Save the chunk index below points into
+        self.save_chunk_index = {} # (cx,cz) -> byte span of the chunk in a JSON-stored save, decoded on demand
+        self.save_thread = None # Background thread writing a save snapshot (see save_world)
+        self.save_result = None
+        self.save_progress = (0, 0) # (chunks written, chunks to write) of the running save
+        self.save_callbacks = []
+        self.queued_save_callbacks = []
+        self.last_autosave_time = time.time()
+        self.play_time_seconds = 0.0 # Carried over between sessions in the world's .meta.json
+        self.edit_count = 0 # Blocks placed/removed over the world's lifetime
 
         save_folder_path = 'save'
         if not os.path.exists(save_folder_path):
             os.makedirs(save_folder_path)
+        # Every edit is appended to a journal next to the save, so a crash only loses edits since the last flush
+        self.edit_journal = EditJournal(os.path.join(save_folder_path, filename if filename else current_save_name))
+        if force_new_world:
+            self.edit_journal.discard()
 
         if self.streaming_mode:
             self.chunks.clear() # Ensure active chunks start empty for streaming
@@ -1951,29 +2340,25 @@ class World: # High-level game world manager
                         print(f"[STREAMING INIT] Removed old save file '{save_file_to_potentially_remove}' due to force_new_world.")
                     except OSError as e:
                         print(f"[STREAMING INIT] Error removing old save file '{save_file_to_potentially_remove}': {e}")
+                shutil.rmtree(region_dir_for_save(save_file_to_potentially_remove), ignore_errors=True)
+                remove_world_meta(save_file_to_potentially_remove)
             else: # Streaming mode, not forcing new world -> try to load save into cache
                 load_file_path_stream_cache = os.path.join(save_folder_path, filename if filename else current_save_name)
                 print(f"[STREAMING INIT] Attempting to load save file '{load_file_path_stream_cache}' into cache.")
                 try:
-                    with open(load_file_path_stream_cache, 'r') as f_cache:
-                        full_saved_data = json.load(f_cache)
-                        self.saved_chunk_data = full_saved_data.get("chunks", {})
-                        # Load world settings if they exist in the save file (e.g., CHUNK_SIZE)
-                        # This is important so that chunk key generation in update_chunks uses correct CHUNK_SIZE
-                        # if it was different in the loaded world.
-                        saved_settings_cache = full_saved_data.get("world_settings")
-                        if saved_settings_cache:
-                            global CHUNK_SIZE, WORLD_SIZE # Allow updating these from save
-                            CHUNK_SIZE = saved_settings_cache.get("chunk_size", CHUNK_SIZE)
-                            WORLD_SIZE = saved_settings_cache.get("world_radius_chunks", WORLD_SIZE) # Less critical for streaming
-                            print(f"[STREAMING INIT] Loaded settings from save cache: ChunkSize={CHUNK_SIZE}, WorldRadius={WORLD_SIZE}")
-                        print(f"[STREAMING INIT] Loaded {len(self.saved_chunk_data)} chunks into cache from '{load_file_path_stream_cache}'.")
+                    # Load world settings if they exist in the save file (e.g., CHUNK_SIZE)
+                    # This is important so that chunk key generation in update_chunks uses correct CHUNK_SIZE
+                    # if it was different in the loaded world.
+                    self._open_save_file(load_file_path_stream_cache)
+                    print(f"[STREAMING INIT] Loaded settings from save cache: ChunkSize={CHUNK_SIZE}, WorldRadius={WORLD_SIZE}, Seed={WORLD_SEED}, Format={self.save_format}, Storage={self.storage}")
+                    print(f"[STREAMING INIT] Chunks of '{load_file_path_stream_cache}' are read on demand ({self.storage} storage, {len(self.save_chunk_index)} indexed JSON chunks).")
                 except FileNotFoundError:
                     print(f"[STREAMING INIT] Save file '{load_file_path_stream_cache}' not found. Starting with empty cache.")
                     self.saved_chunk_data = {}
-                except json.JSONDecodeError as e_json:
-                    print(f"[STREAMING INIT] Error decoding JSON from '{load_file_path_stream_cache}': {e_json}. Starting with empty cache.")
+                except ValueError as e_json: # Includes json.JSONDecodeError
+                    print(f"[STREAMING INIT] Error reading save '{load_file_path_stream_cache}': {e_json}. Starting with empty cache.")
                     self.saved_chunk_data = {}
+                    self.save_chunk_index = {}
             # Initial chunks around player will be loaded by update_chunks.
         
         else: # Not streaming mode
@@ -1981,6 +2366,8 @@ class World: # High-level game world manager
                 full_file_path_load = os.path.join(save_folder_path, filename)
                 if force_new_world and os.path.exists(full_file_path_load):
                     os.remove(full_file_path_load)
+                    shutil.rmtree(region_dir_for_save(full_file_path_load), ignore_errors=True)
+                    remove_world_meta(full_file_path_load)
                     print(f"Forcing new world: removed old save '{full_file_path_load}'.")
                     self.generate_all_chunks() # This will populate self.chunks directly
                 elif os.path.exists(full_file_path_load): # File exists, try to load
@@ -1996,7 +2383,83 @@ class World: # High-level game world manager
                     print("No default save found. Generating new world.")
                     self.generate_all_chunks()
 
-    def generate_all_chunks(self): # For non-streaming mode
+    def _apply_world_settings(self, saved_settings): # Adopt chunk size/radius/seed stored in a save
+        global CHUNK_SIZE, WORLD_SIZE, WORLD_SEED
+        CHUNK_SIZE = saved_settings.get("chunk_size", CHUNK_SIZE)
+        WORLD_SIZE = saved_settings.get("world_radius_chunks", WORLD_SIZE)
+        # Saves from before seeds were configurable were all generated with the default seed
+        WORLD_SEED = saved_settings.get("world_seed", DEFAULT_WORLD_SEED)
+        self.save_format = saved_settings.get("save_format", "full") # Older saves are all full saves
+        self.vworld.lazy_deep_generation = self.save_format == "delta"
+        self.storage = saved_settings.get("storage", "json") # Region files came later too
+        self.region_compression = saved_settings.get("region_compression", DEFAULT_REGION_COMPRESSION)
+        self.vworld.set_seed(WORLD_SEED)
+        self.vworld.sea_level = saved_settings.get("sea_level") # Missing: older save with the sea stored as blocks
+        saved_generator_version = saved_settings.get("generator_version", GENERATOR_VERSION)
+        # v1 sea water comes back through add_explicit_sea_water; what still differs since then are tree
+        # canopies crossing chunk borders (v3), which can leave stray or missing leaves at chunk edges
+        if saved_generator_version != GENERATOR_VERSION:
+            print(f"[WORLD] Save was generated by generator v{saved_generator_version}, this build is v{GENERATOR_VERSION}. "
+                  f"Unsaved chunks may not line up with saved ones at tree canopies on chunk borders.")
+
+    def _open_save_file(self, save_file_path): # Reads settings and a chunk index; chunks are decoded on demand
+        self.wait_for_save() # A running save still reads from the current save's files
+        index_problems = []
+        world_settings, self.save_chunk_index = index_json_save(save_file_path, index_problems)
+        if index_problems:
+            print(f"[LOAD] Skipped {len(index_problems)} malformed chunk entries in '{save_file_path}' "
+                  f"(details: python worldtool.py validate {save_file_path})")
+        self._apply_world_settings(world_settings)
+        self.save_file_path = save_file_path
+        self.saved_chunk_data = {}
+        world_meta = read_world_meta(save_file_path) or {}
+        self.play_time_seconds = world_meta.get("play_time_seconds", 0.0)
+        self.edit_count = world_meta.get("edit_count", 0)
+
+        if self.region_store is not None:
+            self.region_store.close()
+        self.region_store = None
+        if self.storage == "region":
+            self.region_store = RegionStore(region_dir_for_save(save_file_path), CHUNK_SIZE, COMPRESSION_NAMES[self.region_compression])
+
+        if self.edit_journal.path != journal_path_for_save(save_file_path):
+            self.edit_journal.close()
+            self.edit_journal = EditJournal(save_file_path)
+        self._replay_journal(save_file_path)
+
+    def _replay_journal(self, save_file_path): # Edits made after the last save (e.g. before a crash) become stashed chunks
+        journal_edits = read_journal_edits(save_file_path)
+        for block_pos, block_value in journal_edits:
+            chunk_pos = ((block_pos[0] // CHUNK_SIZE) * CHUNK_SIZE, (block_pos[2] // CHUNK_SIZE) * CHUNK_SIZE)
+            replayed_blocks = self.saved_chunk_data.get(chunk_pos)
+            if replayed_blocks is None:
+                replayed_blocks = self._load_saved_chunk(chunk_pos)
+                if replayed_blocks is None: # Chunk was never saved: edits apply to the generated terrain
+                    replayed_blocks = {} if self.save_format == "delta" else self._pristine_blocks(chunk_pos, CHUNK_SIZE)
+                self.saved_chunk_data[chunk_pos] = replayed_blocks
+            if self.save_format == "delta" or block_value is not None:
+                replayed_blocks[block_pos] = block_value
+            else:
+                replayed_blocks.pop(block_pos, None)
+        if journal_edits:
+            print(f"[JOURNAL] Replayed {len(journal_edits)} edits made after the last save into {len(self.saved_chunk_data)} chunks.")
+
+    def _load_saved_chunk(self, chunk_pos): # -> {(x,y,z): block} as saved, or None if the chunk was never saved
+        saved_blocks = self.saved_chunk_data.get(chunk_pos)
+        if saved_blocks is None and self.region_store is not None:
+            saved_blocks = self.region_store.read_chunk(chunk_pos)
+        if saved_blocks is None and chunk_pos in self.save_chunk_index:
+            saved_blocks = read_json_chunk(self.save_file_path, self.save_chunk_index[chunk_pos])
+        return saved_blocks
+
+    def _saved_chunk_positions(self):
+        saved_positions = set(self.saved_chunk_data)
+        saved_positions.update(self.save_chunk_index)
+        if self.region_store is not None:
+            saved_positions.update(self.region_store.chunk_positions())
+        return saved_positions
+
+    def generate_all_chunks(self, build_meshes=True): # For non-streaming mode
         print(f"Generating new world (non-streaming). CHUNK_SIZE={CHUNK_SIZE}, WORLD_SIZE (radius)={WORLD_SIZE}.")
         self.vworld.chunks.clear() # Clear any existing chunks in VoxelWorld
 
@@ -2005,10 +2468,12 @@ class World: # High-level game world manager
             for z_chunk_gen_idx in range(-WORLD_SIZE, WORLD_SIZE + 1):
                 chunk_base_coords = (x_chunk_gen_idx * CHUNK_SIZE, z_chunk_gen_idx * CHUNK_SIZE)
                 new_chunk_instance = Chunk(self.vworld, chunk_base_coords, generate_terrain_on_init=True)
+                new_chunk_instance.dirty = self.save_format == "full" # Full saves of fixed-size worlds hold every chunk
                 self.chunks[chunk_base_coords] = new_chunk_instance
         
-        for chk_to_build in self.chunks.values():
-            chk_to_build.build_mesh()
+        if build_meshes:
+            for chk_to_build in self.chunks.values():
+                chk_to_build.build_mesh()
         print("Finished generating new world (non-streaming).")
 
     def update_chunks(self, player_world_pos): # For streaming mode
@@ -2031,31 +2496,27 @@ class World: # High-level game world manager
         loaded_chunk_keys = list(self.chunks.keys())
         for loaded_key in loaded_chunk_keys:
             if loaded_key not in currently_desired_chunks:
-                self.chunks[loaded_key].remove() # Ursina entity cleanup
+                chunk_to_unload = self.chunks[loaded_key]
+                if chunk_to_unload.dirty: # Keep unsaved edits when the chunk leaves view
+                    self.saved_chunk_data[loaded_key] = self._serialize_chunk_for_save(chunk_to_unload)
+                chunk_to_unload.remove() # Ursina entity cleanup
                 del self.chunks[loaded_key]
         
         # Load new chunks that are desired but not loaded
         for desired_key in currently_desired_chunks:
             if desired_key not in self.chunks:
                 new_chunk_instance = None
-                chunk_key_str = f"{desired_key[0]},{desired_key[1]}"
+                block_data_for_this_chunk = self._load_saved_chunk(desired_key)
 
-                if chunk_key_str in self.saved_chunk_data:
+                if block_data_for_this_chunk is not None and self.save_format == "delta":
+                    # Regenerate from the seed and replay the saved edits on top
+                    new_chunk_instance = Chunk(self.vworld, desired_key, generate_terrain_on_init=True)
+                    new_chunk_instance.apply_saved_edits(block_data_for_this_chunk)
+                elif block_data_for_this_chunk is not None:
                     # Load from cache
                     # print(f"[STREAMING] Loading chunk {desired_key} from saved_chunk_data cache.")
                     new_chunk_instance = Chunk(self.vworld, desired_key, generate_terrain_on_init=False)
-                    block_data_for_this_chunk = self.saved_chunk_data[chunk_key_str]
-                    
-                    for bk_str, bdata_val in block_data_for_this_chunk.items():
-                        try:
-                            bx, by, bz = map(int, bk_str.split(','))
-                            new_chunk_instance.blocks[(bx, by, bz)] = bdata_val
-                        except ValueError:
-                            # print(f"[WARN] update_chunks: Malformed block key '{bk_str}' in cached chunk {chunk_key_str}")
-                            continue # Skip malformed block key
-                    
-                    # Recreate special entities for this loaded chunk
-                    self._recreate_special_entities_for_chunk(block_data_for_this_chunk)
+                    new_chunk_instance.blocks.update(block_data_for_this_chunk)
                 else:
                     # Generate new chunk if not in cache
                     # print(f"[STREAMING] Generating new chunk {desired_key} as it's not in cache.")
@@ -2063,54 +2524,48 @@ class World: # High-level game world manager
                 
                 if new_chunk_instance:
                     self.chunks[desired_key] = new_chunk_instance
+                    # Doors, pokeballs and foxfoxes of the saved chunk; unloading the chunk destroys them again
+                    self._recreate_special_entities_for_chunk(block_data_for_this_chunk)
                     new_chunk_instance.build_mesh() # Build mesh for the new/loaded chunk
 
     def _recreate_special_entities_for_chunk(self, chunk_block_data_dict):
         # Helper to recreate special entities for a chunk based on its block data.
         # chunk_block_data_dict is the dict of blocks for this specific chunk,
-        # e.g., self.saved_chunk_data[chunk_key_string]
+        # e.g., self.saved_chunk_data[chunk_key], keyed by world (x,y,z) tuples.
+        # The chunk must already be in self.chunks: it owns the entities from here on.
         if not chunk_block_data_dict:
             return
 
-        for block_pos_str, block_data_val in chunk_block_data_dict.items():
-            try:
-                # Block positions are world coordinates, already stored as such in save file
-                bx, by, bz = map(int, block_pos_str.split(','))
-                pos_tuple = (bx, by, bz)
-            except ValueError:
-                # print(f"[WARN] _recreate_special_entities: Malformed block position string '{block_pos_str}'")
-                continue
-
+        for pos_tuple, block_data_val in chunk_block_data_dict.items():
             actual_type = block_data_val
             rotation = 0
             if isinstance(block_data_val, dict):
                 actual_type = block_data_val.get("type", block_data_val)
                 rotation = block_data_val.get("rotation", 0)
+            if actual_type not in (DOOR, POKEBALL, FOXFOX): continue
+            if self.vworld.get_special_entity(pos_tuple) is not None: continue # Not duplicated
+            if self.vworld.chunk_at(pos_tuple) is None: continue # Created when its chunk loads
             
-            # Ensure global entity dicts are used and entities are not duplicated
             if actual_type == DOOR:
-                if pos_tuple not in door_entities:
-                    # Check if this is the "bottom" part of a door if that data is stored
-                    # For simplicity, assume any DOOR entry from save needs an entity if not present
-                    door_obj = Door(pos_tuple)
-                    door_obj.pivot.rotation_y = rotation
-                    # Check if door is open based on rotation, or add 'open_state' to save data if needed
-                    if abs(rotation - door_obj.open_rotation) < 1: # Simple check
-                        door_obj.open = True
-                        door_obj.collider = None
-                    else:
-                        door_obj.open = False
-                    door_entities[pos_tuple] = door_obj
+                if isinstance(block_data_val, dict) and block_data_val.get("bottom") is False:
+                    continue # The top half belongs to the door entity below it
+                door_obj = Door(pos_tuple)
+                door_obj.pivot.rotation_y = rotation
+                # Check if door is open based on rotation, or add 'open_state' to save data if needed
+                if abs(rotation - door_obj.open_rotation) < 1: # Simple check
+                    door_obj.open = True
+                    door_obj.collider = None
+                else:
+                    door_obj.open = False
+                self.vworld.set_special_entity(pos_tuple, door_obj)
             elif actual_type == POKEBALL:
-                if pos_tuple not in pokeball_entities:
-                    pb_obj = PokeballEntity(pos_tuple)
-                    pb_obj.rotation_y = rotation # Pokeballs might also have a saved rotation
-                    pokeball_entities[pos_tuple] = pb_obj
+                pb_obj = PokeballEntity(pos_tuple)
+                pb_obj.rotation_y = rotation # Pokeballs might also have a saved rotation
+                self.vworld.set_special_entity(pos_tuple, pb_obj)
             elif actual_type == FOXFOX:
-                if pos_tuple not in foxfox_entities:
-                    ff_obj = FoxfoxEntity(pos_tuple)
-                    ff_obj.rotation_y = rotation # Foxfox entities might also have a saved rotation
-                    foxfox_entities[pos_tuple] = ff_obj
+                ff_obj = FoxfoxEntity(pos_tuple)
+                ff_obj.rotation_y = rotation # Foxfox entities might also have a saved rotation
+                self.vworld.set_special_entity(pos_tuple, ff_obj)
             # PARTICLE_BLOCK is a terrain block type, not usually a separate global entity unless
             # it manages an effect. If ParticleBlockEntity instances are needed globally:
             # elif actual_type == PARTICLE_BLOCK:
@@ -2118,37 +2573,266 @@ class World: # High-level game world manager
             #         # particleblock_entities[pos_tuple] = ParticleBlockEntity(pos_tuple)
             #         pass # Assuming ParticleBlockEntity is for effects, may not need recreation this way.
 
-    def save_world(self): # Saves current world state to JSON
+    def save_world(self, on_complete=None, wait=False): # Snapshots the world, then writes it on a background thread
+        # on_complete(success) is called on the main thread (from poll_save) once the save is on disk.
         global current_save_name # Uses the global save name
+        if self.save_thread is not None:
+            # One save at a time; the next one snapshots the world again once the running one is done
+            print("[SAVE] A save is already running, queued another one after it.")
+            self.queued_save_callbacks.append(on_complete)
+            if wait:
+                self.wait_for_save()
+            return
+
         save_file_path_actual = os.path.join('save', current_save_name)
-        
         print(f"Saving world to '{save_file_path_actual}'...")
-        data_to_save_json = {}
-        # Include world settings like CHUNK_SIZE, WORLD_SIZE for potential future use on load
-        data_to_save_json["world_settings"] = {
+        save_snapshot = self._snapshot_for_save(save_file_path_actual)
+        self.save_callbacks = [on_complete]
+        self.save_progress = (0, len(save_snapshot["chunks"]) + len(save_snapshot["stashed_chunks"]))
+        self.save_result = None
+        self.save_thread = threading.Thread(target=self._write_save_snapshot, args=(save_snapshot,), name="world-save")
+        self.save_thread.start()
+        if wait:
+            self.wait_for_save()
+
+    def _snapshot_for_save(self, save_file_path): # Main thread: cheap copies of everything the writer needs
+        # Block dicts are copied shallowly (a C-level dict copy per chunk); the expensive part,
+        # diffing against the generated terrain and encoding, happens on the save thread.
+        # Only dirty chunks are written; everything else is already in the save (or stashed).
+        chunk_snapshots = {}
+        chunk_versions = {}
+        for chunk_pos, chunk_inst in self.chunks.items():
+            if chunk_inst.dirty:
+                chunk_snapshots[chunk_pos] = dict(chunk_inst.edited_blocks if self.save_format == "delta" else chunk_inst.blocks)
+                chunk_versions[chunk_pos] = chunk_inst.edit_version
+        self.edit_journal.start_checkpoint(save_file_path) # Edits from here on go to a fresh journal
+        return {
+            "thumbnail_pixels": self._render_thumbnail(player.position if player else (0, 0, 0)),
+            "play_time_seconds": self.play_time_seconds,
+            "edit_count": self.edit_count,
+            "path": save_file_path,
+            # Include world settings like CHUNK_SIZE, WORLD_SIZE for potential future use on load
+            "world_settings": {
+                "chunk_size": CHUNK_SIZE,
+                "world_radius_chunks": WORLD_SIZE, # Note: This is radius if non-streaming
+                "world_seed": self.vworld.seed,
+                "generator_version": GENERATOR_VERSION,
+                "save_format": self.save_format,
+                "storage": self.storage,
+                "region_compression": self.region_compression,
+                "sea_level": self.vworld.sea_level
+            },
             "chunk_size": CHUNK_SIZE,
-            "world_radius_chunks": WORLD_SIZE # Note: This is radius if non-streaming
+            "save_format": self.save_format,
+            "chunks": chunk_snapshots,
+            "chunk_versions": chunk_versions,
+            # Stashed chunks are replaced (never mutated) when they change, so sharing them is safe
+            "stashed_chunks": dict(self.saved_chunk_data),
+            "source_path": self.save_file_path,
+            "source_index": dict(self.save_chunk_index),
+            "region_store": self.region_store,
         }
-        data_to_save_json["chunks"] = {}
 
-        for chunk_coord_key_save, chunk_inst_save in self.chunks.items():
-            json_key_for_chunk = f"{chunk_coord_key_save[0]},{chunk_coord_key_save[1]}"
-            data_to_save_json["chunks"][json_key_for_chunk] = {} # Init dict for this chunk's blocks
-            
-            for block_pos_key_save, block_data_val_save in chunk_inst_save.blocks.items():
-                json_key_for_block = f"{block_pos_key_save[0]},{block_pos_key_save[1]},{block_pos_key_save[2]}"
-                data_to_save_json["chunks"][json_key_for_chunk][json_key_for_block] = block_data_val_save
-        
+    def _write_save_snapshot(self, save_snapshot): # Save thread: serialize and write, never touching live chunks
+        save_file_path_actual = save_snapshot["path"]
         try:
-            with open(save_file_path_actual, 'w') as f_save:
-                json.dump(data_to_save_json, f_save, indent=2) # Use indent for readability
+            # Chunks that are not loaded right now (streaming) keep whatever was saved/stashed for them
+            chunks_to_save = dict(save_snapshot["stashed_chunks"])
+            for chunk_pos_snap, snapshot_blocks in save_snapshot["chunks"].items():
+                if save_snapshot["save_format"] == "delta":
+                    snapshot_blocks = self._delta_against_pristine(chunk_pos_snap, snapshot_blocks, save_snapshot["chunk_size"])
+                chunks_to_save[chunk_pos_snap] = snapshot_blocks
+
+            if save_snapshot["world_settings"]["storage"] == "region":
+                new_region_store = self._save_chunks_to_regions(save_snapshot, chunks_to_save)
+                tmp_manifest_path = save_file_path_actual + '.tmp'
+                with open(tmp_manifest_path, 'w') as f_save:
+                    json.dump({"world_settings": save_snapshot["world_settings"]}, f_save, indent=2) # Use indent for readability
+                os.replace(tmp_manifest_path, save_file_path_actual) # Readers see the old or the new file, never half of one
+                self.save_result = {"ok": True, "path": save_file_path_actual, "region_store": new_region_store,
+                                    "chunk_count": len(new_region_store.chunk_positions()),
+                                    "saved_stash": save_snapshot["stashed_chunks"], "chunk_versions": save_snapshot["chunk_versions"]}
+            else:
+                # Streamed chunk by chunk into a side file; chunks only present in the old file are copied
+                # over one at a time. poll_save renames it over the save on the main thread, together with
+                # swapping in the new chunk index, so on-demand chunk reads never see a mismatched index.
+                new_chunk_index = write_json_save(save_file_path_actual + '.saving', save_snapshot["world_settings"],
+                                                  self._json_chunks_to_write(save_snapshot, chunks_to_save))
+                self.save_result = {"ok": True, "path": save_file_path_actual, "chunk_index": new_chunk_index,
+                                    "chunk_count": len(new_chunk_index),
+                                    "saved_stash": save_snapshot["stashed_chunks"], "chunk_versions": save_snapshot["chunk_versions"]}
+            try:
+                write_png(thumbnail_path_for_save(save_file_path_actual), THUMBNAIL_SIZE, THUMBNAIL_SIZE, save_snapshot["thumbnail_pixels"])
+            except OSError as e_thumbnail:
+                print(f"[SAVE] Could not write the thumbnail: {e_thumbnail}")
+            self.save_result["world_meta"] = world_meta_from_settings(
+                save_snapshot["world_settings"], self.save_result["chunk_count"], save_snapshot["play_time_seconds"],
+                save_snapshot["edit_count"], os.path.basename(thumbnail_path_for_save(save_file_path_actual)))
             print("World saved successfully.")
         except Exception as e_save:
             print(f"Error saving world to '{save_file_path_actual}': {e_save}")
+            self.save_result = {"ok": False}
+
+    def close_save_store(self): # On exit: lets a running save finish, then compacts and closes the region files
+        self.wait_for_save()
+        if self.region_store is not None:
+            self.region_store.close()
+            self.region_store = None
+
+    def _json_chunks_to_write(self, save_snapshot, chunks_to_save):
+        chunks_written = 0
+        for chunk_pos_write, chunk_save_data in chunks_to_save.items():
+            chunks_written += 1
+            self.save_progress = (chunks_written, self.save_progress[1])
+            if save_snapshot["save_format"] == "delta" and not chunk_save_data:
+                continue # Untouched chunk, nothing to store
+            yield chunk_pos_write, chunk_save_data
+        for chunk_pos_write, chunk_span_write in save_snapshot["source_index"].items():
+            if chunk_pos_write not in chunks_to_save:
+                yield chunk_pos_write, read_json_chunk(save_snapshot["source_path"], chunk_span_write)
+
+    def _save_chunks_to_regions(self, save_snapshot, chunks_to_save): # -> RegionStore now holding the save
+        target_region_dir = region_dir_for_save(save_snapshot["path"])
+        source_store = save_snapshot["region_store"]
+        if source_store is not None and os.path.abspath(source_store.region_dir) == os.path.abspath(target_region_dir):
+            target_store = source_store
+        else:
+            # New world, or "Save As" under another name: start from a copy of everything saved so far
+            shutil.rmtree(target_region_dir, ignore_errors=True)
+            target_store = RegionStore(target_region_dir, save_snapshot["chunk_size"],
+                                       COMPRESSION_NAMES[save_snapshot["world_settings"]["region_compression"]])
+            if source_store is not None:
+                source_store.copy_chunks_to(target_store)
+
+        chunks_written = 0
+        for chunk_coord_key_save, chunk_save_data in chunks_to_save.items():
+            if save_snapshot["save_format"] == "delta" and not chunk_save_data:
+                target_store.delete_chunk(chunk_coord_key_save) # Edits were undone, terrain is pristine again
+            else:
+                target_store.write_chunk(chunk_coord_key_save, chunk_save_data)
+            chunks_written += 1
+            self.save_progress = (chunks_written, self.save_progress[1])
+        return target_store
+
+    def poll_save(self): # Main thread, every frame: finish up a background save once its thread is done
+        if self.save_thread is None or self.save_thread.is_alive():
+            return
+        self.save_thread = None
+        save_result = self.save_result or {"ok": False}
+        if save_result["ok"]:
+            if "region_store" in save_result:
+                if self.region_store is not None and self.region_store is not save_result["region_store"]:
+                    self.region_store.close()
+                self.region_store = save_result["region_store"]
+                self.save_chunk_index = {}
+            else:
+                os.replace(save_result["path"] + '.saving', save_result["path"])
+                self.save_chunk_index = save_result["chunk_index"]
+            self.save_file_path = save_result["path"]
+            try:
+                write_world_meta(save_result["path"], save_result["world_meta"]) # After the save itself, so it is never older
+            except OSError as e_meta:
+                print(f"[SAVE] Could not write world metadata: {e_meta}")
+            # Stashed chunks that were written are on disk now; ones re-stashed during the save stay
+            for stashed_pos, stashed_blocks in save_result["saved_stash"].items():
+                if self.saved_chunk_data.get(stashed_pos) is stashed_blocks:
+                    del self.saved_chunk_data[stashed_pos]
+            for saved_chunk_pos, saved_edit_version in save_result["chunk_versions"].items():
+                saved_chunk = self.chunks.get(saved_chunk_pos)
+                if saved_chunk is not None and saved_chunk.edit_version == saved_edit_version:
+                    saved_chunk.dirty = False
+            self.edit_journal.finish_checkpoint() # Checkpoint is on disk, the journal up to it can go
+
+        for save_callback in self.save_callbacks:
+            if save_callback:
+                save_callback(save_result["ok"])
+        self.save_callbacks = []
+        if self.queued_save_callbacks:
+            queued_callbacks = self.queued_save_callbacks
+            self.queued_save_callbacks = []
+            self.save_world()
+            self.save_callbacks = queued_callbacks
+
+    def tick_persistence(self): # Main thread, every frame: finish saves, flush the journal, autosave
+        self.play_time_seconds += min(time.dt, 1.0) # Long frames (loading, window dragged) do not count
+        self.poll_save()
+        self.edit_journal.flush()
+        if self.save_thread is None and time.time() - self.last_autosave_time > AUTOSAVE_INTERVAL_SECONDS:
+            self.last_autosave_time = time.time()
+            if self.saved_chunk_data or any(chunk_inst.dirty for chunk_inst in self.chunks.values()):
+                print("[AUTOSAVE] Writing chunks changed since the last save.")
+                self.save_world()
+
+    def wait_for_save(self): # Blocks until no save is running (used where the game cannot keep going)
+        while self.save_thread is not None:
+            self.save_thread.join()
+            self.poll_save()
+
+    def save_status_message(self): # Text for the HUD while a save is running
+        if self.save_thread is None:
+            return ""
+        chunks_done, chunks_total = self.save_progress
+        return f"Saving... {chunks_done * 100 // max(chunks_total, 1)}%"
+
+    def _render_thumbnail(self, center_pos): # -> RGB bytes of a top-down map of the loaded blocks around center_pos
+        half_size = THUMBNAIL_SIZE // 2
+        min_x, min_z = floor(center_pos[0]) - half_size, floor(center_pos[2]) - half_size
+        column_tops = {} # (x, z) -> (y, block) of the highest block seen
+        for (chunk_x, chunk_z), chunk_inst in self.chunks.items():
+            if chunk_x + CHUNK_SIZE <= min_x or chunk_x >= min_x + THUMBNAIL_SIZE or \
+               chunk_z + CHUNK_SIZE <= min_z or chunk_z >= min_z + THUMBNAIL_SIZE:
+                continue
+            for (bx, by, bz), block_value in chunk_inst.blocks.items():
+                if block_value == AIR_BLOCK:
+                    continue
+                column_top = column_tops.get((bx, bz))
+                if column_top is None or by > column_top[0]:
+                    column_tops[(bx, bz)] = (by, block_value)
+        for column_pos, column_top in list(column_tops.items()): # Implicit sea above the sea floor
+            sea_chunk = self.chunks.get(((column_pos[0] // CHUNK_SIZE) * CHUNK_SIZE, (column_pos[1] // CHUNK_SIZE) * CHUNK_SIZE))
+            if sea_chunk is not None and self.vworld.sea_level is not None and column_top[0] < self.vworld.sea_level and \
+               column_pos in sea_chunk.get_sea_floor_heights():
+                column_tops[column_pos] = (self.vworld.sea_level, 'water')
+        center_y = center_pos[1]
+        thumbnail_pixels = bytearray(THUMBNAIL_SIZE * THUMBNAIL_SIZE * 3) # Unloaded columns stay black
+        for (bx, bz), (by, block_value) in column_tops.items():
+            px, pz = bx - min_x, bz - min_z
+            if not (0 <= px < THUMBNAIL_SIZE and 0 <= pz < THUMBNAIL_SIZE):
+                continue
+            block_type = block_value.get('type') if isinstance(block_value, dict) else block_value
+            shade = max(0.6, min(1.2, 1.0 + (by - center_y) * 0.02)) # Higher ground is lighter
+            pixel_index = ((THUMBNAIL_SIZE - 1 - pz) * THUMBNAIL_SIZE + px) * 3 # North (+z) at the top
+            thumbnail_pixels[pixel_index:pixel_index + 3] = bytes(min(255, int(channel * shade)) for channel in
+                                                                  THUMBNAIL_BLOCK_COLORS.get(block_type, THUMBNAIL_DEFAULT_COLOR))
+        return bytes(thumbnail_pixels)
+
+    def _serialize_chunk_for_save(self, chunk_to_save): # -> {(x,y,z): block} in the world's save format
+        if self.save_format != "delta":
+            return dict(chunk_to_save.blocks)
+        return self._delta_against_pristine(chunk_to_save.chunk_pos, chunk_to_save.edited_blocks, CHUNK_SIZE)
+
+    def _pristine_blocks(self, chunk_pos, chunk_size): # Blocks of a chunk exactly as the seed generates them
+        # Safe to call from the save thread: the generation cache is locked and the generator is stateless.
+        pristine_blocks = self.vworld.generation_cache.load(self.vworld.seed, chunk_pos, chunk_size)
+        if pristine_blocks is None:
+            pristine_blocks = self.vworld.generator.generate_chunk(chunk_pos, chunk_size)
+            # Lazily generated chunks are only cached once complete: without this, every later save of this chunk regenerates it
+            self.vworld.generation_cache.store(self.vworld.seed, chunk_pos, chunk_size, pristine_blocks)
+        if self.vworld.sea_level is None: # Same as Chunk.generate_terrain for worlds with the sea stored as blocks
+            add_explicit_sea_water(pristine_blocks, self.vworld.generator.sea_floor_heights(
+                self.vworld.generator.column_context(chunk_pos, chunk_size)))
+        return pristine_blocks
+
+    def _delta_against_pristine(self, chunk_pos, edited_blocks, chunk_size):
+        # Only voxels that differ from what the seed generates; None marks a removed block.
+        pristine_blocks = self._pristine_blocks(chunk_pos, chunk_size)
+        chunk_delta = {}
+        for block_pos, block_val in edited_blocks.items():
+            if pristine_blocks.get(block_pos) != block_val:
+                chunk_delta[block_pos] = block_val
+        return chunk_delta
 
     def load_world_from_file(self, save_filename_to_load): # Loads world from JSON
-        global CHUNK_SIZE, WORLD_SIZE # Allow updating these from save if present
-        
         # This method is primarily for non-streaming mode full loads.
         # In streaming mode, __init__ handles populating self.saved_chunk_data.
         # If this method IS called in streaming mode (e.g. by a command),
@@ -2163,24 +2847,19 @@ class World: # High-level game world manager
                 chunk_inst.remove()
             self.chunks.clear()
             self.saved_chunk_data.clear()
+            self.save_chunk_index = {}
             
             # Populate self.saved_chunk_data from the new file.
             load_file_path_stream_reload = os.path.join('save', save_filename_to_load)
             try:
-                with open(load_file_path_stream_reload, 'r') as f_reload_cache:
-                    full_saved_data_reload = json.load(f_reload_cache)
-                    self.saved_chunk_data = full_saved_data_reload.get("chunks", {})
-                    saved_settings_reload = full_saved_data_reload.get("world_settings")
-                    if saved_settings_reload:
-                        global CHUNK_SIZE, WORLD_SIZE
-                        CHUNK_SIZE = saved_settings_reload.get("chunk_size", CHUNK_SIZE)
-                        WORLD_SIZE = saved_settings_reload.get("world_radius_chunks", WORLD_SIZE)
-                        print(f"[STREAMING RELOAD] Loaded settings: ChunkSize={CHUNK_SIZE}")
-                    print(f"[STREAMING RELOAD] Loaded {len(self.saved_chunk_data)} chunks into cache from '{load_file_path_stream_reload}'.")
+                self._open_save_file(load_file_path_stream_reload)
+                print(f"[STREAMING RELOAD] Loaded settings: ChunkSize={CHUNK_SIZE}, Seed={WORLD_SEED}, Format={self.save_format}, Storage={self.storage}")
+                print(f"[STREAMING RELOAD] Chunks of '{load_file_path_stream_reload}' are read on demand ({self.storage} storage, {len(self.save_chunk_index)} indexed JSON chunks).")
             except FileNotFoundError:
                 print(f"[STREAMING RELOAD] File '{load_file_path_stream_reload}' not found. Cache is empty.")
-            except json.JSONDecodeError as e_json_reload:
-                print(f"[STREAMING RELOAD] Error decoding JSON from '{load_file_path_stream_reload}': {e_json_reload}. Cache is empty.")
+            except ValueError as e_json_reload: # Includes json.JSONDecodeError
+                print(f"[STREAMING RELOAD] Error reading save '{load_file_path_stream_reload}': {e_json_reload}. Cache is empty.")
+                self.save_chunk_index = {}
             # update_chunks will then handle loading from this new cache.
             return
 
@@ -2194,33 +2873,32 @@ class World: # High-level game world manager
         self.vworld.chunks.clear() # Clear any existing data
 
         try:
-            with open(load_file_path_actual, 'r') as f_load:
-                loaded_world_data = json.load(f_load)
-
             # Load world settings if they exist in the save file
-            saved_settings = loaded_world_data.get("world_settings")
-            if saved_settings:
-                CHUNK_SIZE = saved_settings.get("chunk_size", CHUNK_SIZE)
-                WORLD_SIZE = saved_settings.get("world_radius_chunks", WORLD_SIZE)
-                print(f"Loaded settings from save: ChunkSize={CHUNK_SIZE}, WorldRadius={WORLD_SIZE}")
-            
-            loaded_chunks_data = loaded_world_data.get("chunks", {})
-            for json_chunk_key_load, blocks_dict_load in loaded_chunks_data.items():
-                try:
-                    cx_ld, cz_ld = map(int, json_chunk_key_load.split(','))
-                    chunk_coord_ld = (cx_ld, cz_ld)
-                    
-                    # Create chunk instance, generate_terrain=False as we're loading its blocks
-                    newly_loaded_chunk = Chunk(self.vworld, chunk_coord_ld, generate_terrain_on_init=False)
-                    
-                    for json_block_key_load, block_val_load in blocks_dict_load.items():
-                        try:
-                            bx_ld, by_ld, bz_ld = map(int, json_block_key_load.split(','))
-                            newly_loaded_chunk.blocks[(bx_ld, by_ld, bz_ld)] = block_val_load
-                        except ValueError: pass # Skip malformed block keys
-                    
-                    self.chunks[chunk_coord_ld] = newly_loaded_chunk
-                except ValueError: pass # Skip malformed chunk keys
+            self._open_save_file(load_file_path_actual)
+            print(f"Loaded settings from save: ChunkSize={CHUNK_SIZE}, WorldRadius={WORLD_SIZE}, Seed={WORLD_SEED}, Format={self.save_format}, Storage={self.storage}")
+
+            if self.save_format == "delta":
+                # Base terrain comes from the seed; the save only holds the player's edits on top of it
+                self.generate_all_chunks(build_meshes=False)
+            journal_chunk_positions = set(self.saved_chunk_data) # Only replayed journal edits are stashed at this point
+            for chunk_coord_ld in self._saved_chunk_positions():
+                blocks_dict_load = self._load_saved_chunk(chunk_coord_ld)
+
+                if self.save_format == "delta":
+                    edited_chunk = self.chunks.get(chunk_coord_ld)
+                    if edited_chunk is None: # Edited chunk outside the generated radius
+                        edited_chunk = Chunk(self.vworld, chunk_coord_ld, generate_terrain_on_init=True)
+                        self.chunks[chunk_coord_ld] = edited_chunk
+                    edited_chunk.apply_saved_edits(blocks_dict_load)
+                    continue
+
+                # Create chunk instance, generate_terrain=False as we're loading its blocks
+                newly_loaded_chunk = Chunk(self.vworld, chunk_coord_ld, generate_terrain_on_init=False)
+                newly_loaded_chunk.blocks.update(blocks_dict_load)
+                self.chunks[chunk_coord_ld] = newly_loaded_chunk
+            for journal_chunk_pos in journal_chunk_positions:
+                self.chunks[journal_chunk_pos].dirty = True # Replayed edits are not in the save yet
+            self.saved_chunk_data.clear() # Every saved chunk is loaded now
             
             # After all blocks loaded, build meshes and (for non-streaming) create special entities
             for chunk_coord_loaded, loaded_chunk_inst_build in self.chunks.items():
@@ -2230,27 +2908,7 @@ class World: # High-level game world manager
                 # This is for non-streaming mode full load.
                 # For streaming, special entities are handled per-chunk in update_chunks.
                 if not self.streaming_mode:
-                    # Construct the string key as it would be in saved_chunk_data
-                    # to pass to a potential common helper, or inline logic carefully.
-                    # Here, we directly iterate this specific chunk's blocks.
-                    for b_pos_special_load, b_data_special_load in loaded_chunk_inst_build.blocks.items():
-                        actual_type_special_load = b_data_special_load
-                        rot_special_load = 0
-                        if isinstance(b_data_special_load, dict):
-                            actual_type_special_load = b_data_special_load.get("type", b_data_special_load)
-                            rot_special_load = b_data_special_load.get("rotation", 0)
-
-                        # Ensure global entity dicts are used
-                        if actual_type_special_load == DOOR and b_pos_special_load not in door_entities:
-                            door_ent = Door(b_pos_special_load); door_ent.pivot.rotation_y = rot_special_load
-                            door_entities[b_pos_special_load] = door_ent
-                        elif actual_type_special_load == POKEBALL and b_pos_special_load not in pokeball_entities:
-                            pb_ent = PokeballEntity(b_pos_special_load); pb_ent.rotation_y = rot_special_load
-                            pokeball_entities[b_pos_special_load] = pb_ent
-                        elif actual_type_special_load == FOXFOX and b_pos_special_load not in foxfox_entities:
-                            ff_ent = FoxfoxEntity(b_pos_special_load); ff_ent.rotation_y = rot_special_load
-                            foxfox_entities[b_pos_special_load] = ff_ent
-                        # ParticleBlockEntity might need special handling here if it's managed globally
+                    self._recreate_special_entities_for_chunk(loaded_chunk_inst_build.blocks)
 
             print("World loaded successfully from file (non-streaming).")
 
@@ -2264,9 +2922,128 @@ class World: # High-level game world manager
 
     def set_block(self, world_pos_set, block_type_to_set):
         self.vworld.set_block(world_pos_set, block_type_to_set)
+        self.edit_count += 1
+        block_pos_set = (floor(world_pos_set[0]), floor(world_pos_set[1]), floor(world_pos_set[2]))
+        self.edit_journal.append(block_pos_set, block_type_to_set)
+
+    def set_blocks(self, block_changes): # Many blocks at once, each chunk remeshed once (see VoxelWorld.set_blocks)
+        block_changes = [((floor(block_pos[0]), floor(block_pos[1]), floor(block_pos[2])), block_value)
+                         for block_pos, block_value in block_changes]
+        loaded_changes = [block_change for block_change in block_changes if self.vworld.chunk_at(block_change[0]) is not None]
+        if len(loaded_changes) < len(block_changes):
+            print(f"[WORLD] Skipped {len(block_changes) - len(loaded_changes)} blocks in chunks that are not loaded.")
+            block_changes = loaded_changes
+        blocks_set = self.vworld.set_blocks(block_changes)
+        self.edit_count += blocks_set
+        for block_pos, block_value in block_changes:
+            self.edit_journal.append(block_pos, block_value)
+        return blocks_set
+
+    # --- Special entities (owned by the chunk they stand in, see VoxelWorld.set_special_entity) ---
+    def get_special_entity(self, world_pos_get):
+        return self.vworld.get_special_entity(world_pos_get)
+
+    def set_special_entity(self, world_pos_set, special_entity):
+        return self.vworld.set_special_entity(world_pos_set, special_entity)
+
+    def special_entities_in_box(self, corner_a, corner_b, entity_class=None):
+        return self.vworld.special_entities_in_box(corner_a, corner_b, entity_class)
+
+    # --- Region edits (fill / replace / clone) ---
+    # These read the loaded chunks' block dicts directly instead of calling get_block per voxel,
+    # and write through set_blocks, so a whole region costs one remesh per touched chunk.
+    # Blocks in chunks that are not loaded are not seen (like get_block).
+    def _region_bounds(self, corner_a, corner_b): # -> (min corner, max corner), both inclusive
+        min_corner = tuple(floor(min(corner_a[i], corner_b[i])) for i in range(3))
+        max_corner = tuple(floor(max(corner_a[i], corner_b[i])) for i in range(3))
+        region_volume = (max_corner[0] - min_corner[0] + 1) * (max_corner[1] - min_corner[1] + 1) * (max_corner[2] - min_corner[2] + 1)
+        if region_volume > MAX_REGION_EDIT_BLOCKS:
+            raise ValueError(f"region has {region_volume} blocks, the limit is {MAX_REGION_EDIT_BLOCKS}")
+        return min_corner, max_corner
+
+    def blocks_in_box(self, corner_a, corner_b): # -> {(x,y,z): block} inside the box, as get_block sees them
+        (min_x, min_y, min_z), (max_x, max_y, max_z) = self._region_bounds(corner_a, corner_b)
+        box_blocks = {}
+        sea_level = self.vworld.sea_level
+        for (chunk_x, chunk_z), chunk_inst in list(self.chunks.items()): # Complete lazy chunks the box reaches below
+            if chunk_inst.shell_floors is not None and min_y < max(chunk_inst.shell_floors.values()) and \
+               not (chunk_x > max_x or chunk_x + CHUNK_SIZE <= min_x or chunk_z > max_z or chunk_z + CHUNK_SIZE <= min_z):
+                self.vworld.materialize_deep(chunk_inst)
+        for (chunk_x, chunk_z), chunk_inst in self.chunks.items():
+            if chunk_x > max_x or chunk_x + CHUNK_SIZE <= min_x or chunk_z > max_z or chunk_z + CHUNK_SIZE <= min_z:
+                continue
+            for (bx, by, bz), block_value in chunk_inst.blocks.items():
+                if min_x <= bx <= max_x and min_y <= by <= max_y and min_z <= bz <= max_z and block_value != AIR_BLOCK:
+                    box_blocks[(bx, by, bz)] = block_value
+            if sea_level is None or min_y > sea_level:
+                continue
+            for (sea_x, sea_z), sea_floor_y in chunk_inst.get_sea_floor_heights().items(): # Implicit sea water
+                if min_x <= sea_x <= max_x and min_z <= sea_z <= max_z:
+                    for sea_y in range(max(sea_floor_y, min_y), min(sea_level, max_y) + 1):
+                        if (sea_x, sea_y, sea_z) not in chunk_inst.blocks:
+                            box_blocks[(sea_x, sea_y, sea_z)] = 'water'
+        return box_blocks
+
+    def _apply_region_edit(self, block_changes): # set_blocks plus keeping door/pokeball/foxfox entities in sync
+        for block_pos, _ in block_changes:
+            self.vworld.set_special_entity(block_pos, None)
+        blocks_set = self.set_blocks(block_changes)
+        special_blocks = {block_pos: block_value for block_pos, block_value in block_changes
+                          if isinstance(block_value, dict) or block_value in (DOOR, POKEBALL, FOXFOX)}
+        self._recreate_special_entities_for_chunk(special_blocks)
+        return blocks_set
+
+    def fill_box(self, corner_a, corner_b, block_type): # block_type None clears the box -> blocks changed
+        (min_x, min_y, min_z), (max_x, max_y, max_z) = self._region_bounds(corner_a, corner_b)
+        existing_blocks = self.blocks_in_box(corner_a, corner_b)
+        if block_type is None:
+            return self._apply_region_edit([(block_pos, None) for block_pos in existing_blocks])
+        return self._apply_region_edit([((bx, by, bz), block_type)
+                                        for bx in range(min_x, max_x + 1) for by in range(min_y, max_y + 1) for bz in range(min_z, max_z + 1)
+                                        if existing_blocks.get((bx, by, bz)) != block_type])
+
+    def fill_sphere(self, center_pos, radius, block_type): # -> blocks changed
+        cx, cy, cz = floor(center_pos[0]), floor(center_pos[1]), floor(center_pos[2])
+        radius = int(radius)
+        existing_blocks = self.blocks_in_box((cx - radius, cy - radius, cz - radius), (cx + radius, cy + radius, cz + radius))
+        radius_sq = radius * radius
+        sphere_changes = []
+        for bx in range(cx - radius, cx + radius + 1):
+            for by in range(cy - radius, cy + radius + 1):
+                for bz in range(cz - radius, cz + radius + 1):
+                    if (bx - cx) ** 2 + (by - cy) ** 2 + (bz - cz) ** 2 > radius_sq:
+                        continue
+                    if existing_blocks.get((bx, by, bz)) != block_type:
+                        sphere_changes.append(((bx, by, bz), block_type))
+        return self._apply_region_edit(sphere_changes)
+
+    def replace_in_box(self, corner_a, corner_b, from_type, to_type): # None means air -> blocks changed
+        (min_x, min_y, min_z), (max_x, max_y, max_z) = self._region_bounds(corner_a, corner_b)
+        existing_blocks = self.blocks_in_box(corner_a, corner_b)
+        if from_type is None: # Air is every position without a block
+            return self._apply_region_edit([((bx, by, bz), to_type)
+                                            for bx in range(min_x, max_x + 1) for by in range(min_y, max_y + 1) for bz in range(min_z, max_z + 1)
+                                            if (bx, by, bz) not in existing_blocks])
+        return self._apply_region_edit([(block_pos, to_type) for block_pos, block_value in existing_blocks.items()
+                                        if (block_value.get('type') if isinstance(block_value, dict) else block_value) == from_type])
+
+    def copy_box(self, corner_a, corner_b): # -> clipboard {"size": (sx, sy, sz), "blocks": {relative pos: block}}
+        min_corner, max_corner = self._region_bounds(corner_a, corner_b)
+        return {
+            "size": tuple(max_corner[i] - min_corner[i] + 1 for i in range(3)),
+            "blocks": {(bx - min_corner[0], by - min_corner[1], bz - min_corner[2]): dict(block_value) if isinstance(block_value, dict) else block_value
+                       for (bx, by, bz), block_value in self.blocks_in_box(min_corner, max_corner).items()},
+        }
 
-    def get_block(self, world_pos_get):
-        return self.vworld.get_block(world_pos_get)
+    def paste_blocks(self, clipboard, origin_pos, include_air=True): # Clipboard's min corner goes to origin_pos -> blocks changed
+        ox, oy, oz = floor(origin_pos[0]), floor(origin_pos[1]), floor(origin_pos[2])
+        size_x, size_y, size_z = clipboard["size"]
+        paste_changes = {(ox + rx, oy + ry, oz + rz): dict(block_value) if isinstance(block_value, dict) else block_value
+                         for (rx, ry, rz), block_value in clipboard["blocks"].items()}
+        if include_air: # Positions that were air in the copy become air here too
+            for block_pos in self.blocks_in_box((ox, oy, oz), (ox + size_x - 1, oy + size_y - 1, oz + size_z - 1)):
+                paste_changes.setdefault(block_pos, None)
+        return self._apply_region_edit(list(paste_changes.items()))
 
 
 #############################################
@@ -2275,7 +3052,14 @@ class World: # High-level game world manager
 current_save_name = "my_world.json" # Default save name
 CHUNK_SIZE = 16 # Default chunk dimensions (can be changed by New Game menu)
 WORLD_SIZE = 4  # Default world radius in chunks for non-streaming (can be changed)
-BIOME_NOISE_FREQUENCY = 0.008 # Moved here to be global
+WORLD_SEED = DEFAULT_WORLD_SEED # Seed for all terrain generation (set by New Game menu / loaded from save)
+DEFAULT_SAVE_FORMAT = "delta" # New worlds only save player edits; loaded worlds keep the format they were saved in
+DEFAULT_SAVE_STORAGE = "region" # New worlds keep chunks in region files next to the .json (see worldstore.py)
+DEFAULT_REGION_COMPRESSION = "zlib" # "none", "zlib" or "lzma" for region payloads written by this world
+AUTOSAVE_INTERVAL_SECONDS = 120 # Dirty chunks are checkpointed this often (edits in between live in the journal)
+STREAMING_LOAD_CHUNK_THRESHOLD = 400 # Worlds that would build more chunks than this up front are streamed instead
+MAX_REGION_EDIT_BLOCKS = 1000000 # Largest fill/replace/clone box (blocks) accepted in one edit
+DEFAULT_SEA_LEVEL = WATER_LEVEL # New worlds: air up to this y above low terrain is (implicit) sea water
 
 #############################################
 # New Helper: Find Safe Spawn Height
@@ -2293,6 +3077,15 @@ def find_safe_spawn_height(world_to_check, x_coord_spawn, z_coord_spawn):
     return 25 # Fallback spawn height if no suitable ground found
 
 
+#############################################
+# New Helper: Quit Game
+#############################################
+def quit_game(): # Every way out of the game goes through here, so the save files are closed properly
+    if world:
+        world.close_save_store()
+    application.quit()
+
+
 #############################################
 # Menus: New Game, Start, Load, Save (Class definitions from before, ensure they use globals correctly)
 #############################################
@@ -2316,14 +3109,19 @@ class NewGameMenu(Entity):
         # World Name
         Text(parent=self.panel, text='World Name:', x=-0.4, y=y_offset_ngm, origin=(-0.5,0))
         self.world_name_input = InputField(parent=self.panel, x=0.2, y=y_offset_ngm, default_value="My 자동 생성 World")
+        y_offset_ngm -= 0.15
+        # World Seed (blank = random, text is hashed)
+        Text(parent=self.panel, text='Seed (blank = random):', x=-0.4, y=y_offset_ngm, origin=(-0.5,0))
+        self.world_seed_input = InputField(parent=self.panel, x=0.2, y=y_offset_ngm, default_value="")
 
 
-        y_offset_ngm -= 0.2
+        y_offset_ngm -= 0.12
         Button(parent=self.panel, text='Create World', y=y_offset_ngm -0.05, scale=(0.4,0.1), color=color.azure, on_click=self.action_start_new_game)
-        Button(parent=self.panel, text='Back to Main Menu', y=y_offset_ngm - 0.18, scale=(0.4,0.08), on_click=self.action_go_back)
+        Button(parent=self.panel, text='Back to Main Menu', y=y_offset_ngm - 0.15, scale=(0.4,0.08), on_click=self.action_go_back)
 
     def action_start_new_game(self):
-        global CHUNK_SIZE, WORLD_SIZE, current_save_name
+        global CHUNK_SIZE, WORLD_SIZE, WORLD_SEED, current_save_name
+        WORLD_SEED = seed_from_text(self.world_seed_input.text)
         try:
             cs = int(self.chunk_size_input.text)
             CHUNK_SIZE = max(8, min(cs, 32)) # Clamp chunksize e.g. 8-32
@@ -2364,7 +3162,7 @@ class StartMenu(Entity):
         menu_button_spacing = -0.12
         Button(parent=self, text='New Game', y=menu_button_y_start, scale=(0.3,0.1), color=color.azure, on_click=self.action_new_game)
         Button(parent=self, text='Load Game', y=menu_button_y_start + menu_button_spacing, scale=(0.3,0.1), color=color.azure, on_click=self.action_load_game)
-        Button(parent=self, text='Quit Game', y=menu_button_y_start + 2*menu_button_spacing, scale=(0.3,0.1), color=color.red, on_click=application.quit)
+        Button(parent=self, text='Quit Game', y=menu_button_y_start + 2*menu_button_spacing, scale=(0.3,0.1), color=color.red, on_click=quit_game)
 
     def action_new_game(self):
         destroy(self)
@@ -2382,7 +3180,15 @@ class LoadGameMenu(Entity):
         Text(parent=self.panel, text='Load Saved World', y=0.45, origin=(0,0))
 
         save_files_path = 'save'
-        json_save_files = [f for f in os.listdir(save_files_path) if f.endswith('.json')] if os.path.exists(save_files_path) else []
+        json_save_files = [f for f in os.listdir(save_files_path) if f.endswith('.json') and not f.endswith('.meta.json')] \
+            if os.path.exists(save_files_path) else []
+        self.world_metas = {} # filename -> metadata from save/<name>.meta.json (None if the save is unreadable)
+        for filename_meta in json_save_files:
+            try:
+                self.world_metas[filename_meta] = load_world_meta(os.path.join(save_files_path, filename_meta))
+            except (OSError, ValueError) as e_meta:
+                print(f"[LOAD MENU] Could not read '{filename_meta}': {e_meta}")
+                self.world_metas[filename_meta] = None
         
         y_button_offset_load = 0.3
         if not json_save_files:
@@ -2390,7 +3196,17 @@ class LoadGameMenu(Entity):
         else:
             for idx, filename_load in enumerate(json_save_files):
                 if idx >= 5: Text(parent=self.panel, text=f"...and {len(json_save_files)-5} more", y=y_button_offset_load - 0.05); break # Limit displayed files
-                btn_load = Button(parent=self.panel, text=filename_load, y=y_button_offset_load, scale_x=0.9, scale_y=0.12)
+                world_meta_load = self.world_metas.get(filename_load)
+                button_text_load = filename_load
+                if world_meta_load:
+                    play_minutes = int(world_meta_load.get("play_time_seconds", 0) // 60)
+                    button_text_load += f"   {world_meta_load.get('chunk_count', 0)} chunks, {play_minutes // 60}h{play_minutes % 60:02d}m played"
+                btn_load = Button(parent=self.panel, text=button_text_load, y=y_button_offset_load, scale_x=0.9, scale_y=0.12)
+                if world_meta_load and world_meta_load.get("thumbnail"):
+                    thumbnail_file_path = os.path.join(save_files_path, world_meta_load["thumbnail"])
+                    if os.path.exists(thumbnail_file_path):
+                        Entity(parent=btn_load, model='quad', texture=Texture(thumbnail_file_path),
+                               scale=(0.1 / 0.9, 0.9), x=-0.44, z=-0.1) # Square icon at the left end of the button
                 btn_load.on_click = Func(self.action_load_selected_world, filename_load) # Use Func for arguments
                 y_button_offset_load -= 0.15
         
@@ -2400,14 +3216,16 @@ class LoadGameMenu(Entity):
         global current_save_name
         current_save_name = filename_to_load_selected
         
-        # Heuristic for streaming: if file size > 500KB, enable streaming.
-        # This is a placeholder, could be more sophisticated (e.g. read metadata from JSON)
+        # Stream when a full load would build too many chunks up front: every stored chunk, and for
+        # delta saves also every generated chunk within the world radius.
         use_streaming_load = False
-        try:
-            file_path_load_check = os.path.join('save', filename_to_load_selected)
-            if os.path.exists(file_path_load_check) and os.path.getsize(file_path_load_check) > 500 * 1024:
-                use_streaming_load = True
-        except OSError: pass # Ignore if file check fails
+        world_meta_selected = self.world_metas.get(filename_to_load_selected)
+        if world_meta_selected:
+            chunks_to_build = world_meta_selected.get("chunk_count", 0)
+            if world_meta_selected.get("save_format") == "delta":
+                radius_chunks = world_meta_selected.get("world_radius_chunks") or WORLD_SIZE
+                chunks_to_build = max(chunks_to_build, (2 * radius_chunks + 1) ** 2)
+            use_streaming_load = chunks_to_build > STREAMING_LOAD_CHUNK_THRESHOLD
 
         destroy(self)
         create_game(filename=filename_to_load_selected, force_new_world=False, use_streaming_mode=use_streaming_load)
@@ -2485,8 +3303,15 @@ class GameMenu(Entity): # In-game pause menu
         global current_save_name
         current_save_name = final_filename_to_save
         if world:
-            world.save_world()
-        application.quit()
+            world.save_world(on_complete=self.quit_after_save) # Game keeps running until the save is on disk
+        else:
+            quit_game()
+
+    def quit_after_save(self, save_succeeded):
+        if save_succeeded:
+            quit_game()
+        elif save_status_text:
+            save_status_text.text = "Save failed! See console. Not quitting."
 
 
 #############################################
@@ -2516,11 +3341,12 @@ inventory_ui = None
 sky = None # Sky entity
 # UI Text elements
 vox_time_text, local_time_text, song_text, coords_text, compass_text = None,None,None,None,None
+save_status_text = None # "Saving... N%" while a background save runs
 last_chunk_update_time = 0 # For streaming mode chunk update throttling
 
 def create_game(filename=None, force_new_world=False, use_streaming_mode=False):
     global world, player, game_menu, inventory_ui, sky
-    global vox_time_text, local_time_text, song_text, coords_text, compass_text
+    global vox_time_text, local_time_text, song_text, coords_text, compass_text, save_status_text
     global start_time, CHUNK_SIZE, WORLD_SIZE # Make sure these are global
 
     # Clear previous UI (e.g., from main menu)
@@ -2529,11 +3355,16 @@ def create_game(filename=None, force_new_world=False, use_streaming_mode=False):
             destroy(child_ui)
 
     print(f"[GAME INIT] Creating world. File: {filename}, New: {force_new_world}, Stream: {use_streaming_mode}")
-    print(f"[SETTINGS] ChunkSize: {CHUNK_SIZE}, WorldRadius: {WORLD_SIZE} (for non-streamed generation)")
+    print(f"[SETTINGS] ChunkSize: {CHUNK_SIZE}, WorldRadius: {WORLD_SIZE} (for non-streamed generation), Seed: {WORLD_SEED}")
 
     start_time = time.time() # Reset day cycle timer for new game
+    water_simulator.clear() # Water still spreading in the previous world
+    pickup_manager.clear() # Pickups lying in the previous world
+    vegetation_manager.clear()
+    entity_scheduler.clear() # Doors and particles of the previous world must not keep ticking
 
     world = World(filename=filename, force_new_world=force_new_world, use_streaming_mode=use_streaming_mode)
+    world.vworld.block_events.subscribe(pickup_manager.blocks_changed) # Pickups resting on an edited block start falling
     player = CustomPlayer() # Create player instance
 
     spawn_x_player, spawn_z_player = 0.5, 0.5 # Try to spawn near center of a block
@@ -2562,6 +3393,7 @@ def create_game(filename=None, force_new_world=False, use_streaming_mode=False):
     song_text = Text(parent=camera.ui, position=window.top_right - Vec2(0.02,0.10), origin=(1,1), scale=text_scale_val,text="Song: Loading...")
     coords_text = Text(parent=camera.ui, position=window.top_left + Vec2(0.02,-0.02), origin=(-1,1), scale=text_scale_val)
     compass_text = Text(parent=camera.ui, position=window.top_left + Vec2(0.02,-0.06), origin=(-1,1), scale=text_scale_val)
+    save_status_text = Text(parent=camera.ui, position=window.bottom_left + Vec2(0.02,0.02), origin=(-1,-1), scale=text_scale_val, text="")
 
     mouse.locked = True
     mouse.visible = False
@@ -2584,7 +3416,16 @@ def update():
 
     update_shader_uniforms()
     update_music()
+    world.tick_persistence() # Finish background saves, flush the edit journal, autosave dirty chunks
+    if save_status_text and world.save_thread is not None:
+        save_status_text.text = world.save_status_message()
+    elif save_status_text and save_status_text.text.startswith("Saving"):
+        save_status_text.text = ""
     process_water_spread() 
+    pickup_manager.update() # Falling pickups, plus collection and bobbing near the player
+    entity_scheduler.update() # Swinging doors and other entities that are currently active
+    special_model_batcher.update() # Rebuild pokeball/foxfox batches of chunks whose entities changed
+    vegetation_manager.update(world.vworld, player.position) # Plant batches with distance density falloff
     spawn_bubbles_update() # Handle bubble spawning if player is underwater
 
     if world.streaming_mode:
@@ -2689,15 +3530,15 @@ def place_block(block_type_place):
     if block_type_place == DOOR:
         # Ensure space for door (e.g., two blocks high)
         if world.get_block((tx,ty+1,tz)) is None or world.get_block((tx,ty+1,tz)) == 'water':
-            door_obj = Door((tx,ty,tz)); door_entities[(tx,ty,tz)] = door_obj
+            world.set_special_entity((tx,ty,tz), Door((tx,ty,tz)))
             world.set_block((tx,ty,tz), {"type": DOOR, "bottom": True, "rotation": player.rotation_y}) # Mark bottom part
             world.set_block((tx,ty+1,tz), {"type": DOOR, "bottom": False, "rotation": player.rotation_y}) # Mark top part
         else: return # Not enough space
     elif block_type_place == POKEBALL:
-        pb_obj = PokeballEntity((tx,ty,tz)); pokeball_entities[(tx,ty,tz)] = pb_obj
+        world.set_special_entity((tx,ty,tz), PokeballEntity((tx,ty,tz)))
         world.set_block((tx,ty,tz), {"type": POKEBALL, "rotation": player.rotation_y})
     elif block_type_place == FOXFOX:
-        ff_obj = FoxfoxEntity((tx,ty,tz)); foxfox_entities[(tx,ty,tz)] = ff_obj
+        world.set_special_entity((tx,ty,tz), FoxfoxEntity((tx,ty,tz)))
         world.set_block((tx,ty,tz), {"type": FOXFOX, "rotation": player.rotation_y})
     elif block_type_place == PARTICLE_BLOCK: # This is a regular block type now
         world.set_block((tx,ty,tz), PARTICLE_BLOCK)
@@ -2745,14 +3586,11 @@ def remove_block():
         other_part_y = ry + 1 if is_bottom_part else ry -1
         world.set_block((rx,ry,rz), None)
         world.set_block((rx,other_part_y,rz), None) # Remove other part
-        if (rx,ry,rz) in door_entities: destroy(door_entities.pop((rx,ry,rz)))
-        if (rx,other_part_y,rz) in door_entities: destroy(door_entities.pop((rx,other_part_y,rz))) # Also remove other entity if exists
+        world.set_special_entity((rx,ry,rz), None)
+        world.set_special_entity((rx,other_part_y,rz), None) # Also remove other entity if exists
     elif actual_block_type_removed in [POKEBALL, FOXFOX, PARTICLE_BLOCK]: # Other special entities/blocks
         world.set_block((rx,ry,rz), None) # Remove from world data
-        if actual_block_type_removed == POKEBALL and (rx,ry,rz) in pokeball_entities:
-            destroy(pokeball_entities.pop((rx,ry,rz)))
-        elif actual_block_type_removed == FOXFOX and (rx,ry,rz) in foxfox_entities:
-            destroy(foxfox_entities.pop((rx,ry,rz)))
+        world.set_special_entity((rx,ry,rz), None) # Destroys the pokeball/foxfox entity if there is one
         # For PARTICLE_BLOCK, if it had an associated effect entity in particleblock_entities:
         # if actual_block_type_removed == PARTICLE_BLOCK and (rx,ry,rz) in particleblock_entities:
         #    destroy(particleblock_entities.pop((rx,ry,rz)))
@@ -2760,8 +3598,7 @@ def remove_block():
         world.set_block((rx,ry,rz), None)
 
     if dig_sound: dig_sound.play()
-    for _ in range(random.randint(3, 6)): # Fewer debris
-        Debris((rx,ry,rz), actual_block_type_removed) # Pass the actual type string
+    spawn_debris((rx,ry,rz), actual_block_type_removed, random.randint(3, 6)) # Pooled; Debris entities only without NumPy
     
     if actual_block_type_removed in collectible_blocks:
         spawn_pickup(actual_block_type_removed, (rx,ry,rz))
@@ -2774,7 +3611,7 @@ def input(key_input): # Renamed arg to avoid conflict with 'key' variable in loo
     global command_mode, command_input_field, free_cam_mode # Globals for state
     
     if not player or not inventory_ui or not game_menu: # Core components not ready
-        if key_input == 'escape': application.quit() # Basic quit if game not loaded
+        if key_input == 'escape': quit_game() # Basic quit if game not loaded
         return
 
     # --- UI Mode Checks (Inventory, Game Menu, Command Input) ---
@@ -2842,8 +3679,12 @@ def input(key_input): # Renamed arg to avoid conflict with 'key' variable in loo
             block_val_interact = world.get_block((pix,piy,piz))
             block_type_actual_interact = block_val_interact.get("type") if isinstance(block_val_interact, dict) else block_val_interact
 
-            if block_type_actual_interact == DOOR and (pix,piy,piz) in door_entities:
-                door_entities[(pix,piy,piz)].toggle()
+            door_bottom_pos = (pix,piy,piz)
+            if isinstance(block_val_interact, dict) and block_val_interact.get("bottom") is False:
+                door_bottom_pos = (pix,piy-1,piz) # Looking at the top half
+            door_interact = world.get_special_entity(door_bottom_pos) if block_type_actual_interact == DOOR else None
+            if isinstance(door_interact, Door):
+                door_interact.toggle()
             # Add other 'e' interactions for other blocks here (e.g. Pokeball, FoxFox sounds)
             elif block_type_actual_interact == POKEBALL: play_sound_once(pokeball_sound)
             elif block_type_actual_interact == FOXFOX: play_sound_once(foxfox_sound)
@@ -2894,10 +3735,59 @@ def process_command(cmd_full_str): # Command processing logic
             for _ in range(count_give): add_item_to_inventory(item_name_give)
             print(f"Gave {count_give} of {item_name_give}.")
         else: print(f"Unknown item: {item_name_give}")
+    elif command_verb in ("fill", "replace", "clone") and world:
+        run_region_command(command_verb, args_cmd)
     else:
         print(f"Unknown command or incorrect arguments: '{cmd_full_str}'")
 
 
+def parse_command_coords(coord_args): # ["10", "~", "~-2"] -> (x, y, z); "~" is relative to the player
+    player_pos = (player.x, player.y, player.z) if player else (0, 0, 0)
+    parsed_coords = []
+    for axis, coord_text in enumerate(coord_args):
+        if coord_text.startswith("~"):
+            parsed_coords.append(floor(player_pos[axis]) + (int(coord_text[1:]) if len(coord_text) > 1 else 0))
+        else:
+            parsed_coords.append(int(coord_text))
+    return tuple(parsed_coords)
+
+
+def parse_command_block(block_name): # -> block type, None for "air"; raises ValueError if unknown
+    if block_name == "air":
+        return None
+    if block_name in texture_mapping or block_name in [DOOR, POKEBALL, FOXFOX, PARTICLE_BLOCK]:
+        return block_name
+    raise ValueError(f"unknown block '{block_name}'")
+
+
+def run_region_command(command_verb, args_cmd):
+    # fill x1 y1 z1 x2 y2 z2 <block|air>      fill sphere x y z radius <block|air>
+    # replace x1 y1 z1 x2 y2 z2 <from> <to>   clone x1 y1 z1 x2 y2 z2 x y z [masked]
+    try:
+        started_at = time.time()
+        if command_verb == "fill" and len(args_cmd) == 6 and args_cmd[0] == "sphere":
+            blocks_changed = world.fill_sphere(parse_command_coords(args_cmd[1:4]), int(args_cmd[4]), parse_command_block(args_cmd[5]))
+        elif command_verb == "fill" and len(args_cmd) == 7:
+            blocks_changed = world.fill_box(parse_command_coords(args_cmd[0:3]), parse_command_coords(args_cmd[3:6]),
+                                            parse_command_block(args_cmd[6]))
+        elif command_verb == "replace" and len(args_cmd) == 8:
+            blocks_changed = world.replace_in_box(parse_command_coords(args_cmd[0:3]), parse_command_coords(args_cmd[3:6]),
+                                                  parse_command_block(args_cmd[6]), parse_command_block(args_cmd[7]))
+        elif command_verb == "clone" and len(args_cmd) in (9, 10):
+            clipboard = world.copy_box(parse_command_coords(args_cmd[0:3]), parse_command_coords(args_cmd[3:6]))
+            # "masked" keeps what is already at the destination where the copied region was air
+            blocks_changed = world.paste_blocks(clipboard, parse_command_coords(args_cmd[6:9]),
+                                                include_air=not (len(args_cmd) == 10 and args_cmd[9] == "masked"))
+        else:
+            print(f"Usage: fill x1 y1 z1 x2 y2 z2 <block> | fill sphere x y z radius <block> | "
+                  f"replace x1 y1 z1 x2 y2 z2 <from> <to> | clone x1 y1 z1 x2 y2 z2 x y z [masked]")
+            return
+    except ValueError as e_region:
+        print(f"[{command_verb.upper()}] {e_region}")
+        return
+    print(f"[{command_verb.upper()}] {blocks_changed} blocks changed in {(time.time() - started_at) * 1000:.0f} ms.")
+
+
 #############################################
 # 24) Launch the Game
 #############################################
@@ -0,0 +1,30 @@
+import os
+import random
+
+from worldstore import RegionStore, REGION_COMPACT_MIN_WASTED_BYTES, region_coords_for_chunk
+
+CHUNK_SIZE = 16
+REWRITE_COUNT = 400
+
+
+def _chunk_blocks(chunk_pos, variant): # Random enough not to compress away, so every write takes real space
+    block_rng = random.Random(variant)
+    return {(chunk_pos[0] + x, y, chunk_pos[1] + z): block_rng.choice(('stone', 'dirt', 'grass', 'sand', 'gravel', 'water'))
+            for x in range(CHUNK_SIZE) for z in range(CHUNK_SIZE) for y in range(-8, 8)}
+
+
+def test_rewriting_a_chunk_keeps_the_region_file_bounded(tmp_path):
+    chunk_pos = (0, 0)
+    rx, rz, _ = region_coords_for_chunk(chunk_pos, CHUNK_SIZE)
+    region_path = os.path.join(str(tmp_path), f"r.{rx}.{rz}.vxr")
+    region_store = RegionStore(str(tmp_path), CHUNK_SIZE)
+    sizes = []
+    for variant in range(REWRITE_COUNT):
+        region_store.write_chunk(chunk_pos, _chunk_blocks(chunk_pos, variant))
+        sizes.append(os.path.getsize(region_path))
+    assert region_store.read_chunk(chunk_pos) == _chunk_blocks(chunk_pos, REWRITE_COUNT - 1)
+    # Without compaction the file would hold every version; with it, dead space never gets far past the minimum
+    assert max(sizes) < REGION_COMPACT_MIN_WASTED_BYTES + 64 * 1024
+    region_store.close()
+    assert os.path.getsize(region_path) < sizes[0] + 64 * 1024 # Closing drops the remaining dead space
+    assert RegionStore(str(tmp_path), CHUNK_SIZE).read_chunk(chunk_pos) == _chunk_blocks(chunk_pos, REWRITE_COUNT - 1)
@@ -0,0 +1,514 @@
+#############################################
+# World Generation (pure Python, no Ursina)
+#############################################
+# Everything that turns (world seed, chunk position) into blocks lives here so it can run
+# outside the game process (worker processes, command-line tools) and give the exact same
+# result every time. Nothing in this module may touch the global `random` state, `hash()`
+# of a string (salted per process) or any Ursina object.
+import hashlib
+import random
+from math import floor
+
+from noise import pnoise2, pnoise3
+
+GENERATOR_VERSION = 3    # Bump whenever a change below alters generated blocks (invalidates caches/deltas)
+# v2: sea water is no longer generated as blocks; the game reads air at or below the sea level
+# (above the column's terrain) as water. add_explicit_sea_water() rebuilds v1 output for old saves.
+# v3: tree canopies crossing a chunk border go into the neighbouring chunk instead of being stored
+# (out of bounds) in the chunk of the trunk.
+DEFAULT_WORLD_SEED = 42  # Seed every world used before seeds were configurable
+MAX_WORLD_SEED = 2**31 - 1
+
+MAX_TERRAIN_HEIGHT = 30  # Max height of terrain generation from y=0
+WATER_LEVEL = 10         # Y-level for water surface
+WORLD_BOTTOM_Y = -MAX_TERRAIN_HEIGHT // 2 # Terrain goes down to -15 if MAX_TERRAIN_HEIGHT is 30
+BIOME_NOISE_FREQUENCY = 0.008 # Controls the size of biomes
+LAZY_SHELL_DEPTH = 6     # Top blocks of a column that caves never reach (see carve_caves); always generated
+
+# The noise library indexes a fixed 512 entry permutation table with `base` added on, so large
+# bases read past the table. Only a small slice of the seed goes into `base`; the rest moves the
+# sampling window around the noise plane instead (see TerrainGenerator.__init__).
+NOISE_BASE_RANGE = 64
+NOISE_OFFSET_RANGE = 65536 # Max +/- offset in blocks applied to x/z noise coordinates
+
+
+def seed_from_text(seed_text):
+    # Numbers are used as-is, anything else is hashed (stable across processes), blank -> random seed.
+    seed_text = seed_text.strip()
+    if not seed_text:
+        return random.SystemRandom().randint(0, MAX_WORLD_SEED)
+    try:
+        return int(seed_text) % (MAX_WORLD_SEED + 1)
+    except ValueError:
+        return int.from_bytes(hashlib.sha256(seed_text.encode('utf-8')).digest()[:4], 'little') % (MAX_WORLD_SEED + 1)
+
+
+def chunk_rng(seed, chunk_pos, stage):
+    # Stable per-chunk RNG for one generation stage. Depends only on (seed, chunk, stage),
+    # never on generation order, process or PYTHONHASHSEED.
+    digest = hashlib.sha256(f"{seed}:{chunk_pos[0]}:{chunk_pos[1]}:{stage}".encode('ascii')).digest()
+    return random.Random(int.from_bytes(digest[:8], 'little'))
+
+
+def chunk_blocks_hash(blocks):
+    # Order independent fingerprint of a chunk's block dict, used by the golden-hash regression check.
+    hasher = hashlib.sha256()
+    for (bx, by, bz), block_value in sorted(blocks.items()):
+        hasher.update(f"{bx},{by},{bz}={block_value};".encode('utf-8'))
+    return hasher.hexdigest()
+
+
+class ColumnContext: # Per-column terrain/climate data, computed once and shared by every generation pass
+    __slots__ = ('height', 'temperature', 'humidity', 'biome', 'top_block', 'surface_block')
+
+    def __init__(self, height, temperature, humidity, biome, top_block, surface_block):
+        self.height = height               # Terrain column height (first air/water y above land)
+        self.temperature = temperature     # 0-1
+        self.humidity = humidity           # 0-1
+        self.biome = biome                 # "plains", "forest", "desert", "mountains", "beach"
+        self.top_block = top_block         # Block type at y = height - 1
+        self.surface_block = surface_block # Block type for the 3 layers under the top block
+
+    @property
+    def surface_y(self): # Y of the topmost land block
+        return self.height - 1
+
+
+def build_tree_template(trunk_height, canopy_radius):
+    # -> (trunk offsets, leaf offsets, crown offset) from the surface block under the trunk.
+    # Trunk blocks replace anything, leaves only fill air, the crown leaf above the trunk top always goes in.
+    trunk_offsets = tuple((0, y_trunk_offset, 0) for y_trunk_offset in range(1, trunk_height + 1))
+    leaf_offsets = []
+    for ly_offset in range(canopy_radius +1): # Iterate vertically for canopy height
+        for lx_offset in range(-canopy_radius, canopy_radius + 1):
+            for lz_offset in range(-canopy_radius, canopy_radius + 1):
+                # Simple sphere-like canopy shape, not replacing the trunk top
+                if lx_offset**2 + lz_offset**2 + (ly_offset - canopy_radius/2)**2 <= canopy_radius**2:
+                    if not (lx_offset == 0 and lz_offset == 0 and ly_offset == 0):
+                        leaf_offsets.append((lx_offset, trunk_height + ly_offset, lz_offset))
+    return trunk_offsets, tuple(leaf_offsets), (0, trunk_height + 1, 0)
+
+TREE_TEMPLATES = {(trunk_height, canopy_radius): build_tree_template(trunk_height, canopy_radius)
+                  for trunk_height in range(4, 8) for canopy_radius in (2, 3)} # Every size plan_trees can pick
+TREE_NEIGHBOR_OFFSETS = ((-1, -1), (-1, 0), (-1, 1), (0, -1), (0, 1), (1, -1), (1, 0), (1, 1)) # Fixed stamping order
+
+
+def stamp_tree(blocks, planned_tree, chunk_bounds=None):
+    # Writes one planned tree into blocks. chunk_bounds (min_x, max_x, min_z, max_z), max exclusive,
+    # clips it to one chunk; the rest belongs to the neighbouring chunks.
+    tree_x, surface_y, tree_z, trunk_height, canopy_radius, trunk_block, leaves_block = planned_tree
+    trunk_offsets, leaf_offsets, crown_offset = TREE_TEMPLATES[(trunk_height, canopy_radius)]
+    if chunk_bounds is None:
+        min_x, max_x, min_z, max_z = tree_x, tree_x + 1, tree_z, tree_z + 1
+        leaf_clip = False
+    else:
+        min_x, max_x, min_z, max_z = chunk_bounds
+        leaf_clip = True
+    trunk_inside = min_x <= tree_x < max_x and min_z <= tree_z < max_z
+    if trunk_inside:
+        for dx, dy, dz in trunk_offsets:
+            blocks[(tree_x + dx, surface_y + dy, tree_z + dz)] = trunk_block
+    for dx, dy, dz in leaf_offsets:
+        leaf_x, leaf_z = tree_x + dx, tree_z + dz
+        if leaf_clip and not (min_x <= leaf_x < max_x and min_z <= leaf_z < max_z): continue
+        leaf_pos = (leaf_x, surface_y + dy, leaf_z)
+        if leaf_pos not in blocks:
+            blocks[leaf_pos] = leaves_block
+    if trunk_inside:
+        blocks[(tree_x + crown_offset[0], surface_y + crown_offset[1], tree_z + crown_offset[2])] = leaves_block
+
+
+class TerrainGenerator:
+    def __init__(self, seed=DEFAULT_WORLD_SEED):
+        self.seed = seed
+        self.noise_base = seed % NOISE_BASE_RANGE
+        high_seed_bits = seed // NOISE_BASE_RANGE
+        if high_seed_bits == 0: # Small seeds (including the legacy 42) sample the noise exactly as before
+            self.offset_x, self.offset_z = 0, 0
+        else:
+            offset_rng = random.Random(high_seed_bits)
+            self.offset_x = offset_rng.randint(-NOISE_OFFSET_RANGE, NOISE_OFFSET_RANGE)
+            self.offset_z = offset_rng.randint(-NOISE_OFFSET_RANGE, NOISE_OFFSET_RANGE)
+
+    def terrain_height(self, x, z, max_terrain_height=MAX_TERRAIN_HEIGHT):
+        base_freq_height = 0.012
+        hill_freq_height = 0.04
+        detail_freq_height = 0.08
+        nx, nz = x + self.offset_x, z + self.offset_z
+        base = self.noise_base
+
+        # Multiple noise layers for more interesting height variation
+        base_noise = pnoise2(nx * base_freq_height, nz * base_freq_height, octaves=2, persistence=0.5, lacunarity=2.0, base=base)
+        hill_noise = pnoise2(nx * hill_freq_height, nz * hill_freq_height, octaves=3, persistence=0.4, lacunarity=2.0, base=base + 1)
+        detail_noise = pnoise2(nx * detail_freq_height, nz * detail_freq_height, octaves=4, persistence=0.3, lacunarity=2.0, base=base + 2)
+
+        # Combine noise layers with different weights (noise is -1 to 1, scale each to 0-1)
+        combined_noise = ( (base_noise + 1)/2 * 0.6 +    # Base terrain shape
+                           (hill_noise + 1)/2 * 0.3 +    # Hills and valleys
+                           (detail_noise + 1)/2 * 0.1 )  # Finer details
+
+        # Power > 1 flattens valleys and sharpens peaks
+        shaped_noise = combined_noise ** 1.2
+
+        # Height in blocks above y=0, at least 1 so there's always a ground layer
+        return max(1, floor(shaped_noise * max_terrain_height))
+
+    def column_context(self, chunk_pos, chunk_size, max_terrain_height=MAX_TERRAIN_HEIGHT, water_level=WATER_LEVEL):
+        # Returns {(wx, wz): ColumnContext} for every column of the chunk at chunk_pos.
+        # This is the ONLY place the height/temperature/humidity noise is sampled for a chunk.
+        base = self.noise_base
+        column_context = {}
+        for x_offset_col in range(chunk_size):
+            for z_offset_col in range(chunk_size):
+                wx = chunk_pos[0] + x_offset_col
+                wz = chunk_pos[1] + z_offset_col
+                nx, nz = wx + self.offset_x, wz + self.offset_z
+
+                column_height = self.terrain_height(wx, wz, max_terrain_height)
+                temp_val = (pnoise2(nx * BIOME_NOISE_FREQUENCY, nz * BIOME_NOISE_FREQUENCY, octaves=2, base=base + 10) + 1) / 2 # 0-1
+                humidity_val = (pnoise2(nx * BIOME_NOISE_FREQUENCY, nz * BIOME_NOISE_FREQUENCY, octaves=2, base=base + 20) + 1) / 2 # 0-1
+
+                # --- Biome Logic ---
+                if column_height > max_terrain_height * 0.65: # Mountainous terrain (high elevation)
+                    biome_name = "mountains"
+                    if temp_val < 0.35: # Cold high mountains -> Snow
+                        top_block, surface_block = "snow", "snow"
+                    else: # Rocky mountains
+                        top_block, surface_block = "stone", "stone"
+                # Desert (hot and dry, not too high)
+                elif temp_val > 0.7 and humidity_val < 0.3 and column_height <= max_terrain_height * 0.5:
+                    biome_name, top_block, surface_block = "desert", "sand", "sandstone"
+                # Forest (moderate temp, high humidity, not too high)
+                elif temp_val > 0.35 and temp_val < 0.75 and humidity_val > 0.55 and column_height <= max_terrain_height * 0.6:
+                    biome_name, top_block, surface_block = "forest", "grass", "dirt"
+                else: # Plains (default for moderate conditions)
+                    biome_name, top_block, surface_block = "plains", "grass", "dirt"
+
+                # Beach areas if land is near water level (beaches don't form on steep mountains or deserts)
+                if water_level - 1 < column_height <= water_level + 2 and biome_name not in ("mountains", "desert"):
+                    biome_name, top_block, surface_block = "beach", "sand", "sand"
+
+                column_context[(wx, wz)] = ColumnContext(column_height, temp_val, humidity_val,
+                                                         biome_name, top_block, surface_block)
+        return column_context
+
+    def generate_chunk(self, chunk_pos, chunk_size, column_context=None, column_context_for=None):
+        # Returns the block dict ((wx, wy, wz) -> type) of a freshly generated chunk.
+        # column_context_for(chunk_pos) may supply neighbouring chunks' column contexts (see place_trees).
+        if column_context is None:
+            column_context = self.column_context(chunk_pos, chunk_size)
+        blocks = {}
+        self.generate_columns(blocks, column_context)
+        self.place_trees(blocks, chunk_pos, chunk_size, column_context, column_context_for)
+        return blocks
+
+    def generate_columns(self, blocks, column_context, column_ranges=None):
+        # Terrain, caves and ores of every column, or only of the y slice [y_from, y_to) given per column by
+        # column_ranges ((wx, wz) -> (y_from, y_to)). Every cell depends only on its own position and column,
+        # so a column generated in several slices ends up exactly as one generated in one go.
+        for (wx, wz), column in column_context.items():
+            terrain_column_height = column.height
+            y_from, y_to = column_ranges[(wx, wz)] if column_ranges is not None else (WORLD_BOTTOM_Y, terrain_column_height)
+
+            # --- Block Placement Loop (from world bottom up to terrain_column_height) ---
+            for y_current in range(max(y_from, WORLD_BOTTOM_Y), min(y_to, terrain_column_height)):
+                if y_current == terrain_column_height - 1: # Topmost block of the land
+                    blocks[(wx, y_current, wz)] = column.top_block
+                elif y_current >= terrain_column_height - 4: # Surface layer (3 blocks below top)
+                    blocks[(wx, y_current, wz)] = column.surface_block
+                else: # Deeper underground
+                    blocks[(wx, y_current, wz)] = "stone"
+
+            # Sea water is implicit (see sea_floor_heights); only the shore is shaped here.
+            # Ensure the block just below water surface (if it's land) is sand on beaches
+            if column.biome == "beach" and terrain_column_height == WATER_LEVEL and y_from <= WATER_LEVEL - 1 < y_to:
+                blocks[(wx, WATER_LEVEL - 1, wz)] = "sand"
+
+        self.carve_caves(blocks, column_context, column_ranges)
+        self.place_ores(blocks, column_context, column_ranges)
+
+    def shell_floors(self, chunk_pos, chunk_size, column_context): # -> {(wx, wz): lowest y of the column's shell}
+        # The shell is everything that can border open air without anything being dug: the cave-free top
+        # LAZY_SHELL_DEPTH blocks of a column and, on slopes, the side down to the lowest neighbouring surface.
+        shell_floors = {}
+        for (wx, wz), column in column_context.items():
+            shell_floor_y = column.height - LAZY_SHELL_DEPTH
+            for offset_x, offset_z in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+                neighbor_column = column_context.get((wx + offset_x, wz + offset_z))
+                if neighbor_column is not None:
+                    neighbor_height = neighbor_column.height
+                else: # Neighbour lies in the next chunk
+                    neighbor_height = self.terrain_height(wx + offset_x, wz + offset_z)
+                shell_floor_y = min(shell_floor_y, neighbor_height)
+            shell_floors[(wx, wz)] = max(WORLD_BOTTOM_Y, shell_floor_y)
+        return shell_floors
+
+    def generate_chunk_shell(self, chunk_pos, chunk_size, column_context=None, column_context_for=None):
+        # Lazy counterpart of generate_chunk: returns (blocks, shell_floors) with only the shell of every column
+        # generated (see shell_floors). The rest is added later by generate_chunk_deep. If a cave opens into
+        # the shell it can be seen from outside, so the whole chunk is generated and shell_floors is None.
+        if column_context is None:
+            column_context = self.column_context(chunk_pos, chunk_size)
+        blocks = {}
+        shell_floors = self.shell_floors(chunk_pos, chunk_size, column_context)
+        column_ranges = {column_pos: (shell_floors[column_pos], column.height)
+                         for column_pos, column in column_context.items()}
+        self.generate_columns(blocks, column_context, column_ranges)
+
+        shell_cell_count = sum(max(0, y_to - y_from) for y_from, y_to in column_ranges.values())
+        if len(blocks) < shell_cell_count: # Caves removed some shell cells
+            self.generate_chunk_deep(blocks, column_context, shell_floors)
+            shell_floors = None
+
+        self.place_trees(blocks, chunk_pos, chunk_size, column_context, column_context_for)
+        return blocks, shell_floors
+
+    def generate_chunk_deep(self, blocks, column_context, shell_floors):
+        # Adds every cell below the shell floors returned by generate_chunk_shell to blocks
+        column_ranges = {column_pos: (WORLD_BOTTOM_Y, shell_floors[column_pos]) for column_pos in column_context}
+        self.generate_columns(blocks, column_context, column_ranges)
+
+    def sea_floor_heights(self, column_context, sea_level=WATER_LEVEL): # -> {(wx, wz): lowest water y} of sea columns
+        # Air from a column's terrain height up to sea_level is sea water.
+        return {column_pos: column.height for column_pos, column in column_context.items() if column.height <= sea_level}
+
+    def carve_caves(self, blocks, column_context, column_ranges=None):
+        cave_noise_freq = 0.05 # Frequency of cave noise
+        cave_threshold_val = 0.75 # Noise values above this become caves
+        carvable_blocks = ('stone', 'dirt', 'sandstone', 'snow')
+
+        for (bx, bz), column in column_context.items():
+            nx, nz = bx + self.offset_x, bz + self.offset_z
+            y_from, y_to = column_ranges[(bx, bz)] if column_ranges is not None else (WORLD_BOTTOM_Y, column.height)
+            # Protect surface layers (don't carve within 5 blocks of the column's surface)
+            for by in range(max(y_from, WORLD_BOTTOM_Y), min(y_to, column.surface_y - 5)):
+                b_pos_key = (bx, by, bz)
+                if blocks.get(b_pos_key) not in carvable_blocks:
+                    continue
+
+                # 3D Perlin noise for cave generation
+                cave_noise_3d = pnoise3(nx * cave_noise_freq,
+                                        by * cave_noise_freq,
+                                        nz * cave_noise_freq,
+                                        octaves=2, base=self.noise_base + 30)
+
+                if abs(cave_noise_3d) > cave_threshold_val: # abs() creates more tunnel-like caves
+                    del blocks[b_pos_key] # Carve out block (set to air)
+
+    # Ore types, their rarity, depth, host block and a fixed per-ore noise offset
+    # (a fixed number, NOT hash(ore_name), which changes between Python processes).
+    ORE_TYPES_INFO = {
+        'gold': {'chance': 0.02, 'min_y': -25, 'max_y': 10, 'host': ('stone',), 'noise_seed_offset': 50},
+        'emerald': {'chance': 0.015, 'min_y': -30, 'max_y': 5, 'host': ('stone',), 'noise_seed_offset': 60},
+        'ruby': {'chance': 0.018, 'min_y': -28, 'max_y': 8, 'host': ('stone',), 'noise_seed_offset': 70},
+        # Add more ores: 'coal', 'iron', 'diamond' with different params
+    }
+
+    def place_ores(self, blocks, column_context, column_ranges=None):
+        ore_noise_freq = 0.08 # Frequency for ore vein noise
+        ore_types_info = self.ORE_TYPES_INFO
+
+        # Only the y band any ore can occupy needs visiting, and never above the column's land
+        ore_min_y = max(WORLD_BOTTOM_Y, min(ore_data['min_y'] for ore_data in ore_types_info.values()))
+        ore_max_y = max(ore_data['max_y'] for ore_data in ore_types_info.values())
+
+        for (bx_ore, bz_ore), column in column_context.items():
+            nx, nz = bx_ore + self.offset_x, bz_ore + self.offset_z
+            y_from, y_to = column_ranges[(bx_ore, bz_ore)] if column_ranges is not None else (ore_min_y, column.height)
+            for by_ore in range(max(y_from, ore_min_y), min(ore_max_y + 1, column.surface_y + 1, y_to)):
+                b_pos_ore = (bx_ore, by_ore, bz_ore)
+                current_block_for_ore = blocks.get(b_pos_ore)
+                if current_block_for_ore is None: # Air (carved by caves)
+                    continue
+
+                for ore_name, ore_data in ore_types_info.items():
+                    if current_block_for_ore in ore_data['host']: # Check if current block can host this ore
+                        if ore_data['min_y'] <= by_ore <= ore_data['max_y']: # Check depth
+                            # Use 3D Perlin noise to create ore veins/patches
+                            ore_vein_noise = pnoise3(nx * ore_noise_freq,
+                                                     by_ore * ore_noise_freq,
+                                                     nz * ore_noise_freq,
+                                                     octaves=1, base=self.noise_base + ore_data['noise_seed_offset'])
+
+                            if ore_vein_noise > (1.0 - ore_data['chance']): # Higher noise value = higher chance
+                                blocks[b_pos_ore] = ore_name # Replace block with ore
+                                break # Ore placed, no need to check other ore types for this block
+
+    def plan_trees(self, chunk_pos, column_context):
+        # Returns [(wx, surface_y, wz, trunk_height, canopy_radius, trunk_block, leaves_block)] in placement order.
+        # Only the chunk's own column context and the seed go in, so a neighbouring chunk can replay the plan
+        # to place the parts of these trees that grow across the border.
+        tree_rng = chunk_rng(self.seed, chunk_pos, 'trees') # Replaces the global random.random()/randint()
+        tree_seed_offset = self.noise_base + 200
+        tree_density_noise_freq = 0.06
+        tree_placement_noise_freq = 0.12
+
+        min_tree_spacing = 3
+        min_tree_spacing_sq = min_tree_spacing**2 # Squared distance for faster checks
+        spacing_grid = {} # (wx // spacing, wz // spacing) -> [(wx, wz)] of planned trees; only 3x3 cells are checked
+        planned_blocks = {} # Blocks of the trees planned so far, for the clear-space check
+        planned_trees = []
+
+        for (wx_t, wz_t), column in column_context.items():
+            # The top block is never carved, turned to ore or covered by another tree's leaves before this pass,
+            # so it comes straight from the column context (no block lookup or downward scan)
+            surface_y_tree = column.surface_y
+            block_on_surface_tree = column.top_block
+
+            # --- Biome check for tree suitability ---
+            temp_tree_raw = column.temperature
+            humidity_tree_raw = column.humidity
+
+            tree_can_grow_here = False
+            tree_type_to_place = 'treetrunkdark' # Default tree type
+            leaves_type_to_place = 'treeleaves'
+
+            if block_on_surface_tree == 'grass': # Trees mostly on grass
+                if temp_tree_raw > 0.4 and humidity_tree_raw > 0.55: # Forest-like conditions
+                    tree_can_grow_here = True
+                    # Could vary tree_type_to_place here based on more specific biome checks
+                elif 0.25 <= temp_tree_raw <= 0.75 and 0.25 <= humidity_tree_raw <= 0.7: # Plains
+                    if tree_rng.random() < 0.15: # Lower chance for trees in plains
+                         tree_can_grow_here = True
+            elif block_on_surface_tree == 'sand' and temp_tree_raw > 0.6 and humidity_tree_raw < 0.35: # Oasis in desert?
+                if tree_rng.random() < 0.05: # Very rare palm-like trees on sand
+                    tree_can_grow_here = True
+                    # tree_type_to_place = 'palmtrunk' # If palm tree assets existed
+                    # leaves_type_to_place = 'palmleaves'
+
+            if not tree_can_grow_here or surface_y_tree <= WATER_LEVEL: # No trees underwater
+                continue
+
+            # Check spacing from other trees
+            grid_x, grid_z = wx_t // min_tree_spacing, wz_t // min_tree_spacing
+            too_close_to_other_tree = False
+            for grid_dx in (-1, 0, 1):
+                for grid_dz in (-1, 0, 1):
+                    for prev_tx, prev_tz in spacing_grid.get((grid_x + grid_dx, grid_z + grid_dz), ()):
+                        if (wx_t - prev_tx)**2 + (wz_t - prev_tz)**2 < min_tree_spacing_sq:
+                            too_close_to_other_tree = True
+            if too_close_to_other_tree: continue
+
+            # Check for clear space above for tree height (e.g., 5-7 blocks)
+            required_clear_height = 6
+            clear_space_for_tree = True
+            for y_clear_offset in range(1, required_clear_height + 1):
+                if (wx_t, surface_y_tree + y_clear_offset, wz_t) in planned_blocks:
+                    clear_space_for_tree = False; break
+            if not clear_space_for_tree: continue
+
+            nx, nz = wx_t + self.offset_x, wz_t + self.offset_z
+            # Use Perlin noise for final tree placement chance
+            tree_placement_noise_val = (pnoise2(nx * tree_placement_noise_freq, nz * tree_placement_noise_freq, octaves=1, base=tree_seed_offset) +1)/2
+
+            # Modulate placement chance by a biome-density factor (e.g. from tree_density_noise)
+            density_mod_noise = (pnoise2(nx * tree_density_noise_freq, nz * tree_density_noise_freq, octaves=1, base=tree_seed_offset+5) +1)/2
+            final_tree_chance = tree_placement_noise_val * (density_mod_noise * 0.5 + 0.5) # Bias towards denser areas
+
+            if final_tree_chance > 0.65: # Adjust threshold for overall density
+                actual_trunk_height = tree_rng.randint(4, 7)
+                canopy_radius = tree_rng.randint(2,3) # Radius of leaves from trunk top
+                planned_tree = (wx_t, surface_y_tree, wz_t, actual_trunk_height, canopy_radius,
+                                tree_type_to_place, leaves_type_to_place)
+                stamp_tree(planned_blocks, planned_tree)
+                planned_trees.append(planned_tree)
+                spacing_grid.setdefault((grid_x, grid_z), []).append((wx_t, wz_t))
+        return planned_trees
+
+    def place_trees(self, blocks, chunk_pos, chunk_size, column_context, column_context_for=None):
+        # Stamps this chunk's trees, then the parts of the neighbouring chunks' trees that reach into it.
+        # column_context_for(chunk_pos) supplies neighbour column contexts (e.g. from a cache); by default
+        # they are sampled here. Either way the result does not depend on which chunks exist or load first.
+        chunk_bounds = (chunk_pos[0], chunk_pos[0] + chunk_size, chunk_pos[1], chunk_pos[1] + chunk_size)
+        for planned_tree in self.plan_trees(chunk_pos, column_context):
+            stamp_tree(blocks, planned_tree, chunk_bounds)
+        for neighbor_dx, neighbor_dz in TREE_NEIGHBOR_OFFSETS:
+            neighbor_pos = (chunk_pos[0] + neighbor_dx * chunk_size, chunk_pos[1] + neighbor_dz * chunk_size)
+            if column_context_for is not None:
+                neighbor_context = column_context_for(neighbor_pos)
+            else:
+                neighbor_context = self.column_context(neighbor_pos, chunk_size)
+            for planned_tree in self.plan_trees(neighbor_pos, neighbor_context):
+                tree_x, tree_z, tree_reach = planned_tree[0], planned_tree[2], planned_tree[4]
+                if (tree_x + tree_reach >= chunk_bounds[0] and tree_x - tree_reach < chunk_bounds[1] and
+                        tree_z + tree_reach >= chunk_bounds[2] and tree_z - tree_reach < chunk_bounds[3]):
+                    stamp_tree(blocks, planned_tree, chunk_bounds)
+
+    # Chance per grass column of a plant of each kind, by biome. Plants are decoration drawn by the game,
+    # not blocks, so changing this does not change generated chunks (no GENERATOR_VERSION bump).
+    VEGETATION_BIOME_CHANCES = {
+        "plains": (("grass", 0.25), ("redflower", 0.03)),
+        "forest": (("grass", 0.35), ("redflower", 0.05)),
+    }
+
+    def scatter_vegetation(self, chunk_pos, column_context):
+        # Returns [(x, y, z, kind, yaw_degrees, scale, rank)] for the chunk's plants, x/z jittered inside the
+        # block. y is the first cell above the column's land; the game skips plants whose ground was built on
+        # or dug away. rank (0-1) lets distant chunks keep only plants with rank below their density.
+        vegetation_rng = chunk_rng(self.seed, chunk_pos, 'vegetation')
+        plants = []
+        for (wx_v, wz_v), column in column_context.items():
+            biome_chances = self.VEGETATION_BIOME_CHANCES.get(column.biome)
+            if biome_chances is None or column.top_block != "grass" or column.surface_y <= WATER_LEVEL:
+                continue
+            roll_plant = vegetation_rng.random()
+            for plant_kind, plant_chance in biome_chances:
+                if roll_plant < plant_chance:
+                    plants.append((wx_v + vegetation_rng.uniform(0.2, 0.8), column.height, wz_v + vegetation_rng.uniform(0.2, 0.8),
+                                   plant_kind, vegetation_rng.uniform(0, 360), vegetation_rng.uniform(0.7, 1.0),
+                                   vegetation_rng.random()))
+                    break
+                roll_plant -= plant_chance
+        return plants
+
+
+def add_explicit_sea_water(blocks, sea_floor_heights, sea_level=WATER_LEVEL):
+    # Generator v1 stored every sea cell as a "water" block. Worlds saved before the sea level was
+    # implicit still expect that, so their chunks get the water blocks written back in.
+    for (wx, wz), sea_floor_y in sea_floor_heights.items():
+        for y_water_fill in range(sea_floor_y, sea_level + 1):
+            if (wx, y_water_fill, wz) not in blocks: # Caves, ores and trees never touched sea cells in v1
+                blocks[(wx, y_water_fill, wz)] = "water"
+    return blocks
+
+
+#############################################
+# Golden-hash regression check
+#############################################
+# chunk_blocks_hash() of a fixed set of chunks. If a change to this module alters any of these
+# on purpose, bump GENERATOR_VERSION and regenerate the table with `python worldgen.py --update`.
+GOLDEN_CHUNK_HASHES = { # (seed, chunk_size, chunk_x, chunk_z) -> sha256
+    (42, 16, 0, 0): '2fc39c936138531c6b65f84aa12bca13f34b2a628d839eb74d88848c1b559927',
+    (42, 16, 32, 96): '2208c821276ebcdba9e70253025f09c167bf2fbeb23394dd4a15067b63c99278',
+    (42, 16, -160, 128): 'd9bf8bbece021cf3d0e8753c5e5cf66b68e34f9140ba6fc75f40d310013fb0d0',
+    (42, 32, 64, 64): '62cb485b48c7afee9a5598dd3a61eaae12fd9a1e21d323a6319ee833c46ec3ef',
+    (987654321, 16, 0, 0): 'd9a0aaf30e8d1dabba36ce2a99090f5ce266c129b8bc071c459484b96c529150',
+    (987654321, 16, 320, -640): '32ed64bdcb375b45f187779765a9c8b476ed7d153eb68e65f6fd58872474c881',
+}
+
+
+def verify_golden_hashes():
+    # Returns a list of (key, expected, actual) for every chunk that no longer matches.
+    mismatches = []
+    for golden_key, expected_hash in GOLDEN_CHUNK_HASHES.items():
+        seed, chunk_size, cx, cz = golden_key
+        actual_hash = chunk_blocks_hash(TerrainGenerator(seed).generate_chunk((cx, cz), chunk_size))
+        if actual_hash != expected_hash:
+            mismatches.append((golden_key, expected_hash, actual_hash))
+    return mismatches
+
+
+if __name__ == '__main__':
+    import sys
+    if '--update' in sys.argv:
+        for golden_key in GOLDEN_CHUNK_HASHES:
+            seed, chunk_size, cx, cz = golden_key
+            print(f"    {golden_key}: '{chunk_blocks_hash(TerrainGenerator(seed).generate_chunk((cx, cz), chunk_size))}',")
+        sys.exit(0)
+    failed = verify_golden_hashes()
+    for golden_key, expected_hash, actual_hash in failed:
+        print(f"[WORLDGEN] MISMATCH seed={golden_key[0]} chunk_size={golden_key[1]} chunk=({golden_key[2]},{golden_key[3]}): "
+              f"expected {expected_hash[:16]}..., got {actual_hash[:16]}...")
+    print(f"[WORLDGEN] {len(GOLDEN_CHUNK_HASHES) - len(failed)}/{len(GOLDEN_CHUNK_HASHES)} golden chunks match "
+          f"(generator version {GENERATOR_VERSION}).")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,974 @@
+#############################################
+# World Storage (pure Python, no Ursina)
+#############################################
+# Compact binary encoding of a chunk's blocks plus the on-disk caches/files built on it.
+# Like worldgen.py this module must stay importable without Ursina so tools and worker
+# processes can use it.
+import json
+import lzma
+import mmap
+import os
+import re
+import struct
+import threading
+import zlib
+from collections import OrderedDict
+from math import gcd
+
+from worldgen import GENERATOR_VERSION
+
+try:
+    import numpy as np # Optional: vectorised chunk decoding
+except ImportError:
+    np = None
+
+#############################################
+# 1) Chunk Payload Codec (palette + packed indices)
+#############################################
+# Layout (little endian):
+#   header   <BBhHHI  version, flags, y_min, height, chunk_size, palette_json_len
+#   palette  JSON list of block values (strings, or dicts for doors/pokeballs/...), index 0 is air
+#   indices  height*chunk_size*chunk_size entries in (y, x, z) order, uint8 or uint16 (FLAG_WIDE_INDICES)
+#   extras   uint32 count + count * <iiiH (x, y, z, palette index) for blocks stored in this chunk
+#            but lying outside its x/z bounds (e.g. tree leaves hanging over the border), and for
+#            all blocks of sparse chunks (height 0)
+CHUNK_PAYLOAD_VERSION = 1
+FLAG_WIDE_INDICES = 0x01
+_PAYLOAD_HEADER = struct.Struct('<BBhHHI')
+_EXTRA_BLOCK = struct.Struct('<iiiH')
+
+
+def encode_chunk_blocks(blocks, chunk_pos, chunk_size, flags=0):
+    cx, cz = chunk_pos
+    palette = [None] # Index 0 = air
+    palette_index = {}
+    inside_blocks = []
+    extra_blocks = []
+
+    for (bx, by, bz), block_value in blocks.items():
+        # None is kept as its own palette entry: delta saves use it to mark a removed block
+        palette_key = block_value if not isinstance(block_value, dict) else json.dumps(block_value, sort_keys=True)
+        block_palette_idx = palette_index.get(palette_key)
+        if block_palette_idx is None:
+            block_palette_idx = palette_index[palette_key] = len(palette)
+            palette.append(block_value)
+        lx, lz = bx - cx, bz - cz
+        if 0 <= lx < chunk_size and 0 <= lz < chunk_size:
+            inside_blocks.append((by, lx, lz, block_palette_idx))
+        else:
+            extra_blocks.append((bx, by, bz, block_palette_idx))
+
+    y_min, height = 0, 0
+    if inside_blocks:
+        y_min = min(entry[0] for entry in inside_blocks)
+        height = max(entry[0] for entry in inside_blocks) - y_min + 1
+        if len(inside_blocks) * _EXTRA_BLOCK.size < height * chunk_size * chunk_size:
+            # Sparse chunk (e.g. a handful of player edits): a coordinate list is smaller than a dense grid
+            extra_blocks.extend((lx + cx, by, lz + cz, block_palette_idx) for by, lx, lz, block_palette_idx in inside_blocks)
+            inside_blocks = []
+            y_min, height = 0, 0
+
+    wide = len(palette) > 256
+    if wide:
+        flags |= FLAG_WIDE_INDICES
+    layer_size = chunk_size * chunk_size
+    indices = [0] * (height * layer_size)
+    for by, lx, lz, block_palette_idx in inside_blocks:
+        indices[(by - y_min) * layer_size + lx * chunk_size + lz] = block_palette_idx
+    packed_indices = struct.pack(f'<{len(indices)}H', *indices) if wide else bytes(indices)
+
+    palette_json = json.dumps(palette[1:], separators=(',', ':')).encode('utf-8')
+    parts = [_PAYLOAD_HEADER.pack(CHUNK_PAYLOAD_VERSION, flags, y_min, height, chunk_size, len(palette_json)),
+             palette_json, packed_indices, struct.pack('<I', len(extra_blocks))]
+    parts.extend(_EXTRA_BLOCK.pack(*extra) for extra in extra_blocks)
+    return b''.join(parts)
+
+
+def _unpack_payload_header(payload):
+    # Returns (flags, y_min, height, chunk_size, palette, indices_start).
+    version, flags, y_min, height, chunk_size, palette_len = _PAYLOAD_HEADER.unpack_from(payload, 0)
+    if version != CHUNK_PAYLOAD_VERSION:
+        raise ValueError(f"Unsupported chunk payload version {version}")
+    palette_start = _PAYLOAD_HEADER.size
+    palette = [None] + json.loads(bytes(payload[palette_start:palette_start + palette_len]).decode('utf-8'))
+    return flags, y_min, height, chunk_size, palette, palette_start + palette_len
+
+
+def decode_chunk_blocks(payload, chunk_pos):
+    # Inverse of encode_chunk_blocks: returns {(wx, wy, wz): block_value}. payload may be any
+    # buffer (bytes, or a memoryview into a memory-mapped region file).
+    flags, y_min, height, chunk_size, palette, indices_start = _unpack_payload_header(payload)
+    cx, cz = chunk_pos
+    layer_size = chunk_size * chunk_size
+    index_count = height * layer_size
+    index_width = 2 if flags & FLAG_WIDE_INDICES else 1
+    indices_end = indices_start + index_count * index_width
+
+    if np is not None:
+        blocks = _decode_dense_indices_np(payload, indices_start, index_count, index_width, cx, y_min, cz, chunk_size, palette)
+    else:
+        if index_width == 2:
+            indices = struct.unpack_from(f'<{index_count}H', payload, indices_start)
+        else:
+            indices = payload[indices_start:indices_end]
+        blocks = {}
+        for flat_idx, block_palette_idx in enumerate(indices):
+            if block_palette_idx:
+                ly, rem = divmod(flat_idx, layer_size)
+                lx, lz = divmod(rem, chunk_size)
+                block_value = palette[block_palette_idx]
+                blocks[(cx + lx, y_min + ly, cz + lz)] = block_value if not isinstance(block_value, dict) else dict(block_value)
+
+    (extra_count,) = struct.unpack_from('<I', payload, indices_end)
+    extras_start = indices_end + 4
+    for bx, by, bz, block_palette_idx in _EXTRA_BLOCK.iter_unpack(payload[extras_start:extras_start + extra_count * _EXTRA_BLOCK.size]):
+        block_value = palette[block_palette_idx]
+        blocks[(bx, by, bz)] = block_value if not isinstance(block_value, dict) else dict(block_value)
+    return blocks
+
+
+def _decode_dense_indices_np(payload, indices_start, index_count, index_width, cx, y_min, cz, chunk_size, palette):
+    # Same result as the pure Python loop, but the per-voxel work happens inside numpy and the
+    # dict/zip/map builtins: no Python bytecode runs per block.
+    if not index_count:
+        return {}
+    indices = np.frombuffer(payload, dtype='<u2' if index_width == 2 else np.uint8, count=index_count, offset=indices_start)
+    solid_flat = np.flatnonzero(indices)
+    solid_indices = indices[solid_flat]
+    del indices # Drop the view so a memory-mapped region can be remapped later
+    ly, rem = np.divmod(solid_flat, chunk_size * chunk_size)
+    lx, lz = np.divmod(rem, chunk_size)
+    blocks = dict(zip(zip((lx + cx).tolist(), (ly + y_min).tolist(), (lz + cz).tolist()),
+                      map(palette.__getitem__, solid_indices.tolist())))
+    dict_palette_idx = [palette_idx for palette_idx, block_value in enumerate(palette) if isinstance(block_value, dict)]
+    if dict_palette_idx: # Doors/pokeballs/...: every block gets its own dict, like the slow path
+        for dict_flat in solid_flat[np.isin(solid_indices, dict_palette_idx)].tolist():
+            dict_ly, dict_rem = divmod(dict_flat, chunk_size * chunk_size)
+            dict_lx, dict_lz = divmod(dict_rem, chunk_size)
+            dict_pos = (cx + dict_lx, y_min + dict_ly, cz + dict_lz)
+            blocks[dict_pos] = dict(blocks[dict_pos])
+    return blocks
+
+
+class DecodedChunkCache:
+    # Small LRU of decoded block dicts. Building a tuple-keyed dict costs a few ms per chunk no
+    # matter how the payload is stored; handing out a copy of an already decoded one costs tens
+    # of microseconds, which is what chunks revisited while walking back and forth need.
+    def __init__(self, limit=32):
+        self.limit = limit
+        self.entries = OrderedDict() # key -> (blocks, positions holding dict values)
+
+    def get(self, key): # -> private copy of the cached blocks, or None
+        cached_entry = self.entries.get(key)
+        if cached_entry is None:
+            return None
+        self.entries.move_to_end(key)
+        cached_blocks, dict_positions = cached_entry
+        blocks = dict(cached_blocks)
+        for dict_pos in dict_positions: # Special blocks may be mutated by their owner
+            blocks[dict_pos] = dict(blocks[dict_pos])
+        return blocks
+
+    def put(self, key, blocks): # Caches a copy; the caller keeps ownership of blocks
+        if self.limit <= 0:
+            return
+        dict_positions = tuple(pos for pos, block_value in blocks.items() if isinstance(block_value, dict))
+        cached_blocks = dict(blocks)
+        for dict_pos in dict_positions:
+            cached_blocks[dict_pos] = dict(cached_blocks[dict_pos])
+        self.entries[key] = (cached_blocks, dict_positions)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.limit:
+            self.entries.popitem(last=False)
+
+    def discard(self, key):
+        self.entries.pop(key, None)
+
+
+#############################################
+# 2) Generation Cache (pristine generated chunks on disk)
+#############################################
+# One small zlib-compressed file per generated chunk, keyed by (seed, generator version,
+# chunk size, chunk coordinate). The total size is capped; least recently used files
+# (by mtime, refreshed on every hit) are evicted first, which also clears out caches
+# of old generator versions and seeds nobody plays anymore.
+GENERATION_CACHE_DIR = os.path.join('save', 'gencache')
+GENERATION_CACHE_MAX_BYTES = 256 * 1024 * 1024
+_CACHE_FILE_MAGIC = b'VXGC'
+
+
+class GenerationCache:
+    def __init__(self, cache_dir=GENERATION_CACHE_DIR, max_bytes=GENERATION_CACHE_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.total_bytes = None # Computed on first store (scanning the folder is only needed to evict)
+        self.hits = 0
+        self.misses = 0
+        self.decoded = DecodedChunkCache()
+        self.lock = threading.RLock() # Guards the LRU and size bookkeeping; the game's save thread loads too
+
+    def _chunk_path(self, seed, chunk_pos, chunk_size):
+        return os.path.join(self.cache_dir, f"s{seed}_v{GENERATOR_VERSION}_c{chunk_size}",
+                            f"{chunk_pos[0]}_{chunk_pos[1]}.bin")
+
+    def has_chunk(self, seed, chunk_pos, chunk_size):
+        return os.path.exists(self._chunk_path(seed, chunk_pos, chunk_size))
+
+    def load(self, seed, chunk_pos, chunk_size):
+        with self.lock:
+            decoded_blocks = self.decoded.get((seed, chunk_size, chunk_pos))
+        if decoded_blocks is not None:
+            self.hits += 1
+            return decoded_blocks
+        cache_path = self._chunk_path(seed, chunk_pos, chunk_size)
+        try:
+            with open(cache_path, 'rb') as f_cache:
+                cached_data = f_cache.read()
+        except OSError:
+            self.misses += 1
+            return None
+        try:
+            if cached_data[:4] != _CACHE_FILE_MAGIC:
+                raise ValueError("bad magic")
+            blocks = decode_chunk_blocks(zlib.decompress(cached_data[4:]), chunk_pos)
+        except (ValueError, zlib.error, struct.error) as e_cache:
+            print(f"[GEN CACHE] Dropping corrupt cache entry '{cache_path}': {e_cache}")
+            self._remove(cache_path)
+            self.misses += 1
+            return None
+        try:
+            os.utime(cache_path) # Mark as recently used for eviction
+        except OSError:
+            pass
+        self.hits += 1
+        with self.lock:
+            self.decoded.put((seed, chunk_size, chunk_pos), blocks)
+        return blocks
+
+    def store(self, seed, chunk_pos, chunk_size, blocks):
+        cache_path = self._chunk_path(seed, chunk_pos, chunk_size)
+        cached_data = _CACHE_FILE_MAGIC + zlib.compress(encode_chunk_blocks(blocks, chunk_pos, chunk_size), 6)
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            tmp_path = f"{cache_path}.{threading.get_ident()}.tmp" # Per thread, two writers may race on one chunk
+            with open(tmp_path, 'wb') as f_cache:
+                f_cache.write(cached_data)
+            os.replace(tmp_path, cache_path) # Readers never see half-written files
+        except OSError as e_store:
+            print(f"[GEN CACHE] Could not write '{cache_path}': {e_store}")
+            return
+        with self.lock:
+            if self.total_bytes is None:
+                self.total_bytes = self._scan_total_bytes()
+            else:
+                self.total_bytes += len(cached_data)
+            if self.total_bytes > self.max_bytes:
+                self.evict()
+
+    def _cache_files(self):
+        cache_files = []
+        if not os.path.isdir(self.cache_dir):
+            return cache_files
+        for sub_dir_entry in os.scandir(self.cache_dir):
+            if not sub_dir_entry.is_dir():
+                continue
+            for file_entry in os.scandir(sub_dir_entry.path):
+                if file_entry.is_file():
+                    file_stat = file_entry.stat()
+                    cache_files.append((file_stat.st_mtime, file_stat.st_size, file_entry.path))
+        return cache_files
+
+    def _scan_total_bytes(self):
+        return sum(file_size for _, file_size, _ in self._cache_files())
+
+    def evict(self, target_fraction=0.9): # Drop least recently used entries until under target_fraction of the cap
+        cache_files = sorted(self._cache_files())
+        self.total_bytes = sum(file_size for _, file_size, _ in cache_files)
+        target_bytes = self.max_bytes * target_fraction
+        evicted_count = 0
+        for _, file_size, file_path in cache_files:
+            if self.total_bytes <= target_bytes:
+                break
+            if self._remove(file_path):
+                self.total_bytes -= file_size
+                evicted_count += 1
+        if evicted_count:
+            print(f"[GEN CACHE] Evicted {evicted_count} chunks, cache is now {self.total_bytes // 1024} KB.")
+
+    def _remove(self, file_path):
+        try:
+            os.remove(file_path)
+            return True
+        except OSError:
+            return False
+
+
+#############################################
+# 3) Region Files (random access chunk storage for saves)
+#############################################
+# A region holds REGION_SIZE x REGION_SIZE chunks in one file, r.<rx>.<rz>.vxr, inside the
+# save's region folder. Layout (little endian):
+#   header   <4sBxH   magic, version, chunk_size
+#   table    REGION_SIZE*REGION_SIZE entries of <IIB3x (offset, stored length, compression),
+#            offset 0 = chunk not present; slot = local_x * REGION_SIZE + local_z
+#   payloads one chunk payload (see section 1) per used slot, each compressed on its own
+#            (or stored uncompressed with COMPRESSION_NONE)
+# Writes only ever append: a rewritten chunk goes to the end of the file and its table entry
+# is repointed once the payload is on disk, so single chunks can be read and written without
+# touching the rest of the region and a crash mid-write leaves the previous payload readable.
+# The space of replaced and deleted payloads is reclaimed by compacting the region: right after
+# a write or delete once it is more than REGION_COMPACT_THRESHOLD dead space (and at least
+# REGION_COMPACT_MIN_WASTED_BYTES), and when the store is closed.
+# Reads go through a read-only memory map of the file, so hot regions are served from the OS
+# page cache and uncompressed payloads are decoded straight out of the mapping without being copied.
+REGION_SIZE = 32
+REGION_FILE_VERSION = 1
+REGION_FILE_SUFFIX = '.vxr'
+COMPRESSION_NONE = 0
+COMPRESSION_ZLIB = 1
+COMPRESSION_LZMA = 2
+COMPRESSION_NAMES = {"none": COMPRESSION_NONE, "zlib": COMPRESSION_ZLIB, "lzma": COMPRESSION_LZMA}
+DEFAULT_REGION_COMPRESSION = COMPRESSION_ZLIB # lzma is ~20% smaller but several times slower to write
+REGION_COMPACT_THRESHOLD = 0.5 # Fraction of a region file that may be dead space before it is compacted
+REGION_COMPACT_MIN_WASTED_BYTES = 256 * 1024 # Small regions are not worth rewriting after every few saves
+_REGION_MAGIC = b'VXRG'
+_REGION_HEADER = struct.Struct('<4sBxH')
+_REGION_TABLE_ENTRY = struct.Struct('<IIB3x')
+_REGION_TABLE_SIZE = REGION_SIZE * REGION_SIZE * _REGION_TABLE_ENTRY.size
+_REGION_DATA_START = _REGION_HEADER.size + _REGION_TABLE_SIZE
+
+
+def _compress_payload(payload, compression):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.compress(payload, 6)
+    if compression == COMPRESSION_LZMA:
+        return lzma.compress(payload)
+    return bytes(payload)
+
+
+def _decompress_payload(stored_data, compression):
+    if compression == COMPRESSION_ZLIB:
+        return zlib.decompress(stored_data)
+    if compression == COMPRESSION_LZMA:
+        return lzma.decompress(stored_data)
+    return stored_data # Uncompressed: a view into the mapped file, no copy
+
+
+def pack_region_chunk(blocks, chunk_pos, chunk_size, compression=DEFAULT_REGION_COMPRESSION):
+    # -> bytes as stored in a region file; lets worker processes do the encoding and compressing
+    return _compress_payload(encode_chunk_blocks(blocks, chunk_pos, chunk_size), compression)
+
+
+def region_coords_for_chunk(chunk_pos, chunk_size): # -> (rx, rz, slot)
+    chunk_ix, chunk_iz = chunk_pos[0] // chunk_size, chunk_pos[1] // chunk_size
+    return (chunk_ix // REGION_SIZE, chunk_iz // REGION_SIZE,
+            (chunk_ix % REGION_SIZE) * REGION_SIZE + (chunk_iz % REGION_SIZE))
+
+
+class RegionFile:
+    def __init__(self, path, region_pos, chunk_size, create=False):
+        self.path = path
+        self.region_pos = region_pos
+        self.chunk_size = chunk_size
+        self.mapped = None # Read-only mmap of the file, (re)created on demand after the file grows
+        if os.path.exists(path):
+            self.file = open(path, 'r+b')
+            magic, version, file_chunk_size = _REGION_HEADER.unpack(self.file.read(_REGION_HEADER.size))
+            if magic != _REGION_MAGIC or version != REGION_FILE_VERSION:
+                self.file.close()
+                raise ValueError(f"'{path}' is not a version {REGION_FILE_VERSION} region file")
+            if file_chunk_size != chunk_size:
+                self.file.close()
+                raise ValueError(f"'{path}' holds {file_chunk_size}-block chunks, expected {chunk_size}")
+            table_data = self.file.read(_REGION_TABLE_SIZE)
+            self.table = [_REGION_TABLE_ENTRY.unpack_from(table_data, slot * _REGION_TABLE_ENTRY.size)
+                          for slot in range(REGION_SIZE * REGION_SIZE)]
+        elif create:
+            self.file = open(path, 'w+b')
+            self.file.write(_REGION_HEADER.pack(_REGION_MAGIC, REGION_FILE_VERSION, chunk_size))
+            self.file.write(bytes(_REGION_TABLE_SIZE))
+            self.file.flush()
+            self.table = [(0, 0, 0)] * (REGION_SIZE * REGION_SIZE)
+        else:
+            raise FileNotFoundError(path)
+
+    def _chunk_pos_for_slot(self, slot):
+        local_ix, local_iz = divmod(slot, REGION_SIZE)
+        return ((self.region_pos[0] * REGION_SIZE + local_ix) * self.chunk_size,
+                (self.region_pos[1] * REGION_SIZE + local_iz) * self.chunk_size)
+
+    def chunk_positions(self):
+        return [self._chunk_pos_for_slot(slot) for slot, (offset, _, _) in enumerate(self.table) if offset]
+
+    def read_stored(self, slot): # -> (stored payload as a memoryview of the mapped file, compression) or None
+        offset, stored_len, compression = self.table[slot]
+        if not offset:
+            return None
+        if self.mapped is None or offset + stored_len > len(self.mapped):
+            self._unmap()
+            self.mapped = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        return memoryview(self.mapped)[offset:offset + stored_len], compression
+
+    def _unmap(self):
+        if self.mapped is not None:
+            try:
+                self.mapped.close()
+            except BufferError:
+                pass # A decoded view is still alive somewhere; the map goes away with it
+            self.mapped = None
+
+    def read_payload(self, slot):
+        stored_entry = self.read_stored(slot)
+        if stored_entry is None:
+            return None
+        return _decompress_payload(*stored_entry)
+
+    def write_stored(self, slot, stored_data, compression):
+        # Always appended, and the table entry only repointed once the payload is on disk: a crash mid-write
+        # leaves the previous payload intact. compact() reclaims the space of replaced payloads.
+        self.file.seek(0, os.SEEK_END)
+        offset = self.file.tell()
+        self.file.write(stored_data)
+        self.file.flush() # Keep the memory map in sync with buffered writes
+        self._set_table_entry(slot, (offset, len(stored_data), compression))
+
+    def write_payload(self, slot, payload, compression=DEFAULT_REGION_COMPRESSION):
+        self.write_stored(slot, _compress_payload(payload, compression), compression)
+
+    def delete(self, slot):
+        if self.table[slot][0]:
+            self._set_table_entry(slot, (0, 0, 0))
+
+    def _set_table_entry(self, slot, table_entry):
+        self.table[slot] = table_entry
+        self.file.seek(_REGION_HEADER.size + slot * _REGION_TABLE_ENTRY.size)
+        self.file.write(_REGION_TABLE_ENTRY.pack(*table_entry))
+        self.file.flush()
+
+    def check(self): # -> problems with the offset table (entries past the end of the file or overlapping)
+        problems = []
+        self.file.seek(0, os.SEEK_END)
+        file_size = self.file.tell()
+        used_ranges = sorted((offset, offset + stored_len, slot) for slot, (offset, stored_len, _) in enumerate(self.table) if offset)
+        previous_end, previous_slot = _REGION_DATA_START, None
+        for range_start, range_end, slot in used_ranges:
+            if range_end > file_size:
+                problems.append(f"{self.path}: chunk {self._chunk_pos_for_slot(slot)} ends past the end of the file")
+            if range_start < previous_end:
+                problems.append(f"{self.path}: chunk {self._chunk_pos_for_slot(slot)} overlaps "
+                                f"{'the header' if previous_slot is None else self._chunk_pos_for_slot(previous_slot)}")
+            if range_end > previous_end:
+                previous_end, previous_slot = range_end, slot
+        return problems
+
+    def wasted_bytes(self): # Space left behind by chunks that were moved or deleted
+        self.file.seek(0, os.SEEK_END)
+        return self.file.tell() - _REGION_DATA_START - sum(stored_len for _, stored_len, _ in self.table)
+
+    def compact_if_wasteful(self, compact_threshold=REGION_COMPACT_THRESHOLD, min_wasted_bytes=REGION_COMPACT_MIN_WASTED_BYTES):
+        self.file.seek(0, os.SEEK_END)
+        file_size = self.file.tell()
+        wasted_bytes = self.wasted_bytes()
+        if wasted_bytes >= min_wasted_bytes and wasted_bytes > file_size * compact_threshold:
+            self.compact()
+
+    def compact(self): # Rewrites the file with only the live payloads -> False if it could not be done yet
+        tmp_path = self.path + '.tmp'
+        new_table = []
+        with open(tmp_path, 'wb') as f_compact:
+            f_compact.write(_REGION_HEADER.pack(_REGION_MAGIC, REGION_FILE_VERSION, self.chunk_size))
+            f_compact.write(bytes(_REGION_TABLE_SIZE))
+            for offset, stored_len, compression in self.table:
+                if not offset:
+                    new_table.append((0, 0, 0))
+                    continue
+                # Read through the file handle: views into the map would keep it from being closed below
+                self.file.seek(offset)
+                new_table.append((f_compact.tell(), stored_len, compression))
+                f_compact.write(self.file.read(stored_len))
+            f_compact.seek(_REGION_HEADER.size)
+            f_compact.write(b''.join(_REGION_TABLE_ENTRY.pack(*entry) for entry in new_table))
+        # The old file must be neither mapped nor open when it is replaced (Windows refuses otherwise)
+        if self.mapped is not None:
+            try:
+                self.mapped.close()
+            except BufferError: # A payload view is still in use: leave the file as it is for now
+                os.remove(tmp_path)
+                return False
+            self.mapped = None
+        self.file.close()
+        os.replace(tmp_path, self.path)
+        self.file = open(self.path, 'r+b')
+        self.table = new_table
+        return True
+
+    def close(self):
+        self._unmap()
+        self.file.close()
+
+
+class RegionStore: # All region files of one save, addressed by chunk coordinate
+    def __init__(self, region_dir, chunk_size, compression=DEFAULT_REGION_COMPRESSION):
+        self.region_dir = region_dir
+        self.chunk_size = chunk_size
+        self.compression = compression
+        self.regions = {} # (rx, rz) -> RegionFile (None = no file on disk yet)
+        self.decoded = DecodedChunkCache()
+        self.lock = threading.RLock() # Saves write from a background thread while the game reads chunks
+
+    def _region(self, rx, rz, create=False):
+        region_file = self.regions.get((rx, rz))
+        if region_file is None:
+            region_path = os.path.join(self.region_dir, f"r.{rx}.{rz}{REGION_FILE_SUFFIX}")
+            if not create and not os.path.exists(region_path):
+                return None
+            if create:
+                os.makedirs(self.region_dir, exist_ok=True)
+            region_file = self.regions[(rx, rz)] = RegionFile(region_path, (rx, rz), self.chunk_size, create=create)
+        return region_file
+
+    def has_chunk(self, chunk_pos):
+        rx, rz, slot = region_coords_for_chunk(chunk_pos, self.chunk_size)
+        with self.lock:
+            region_file = self._region(rx, rz)
+            return region_file is not None and region_file.table[slot][0] != 0
+
+    def read_chunk(self, chunk_pos): # -> {(x, y, z): block} or None when the chunk was never saved
+        rx, rz, slot = region_coords_for_chunk(chunk_pos, self.chunk_size)
+        with self.lock:
+            decoded_blocks = self.decoded.get(chunk_pos)
+            if decoded_blocks is not None:
+                return decoded_blocks
+            region_file = self._region(rx, rz)
+            if region_file is None:
+                return None
+            payload = region_file.read_payload(slot)
+            if payload is None:
+                return None
+            blocks = decode_chunk_blocks(payload, chunk_pos)
+            del payload # Release the view into the mapped file
+            self.decoded.put(chunk_pos, blocks)
+            return blocks
+
+    def write_chunk(self, chunk_pos, blocks):
+        self.write_packed_chunk(chunk_pos, pack_region_chunk(blocks, chunk_pos, self.chunk_size, self.compression), self.compression)
+
+    def write_packed_chunk(self, chunk_pos, stored_data, compression): # stored_data from pack_region_chunk
+        rx, rz, slot = region_coords_for_chunk(chunk_pos, self.chunk_size)
+        with self.lock:
+            self.decoded.discard(chunk_pos)
+            region_file = self._region(rx, rz, create=True)
+            region_file.write_stored(slot, stored_data, compression)
+            region_file.compact_if_wasteful() # Appending every rewrite would otherwise grow the file without limit
+
+    def delete_chunk(self, chunk_pos):
+        rx, rz, slot = region_coords_for_chunk(chunk_pos, self.chunk_size)
+        with self.lock:
+            self.decoded.discard(chunk_pos)
+            region_file = self._region(rx, rz)
+            if region_file is not None:
+                region_file.delete(slot)
+                region_file.compact_if_wasteful()
+
+    def copy_chunks_to(self, other_store): # Copies compressed payloads as-is (e.g. "Save As" under a new name)
+        with self.lock, other_store.lock:
+            for chunk_pos in self.chunk_positions():
+                rx, rz, slot = region_coords_for_chunk(chunk_pos, self.chunk_size)
+                other_rx, other_rz, other_slot = region_coords_for_chunk(chunk_pos, other_store.chunk_size)
+                other_store._region(other_rx, other_rz, create=True).write_stored(other_slot, *self._region(rx, rz).read_stored(slot))
+
+    def region_positions(self):
+        region_positions = set(self.regions)
+        if os.path.isdir(self.region_dir):
+            for file_name in os.listdir(self.region_dir):
+                name_parts = file_name.split('.')
+                if len(name_parts) == 4 and name_parts[0] == 'r' and file_name.endswith(REGION_FILE_SUFFIX):
+                    try:
+                        region_positions.add((int(name_parts[1]), int(name_parts[2])))
+                    except ValueError:
+                        continue
+        return sorted(region_positions)
+
+    def stored_entries(self): # -> [(chunk_pos, stored bytes, compression, region path)] without decoding anything
+        stored_entries = []
+        with self.lock:
+            for rx, rz in self.region_positions():
+                region_file = self._region(rx, rz)
+                for slot, (offset, stored_len, compression) in enumerate(region_file.table):
+                    if offset:
+                        stored_entries.append((region_file._chunk_pos_for_slot(slot), stored_len, compression, region_file.path))
+        return stored_entries
+
+    def check(self): # -> problems found in the region files' offset tables
+        problems = []
+        with self.lock:
+            for rx, rz in self.region_positions():
+                try:
+                    problems.extend(self._region(rx, rz).check())
+                except (ValueError, struct.error) as e_region:
+                    problems.append(str(e_region))
+        return problems
+
+    def chunk_positions(self):
+        chunk_positions = []
+        with self.lock:
+            for rx, rz in self.region_positions():
+                region_file = self._region(rx, rz)
+                if region_file is not None:
+                    chunk_positions.extend(region_file.chunk_positions())
+        return chunk_positions
+
+    def close(self): # Compacts regions that are mostly dead space, however small
+        with self.lock:
+            for region_file in self.regions.values():
+                region_file.compact_if_wasteful(min_wasted_bytes=0)
+                region_file.close()
+            self.regions.clear()
+
+
+def region_dir_for_save(save_path): # save/my_world.json -> save/my_world.regions
+    return os.path.splitext(save_path)[0] + '.regions'
+
+
+#############################################
+# 4) JSON Saves (lazy chunk index + conversion to regions)
+#############################################
+# JSON saves are never json.load()ed as a whole: index_json_save() finds the byte span of every
+# chunk object, and read_json_chunk() decodes one chunk from its span. The index (a couple of ints
+# per chunk) is all that has to stay in memory. write_json_save() stores the index at the end of
+# the file, so loading reads just that; older or hand-made saves are scanned token by token once.
+_JSON_TOKEN = re.compile(rb'"(?:[^"\\]|\\.)*"|[{}\[\]]')
+_JSON_INDEX_FOOTER = re.compile(rb'"chunk_index_at": "(\d{16})"\s*}\s*$') # Fixed width, written last
+
+
+def _infer_chunk_size(chunk_keys): # Oldest saves have no settings; chunk origins are multiples of the chunk size
+    chunk_size = 0
+    for chunk_key in chunk_keys:
+        try:
+            cx, cz = map(int, chunk_key.split(','))
+        except ValueError:
+            continue # Reported (and skipped) by index_json_save
+        chunk_size = gcd(gcd(chunk_size, cx), cz)
+    return chunk_size
+
+
+def _read_stored_json_index(save_buf): # -> (world_settings, chunk index) stored by write_json_save, or None
+    index_footer = _JSON_INDEX_FOOTER.search(save_buf, max(0, len(save_buf) - 64))
+    if index_footer is None:
+        return None
+    try:
+        stored_index, _ = json.JSONDecoder().raw_decode(save_buf[int(index_footer.group(1)):index_footer.start()].decode('utf-8'))
+        settings_start, settings_end = stored_index["world_settings"]
+        world_settings = json.loads(save_buf[settings_start:settings_end])
+        chunk_index = {(cx, cz): (chunk_start, chunk_end) for cx, cz, chunk_start, chunk_end in stored_index["chunks"]}
+    except (ValueError, KeyError, TypeError): # Damaged or edited by hand: scan instead
+        return None
+    return world_settings, chunk_index
+
+
+def index_json_save(json_path, problems=None): # -> (world_settings, {(cx, cz): (start, end) byte span of the chunk's object})
+    # Malformed or duplicate chunk keys are skipped; pass a list as problems to collect what was skipped.
+    duplicate_keys = []
+    top_spans = {} # Top level key -> span of its value
+    chunk_spans = {} # Members of the top level "chunks" object -> span
+    with open(json_path, 'rb') as f_json:
+        if os.fstat(f_json.fileno()).st_size == 0:
+            raise ValueError(f"'{json_path}' is empty")
+        with mmap.mmap(f_json.fileno(), 0, access=mmap.ACCESS_READ) as save_buf:
+            stored_index = _read_stored_json_index(save_buf)
+            if stored_index is not None:
+                return stored_index
+            depth = 0
+            pending_key = {} # depth -> last key seen at that depth
+            open_values = {} # depth the value opened at -> (key, start)
+            for token in _JSON_TOKEN.finditer(save_buf):
+                token_start = token.start()
+                first_byte = save_buf[token_start]
+                if first_byte == 0x22: # '"': only keys directly under the top level and under "chunks" matter
+                    if depth == 1 or (depth == 2 and open_values.get(2, (None,))[0] == "chunks"):
+                        pending_key[depth] = token.group()[1:-1].decode('utf-8')
+                elif first_byte in (0x7B, 0x5B): # '{' or '['
+                    depth += 1
+                    if depth in (2, 3) and (depth - 1) in pending_key:
+                        open_values[depth] = (pending_key.pop(depth - 1), token_start)
+                else: # '}' or ']'
+                    opened = open_values.pop(depth, None)
+                    if opened is not None:
+                        target_spans = top_spans if depth == 2 else chunk_spans
+                        if opened[0] in target_spans:
+                            duplicate_keys.append(opened[0]) # json.load would keep the last one too
+                        target_spans[opened[0]] = (opened[1], token.end())
+                    depth -= 1
+                    pending_key.pop(depth, None)
+            if "world_settings" in top_spans:
+                settings_start, settings_end = top_spans["world_settings"]
+                world_settings = json.loads(save_buf[settings_start:settings_end])
+            else:
+                world_settings = {}
+
+    if "chunks" not in top_spans and "world_settings" not in top_spans:
+        chunk_spans = top_spans # Bare legacy layout: every top level member is a chunk
+        inferred_chunk_size = _infer_chunk_size(key for key in chunk_spans if key.count(',') == 1)
+        if inferred_chunk_size:
+            world_settings = {"chunk_size": inferred_chunk_size}
+    chunk_index = {}
+    for chunk_key, chunk_span in chunk_spans.items():
+        try:
+            cx, cz = map(int, chunk_key.split(','))
+        except ValueError:
+            if problems is not None:
+                problems.append(f"malformed chunk key '{chunk_key}' at byte {chunk_span[0]}")
+            continue # Skip malformed chunk keys
+        chunk_index[(cx, cz)] = chunk_span
+    if problems is not None:
+        problems.extend(f"duplicate key '{duplicate_key}' (only the last one is used)" for duplicate_key in duplicate_keys)
+    return world_settings, chunk_index
+
+
+def read_json_chunk(json_path, chunk_span, problems=None): # -> {(x, y, z): block} of one chunk indexed by index_json_save
+    with open(json_path, 'rb') as f_json:
+        f_json.seek(chunk_span[0])
+        return parse_json_chunk(json.loads(f_json.read(chunk_span[1] - chunk_span[0])), problems)
+
+
+def write_json_save(json_path, world_settings, chunk_items):
+    # Streams a JSON save chunk by chunk (chunk_items yields ((cx, cz), {(x, y, z): block})) and
+    # returns the new chunk index, which is also stored at the end of the file for the next load.
+    chunk_index = {}
+    tmp_path = json_path + '.tmp'
+    with open(tmp_path, 'wb') as f_json:
+        f_json.write(b'{\n  "world_settings": ')
+        settings_start = f_json.tell()
+        f_json.write(json.dumps(world_settings).encode('utf-8'))
+        settings_span = (settings_start, f_json.tell())
+        f_json.write(b',\n  "chunks": {')
+        separator = b'\n'
+        for (cx, cz), chunk_blocks in chunk_items:
+            f_json.write(separator + f'    "{cx},{cz}": '.encode('utf-8'))
+            chunk_start = f_json.tell()
+            f_json.write(json.dumps({f"{bx},{by},{bz}": block_value for (bx, by, bz), block_value in chunk_blocks.items()},
+                                    separators=(',', ':')).encode('utf-8'))
+            chunk_index[(cx, cz)] = (chunk_start, f_json.tell())
+            separator = b',\n'
+        f_json.write(b'\n  },\n  "chunk_index": ')
+        index_start = f_json.tell()
+        f_json.write(json.dumps({"world_settings": settings_span,
+                                 "chunks": [[cx, cz, chunk_start, chunk_end] for (cx, cz), (chunk_start, chunk_end) in chunk_index.items()]},
+                                separators=(',', ':')).encode('utf-8'))
+        f_json.write(b',\n  "chunk_index_at": "%016d"\n}\n' % index_start)
+    os.replace(tmp_path, json_path)
+    return chunk_index
+
+
+def parse_json_chunk(json_blocks, problems=None): # {"x,y,z": block} -> {(x, y, z): block}, skipping malformed keys
+    chunk_blocks = {}
+    for block_key_str, block_value in json_blocks.items():
+        try:
+            bx, by, bz = map(int, block_key_str.split(','))
+        except ValueError:
+            if problems is not None:
+                problems.append(f"malformed block key '{block_key_str}'")
+            continue
+        chunk_blocks[(bx, by, bz)] = block_value
+    return chunk_blocks
+
+
+def convert_json_save_to_regions(json_path, compression=DEFAULT_REGION_COMPRESSION, output_path=None, progress=None):
+    # Moves the chunks of a JSON save into region files and rewrites the JSON with an empty
+    # "chunks" section, in place or as a new save at output_path (the source is then left alone).
+    # One chunk is decoded at a time. Returns the number of chunks converted.
+    output_path = output_path or json_path
+    world_settings, chunk_index = index_json_save(json_path)
+    if world_settings.get("storage") == "region":
+        return 0
+    chunk_size = world_settings.get("chunk_size")
+    if not chunk_size:
+        raise ValueError(f"'{json_path}' does not record its chunk size")
+    region_store = RegionStore(region_dir_for_save(output_path), chunk_size, compression)
+    for converted_count, (chunk_pos, chunk_span) in enumerate(chunk_index.items(), 1):
+        region_store.write_chunk(chunk_pos, read_json_chunk(json_path, chunk_span))
+        if progress:
+            progress(converted_count, len(chunk_index))
+    converted_count = len(chunk_index)
+    region_store.close()
+
+    world_settings = dict(world_settings)
+    world_settings.setdefault("save_format", "full")
+    world_settings["storage"] = "region"
+    world_settings["region_compression"] = next(name for name, code in COMPRESSION_NAMES.items() if code == compression)
+    write_json_save(output_path, world_settings, ())
+    return converted_count
+
+
+#############################################
+# 5) Edit Journal (crash safety between saves)
+#############################################
+# Append-only log of block edits, one JSON line "[x, y, z, block]" (null = removed) per edit,
+# written as edits happen. <name>.journal collects new edits; when a save starts it is moved to
+# <name>.journal.saving, which is deleted once that save is on disk. Loading a save replays
+# .journal.saving and then .journal on top of it, so a crash loses at most the unflushed tail.
+def journal_path_for_save(save_path): # save/my_world.json -> save/my_world.journal
+    return os.path.splitext(save_path)[0] + '.journal'
+
+
+class EditJournal:
+    def __init__(self, save_path):
+        self.path = journal_path_for_save(save_path)
+        self.file = None # Opened on the first edit
+        self.pending_edits = 0 # Edits written since the last flush
+
+    def append(self, block_pos, block_value):
+        if self.file is None:
+            self.file = open(self.path, 'a')
+        self.file.write(json.dumps([block_pos[0], block_pos[1], block_pos[2], block_value], separators=(',', ':')) + '\n')
+        self.pending_edits += 1
+
+    def flush(self): # Cheap; the game calls it once per frame
+        if self.file is not None and self.pending_edits:
+            self.file.flush()
+            self.pending_edits = 0
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+        self.pending_edits = 0
+
+    def start_checkpoint(self, save_path): # A save of save_path starts: move the edits it covers aside
+        self.close()
+        saving_path = journal_path_for_save(save_path) + '.saving'
+        for old_journal_path in (self.path + '.saving', self.path):
+            if old_journal_path == saving_path or not os.path.exists(old_journal_path):
+                continue
+            # A .saving left by a failed save is kept and extended, never overwritten
+            with open(old_journal_path, 'rb') as f_old, open(saving_path, 'ab') as f_saving:
+                f_saving.write(f_old.read())
+            os.remove(old_journal_path)
+        self.path = journal_path_for_save(save_path)
+
+    def finish_checkpoint(self): # That save is on disk: the edits moved aside are no longer needed
+        try:
+            os.remove(self.path + '.saving')
+        except OSError:
+            pass
+
+    def discard(self): # World is being replaced (new world under the same name)
+        self.close()
+        for journal_file_path in (self.path + '.saving', self.path):
+            try:
+                os.remove(journal_file_path)
+            except OSError:
+                pass
+
+
+def read_journal_edits(save_path): # -> [((x, y, z), block)] in the order they were made
+    journal_edits = []
+    journal_path = journal_path_for_save(save_path)
+    for journal_file_path in (journal_path + '.saving', journal_path):
+        try:
+            with open(journal_file_path, 'r') as f_journal:
+                for journal_line in f_journal:
+                    try:
+                        bx, by, bz, block_value = json.loads(journal_line)
+                    except (ValueError, TypeError):
+                        continue # Torn last line from a crash
+                    journal_edits.append(((bx, by, bz), block_value))
+        except OSError:
+            continue
+    return journal_edits
+
+
+#############################################
+# 6) World Metadata (small per-world record for menus)
+#############################################
+# save/<name>.meta.json holds what the load menu shows and what it needs to pick a load
+# strategy (chunk count, radius), so listing worlds never opens the save itself. It is
+# rewritten after every save; worlds saved before it existed get one built on first listing.
+# save/<name>.thumb.png is an optional top-down map of the area around the player.
+WORLD_META_VERSION = 1
+
+
+def meta_path_for_save(save_path): # save/my_world.json -> save/my_world.meta.json
+    return os.path.splitext(save_path)[0] + '.meta.json'
+
+
+def thumbnail_path_for_save(save_path): # save/my_world.json -> save/my_world.thumb.png
+    return os.path.splitext(save_path)[0] + '.thumb.png'
+
+
+def world_meta_from_settings(world_settings, chunk_count, play_time_seconds=0.0, edit_count=0, thumbnail=None):
+    return {
+        "meta_version": WORLD_META_VERSION,
+        "world_seed": world_settings.get("world_seed"),
+        "chunk_size": world_settings.get("chunk_size"),
+        "world_radius_chunks": world_settings.get("world_radius_chunks"),
+        "generator_version": world_settings.get("generator_version"),
+        "save_format": world_settings.get("save_format", "full"),
+        "storage": world_settings.get("storage", "json"),
+        "chunk_count": chunk_count, # Chunks stored in the save
+        "play_time_seconds": round(play_time_seconds, 1),
+        "edit_count": edit_count,
+        "thumbnail": thumbnail, # File name next to the save, or None
+    }
+
+
+def read_world_meta(save_path): # -> metadata dict, or None if missing, unreadable or stale
+    try:
+        with open(meta_path_for_save(save_path)) as f_meta:
+            world_meta = json.load(f_meta)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(world_meta, dict) or world_meta.get("meta_version") != WORLD_META_VERSION:
+        return None
+    if os.path.getmtime(meta_path_for_save(save_path)) < os.path.getmtime(save_path):
+        return None # The save was written by something that does not know about metadata
+    return world_meta
+
+
+def write_world_meta(save_path, world_meta):
+    meta_path = meta_path_for_save(save_path)
+    with open(meta_path + '.tmp', 'w') as f_meta:
+        json.dump(world_meta, f_meta, indent=2)
+    os.replace(meta_path + '.tmp', meta_path)
+
+
+def load_world_meta(save_path): # -> metadata, building (and writing) it from the save itself if needed
+    world_meta = read_world_meta(save_path)
+    if world_meta is not None:
+        return world_meta
+    world_settings, chunk_index = index_json_save(save_path) # One mmap scan, no chunk is decoded
+    chunk_count = len(chunk_index)
+    if world_settings.get("storage", "json") == "region":
+        region_store = RegionStore(region_dir_for_save(save_path), world_settings.get("chunk_size") or 16)
+        chunk_count = len(region_store.chunk_positions())
+        region_store.close(compact_threshold=1.0) # Read only: never compacts
+    thumbnail_name = os.path.basename(thumbnail_path_for_save(save_path))
+    world_meta = world_meta_from_settings(world_settings, chunk_count, thumbnail=thumbnail_name if
+                                          os.path.exists(thumbnail_path_for_save(save_path)) else None)
+    try:
+        write_world_meta(save_path, world_meta)
+    except OSError:
+        pass # Read-only save folder: still usable, just rebuilt next time
+    return world_meta
+
+
+def remove_world_meta(save_path):
+    for meta_file_path in (meta_path_for_save(save_path), thumbnail_path_for_save(save_path)):
+        try:
+            os.remove(meta_file_path)
+        except OSError:
+            pass
+
+
+def write_png(png_path, width, height, rgb_bytes): # 8-bit RGB, rows top to bottom, no image library needed
+    def png_chunk(chunk_type, chunk_data):
+        return (struct.pack('>I', len(chunk_data)) + chunk_type + chunk_data +
+                struct.pack('>I', zlib.crc32(chunk_type + chunk_data) & 0xffffffff))
+    row_bytes = width * 3
+    raw_rows = b''.join(b'\x00' + rgb_bytes[row * row_bytes:(row + 1) * row_bytes] for row in range(height))
+    with open(png_path + '.tmp', 'wb') as f_png:
+        f_png.write(b'\x89PNG\r\n\x1a\n')
+        f_png.write(png_chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f_png.write(png_chunk(b'IDAT', zlib.compress(raw_rows, 6)))
+        f_png.write(png_chunk(b'IEND', b''))
+    os.replace(png_path + '.tmp', png_path)
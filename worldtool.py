@@ -0,0 +1,381 @@
+#############################################
+# World Tool (headless command line, no Ursina)
+#############################################
+# main.py opens the game window as soon as it is imported, so offline work on worlds lives
+# here instead, next to it, built only on worldgen.py and worldstore.py.
+#
+#   python worldtool.py pregen my_world --seed 1234 --radius 64 --shape circle
+#   python worldtool.py inspect my_world
+#   python worldtool.py validate my_world
+#   python worldtool.py convert my_world [--output my_world_regions]
+#
+# Saves are read from / written to the same save/ folder the game uses.
+import argparse
+import multiprocessing
+import os
+import sys
+import time
+from collections import OrderedDict
+
+from worldgen import TerrainGenerator, DEFAULT_WORLD_SEED, GENERATOR_VERSION, WATER_LEVEL, seed_from_text
+from worldstore import (RegionStore, GenerationCache, COMPRESSION_NAMES, pack_region_chunk, region_dir_for_save,
+                        index_json_save, read_json_chunk, write_json_save, convert_json_save_to_regions)
+from worldstore import world_meta_from_settings, read_world_meta, write_world_meta
+
+SAVE_FOLDER = 'save'
+DEFAULT_CHUNK_SIZE = 16 # Same default as the game's CHUNK_SIZE
+
+
+def save_path_for_name(save_name): # "my_world" or "my_world.json" -> save/my_world.json
+    if not save_name.endswith('.json'):
+        save_name += '.json'
+    return save_name if os.path.dirname(save_name) else os.path.join(SAVE_FOLDER, save_name)
+
+
+#############################################
+# 1) pregen: generate an area of chunks into region files
+#############################################
+# Pre-generated chunks are written as a "full" save with region storage: the game then only
+# decodes them when they stream in and never runs terrain generation for that area. (A delta
+# save stores edits only, so there is nothing to pre-generate into one.)
+_worker_generator = None # One TerrainGenerator per worker process
+_worker_column_contexts = OrderedDict() # (chunk_pos, chunk_size) -> column context, shared by neighbouring chunks' tree passes
+WORKER_COLUMN_CONTEXT_LIMIT = 256
+
+
+def _init_pregen_worker(seed):
+    global _worker_generator
+    _worker_generator = TerrainGenerator(seed)
+    _worker_column_contexts.clear()
+
+
+def _worker_column_context(chunk_pos, chunk_size):
+    cache_key = (chunk_pos, chunk_size)
+    column_context = _worker_column_contexts.get(cache_key)
+    if column_context is None:
+        column_context = _worker_generator.column_context(chunk_pos, chunk_size)
+        _worker_column_contexts[cache_key] = column_context
+        if len(_worker_column_contexts) > WORKER_COLUMN_CONTEXT_LIMIT:
+            _worker_column_contexts.popitem(last=False)
+    else:
+        _worker_column_contexts.move_to_end(cache_key)
+    return column_context
+
+
+def _pregen_chunk(task): # Runs in a worker process -> (chunk_pos, packed region payload)
+    chunk_pos, chunk_size, compression = task
+    blocks = _worker_generator.generate_chunk(chunk_pos, chunk_size, _worker_column_context(chunk_pos, chunk_size),
+                                              lambda neighbor_pos: _worker_column_context(neighbor_pos, chunk_size))
+    return chunk_pos, pack_region_chunk(blocks, chunk_pos, chunk_size, compression)
+
+
+def pregen_chunk_positions(center_chunk, radius_chunks, chunk_size, shape):
+    # Nearest chunks first, so an interrupted run still covers the area around the center
+    chunk_positions = []
+    for dx_chunk in range(-radius_chunks, radius_chunks + 1):
+        for dz_chunk in range(-radius_chunks, radius_chunks + 1):
+            if shape == 'circle' and dx_chunk * dx_chunk + dz_chunk * dz_chunk > radius_chunks * radius_chunks:
+                continue
+            chunk_positions.append((dx_chunk * dx_chunk + dz_chunk * dz_chunk,
+                                    ((center_chunk[0] + dx_chunk) * chunk_size, (center_chunk[1] + dz_chunk) * chunk_size)))
+    chunk_positions.sort()
+    return [chunk_pos for _, chunk_pos in chunk_positions]
+
+
+def command_pregen(args):
+    save_path = save_path_for_name(args.save)
+    compression_name = args.compression
+    if os.path.exists(save_path): # Resume / extend an existing world with its own settings
+        world_settings, chunk_index = index_json_save(save_path)
+        if world_settings.get("storage", "json") != "region" or chunk_index:
+            print(f"[PREGEN] '{save_path}' keeps its chunks in JSON; convert it first (python worldtool.py convert {args.save}).")
+            return 1
+        if world_settings.get("save_format", "full") != "full":
+            print(f"[PREGEN] '{save_path}' is a delta save (it only stores edits), pre-generating into it would turn "
+                  f"terrain into edits. Pre-generate a new world instead.")
+            return 1
+        if args.seed is not None and seed_from_text(args.seed) != world_settings.get("world_seed", DEFAULT_WORLD_SEED):
+            print(f"[PREGEN] '{save_path}' was created with seed {world_settings.get('world_seed')}, not {args.seed}.")
+            return 1
+        if world_settings.get("generator_version", GENERATOR_VERSION) != GENERATOR_VERSION:
+            print(f"[PREGEN] '{save_path}' was generated by generator v{world_settings.get('generator_version')}, "
+                  f"this build is v{GENERATOR_VERSION}; new chunks would not line up.")
+            return 1
+        compression_name = world_settings.get("region_compression", compression_name)
+        print(f"[PREGEN] Resuming '{save_path}' (seed {world_settings.get('world_seed')}).")
+    else:
+        world_settings = {
+            "chunk_size": args.chunk_size,
+            "world_radius_chunks": args.radius,
+            "world_seed": seed_from_text(args.seed or ""),
+            "generator_version": GENERATOR_VERSION,
+            "save_format": "full",
+            "storage": "region",
+            "region_compression": compression_name,
+            "sea_level": WATER_LEVEL, # Sea water is implicit, not stored
+        }
+        os.makedirs(os.path.dirname(save_path) or '.', exist_ok=True)
+        write_json_save(save_path, world_settings, ()) # Written first so an interrupted run can be resumed
+
+    chunk_size = world_settings["chunk_size"]
+    seed = world_settings["world_seed"]
+    compression = COMPRESSION_NAMES[compression_name]
+    region_store = RegionStore(region_dir_for_save(save_path), chunk_size, compression)
+    all_positions = pregen_chunk_positions((args.center[0] // chunk_size, args.center[1] // chunk_size),
+                                           args.radius, chunk_size, args.shape)
+    todo_positions = [chunk_pos for chunk_pos in all_positions if not region_store.has_chunk(chunk_pos)]
+    print(f"[PREGEN] Seed {seed}, {args.shape} radius {args.radius} chunks: {len(all_positions)} chunks, "
+          f"{len(all_positions) - len(todo_positions)} already present, {len(todo_positions)} to generate "
+          f"on {args.workers} workers.")
+
+    start_time = time.time()
+    last_report_time = start_time
+    chunks_done = 0
+    tasks = [(chunk_pos, chunk_size, compression) for chunk_pos in todo_positions]
+    try:
+        with multiprocessing.Pool(args.workers, initializer=_init_pregen_worker, initargs=(seed,)) as worker_pool:
+            # Workers generate, encode and compress; only this process touches the region files
+            for chunk_pos, stored_data in worker_pool.imap_unordered(_pregen_chunk, tasks, chunksize=8):
+                region_store.write_packed_chunk(chunk_pos, stored_data, compression)
+                chunks_done += 1
+                if time.time() - last_report_time > 1.0 or chunks_done == len(tasks):
+                    last_report_time = time.time()
+                    chunks_per_second = chunks_done / max(last_report_time - start_time, 1e-6)
+                    eta_seconds = (len(tasks) - chunks_done) / max(chunks_per_second, 1e-6)
+                    print(f"[PREGEN] {chunks_done}/{len(tasks)} chunks ({chunks_done * 100 // max(len(tasks), 1)}%), "
+                          f"{chunks_per_second:.0f} chunks/s, ETA {eta_seconds:.0f}s", flush=True)
+    except KeyboardInterrupt:
+        print(f"[PREGEN] Interrupted after {chunks_done} chunks; run the same command again to resume.")
+        return 130
+    finally:
+        region_store.close()
+
+    world_settings["world_radius_chunks"] = max(world_settings.get("world_radius_chunks", 0), args.radius)
+    previous_meta = read_world_meta(save_path) or {} # Read before the manifest is rewritten (which makes it stale)
+    write_json_save(save_path, world_settings, ())
+    write_world_meta(save_path, world_meta_from_settings(
+        world_settings, len(region_store.chunk_positions()), previous_meta.get("play_time_seconds", 0.0),
+        previous_meta.get("edit_count", 0), previous_meta.get("thumbnail")))
+    print(f"[PREGEN] Done in {time.time() - start_time:.1f}s -> {region_dir_for_save(save_path)}")
+    return 0
+
+
+#############################################
+# 2) convert / inspect / validate: stream through an existing save
+#############################################
+# Saves can be far bigger than memory, so nothing here loads a whole world: JSON saves are
+# indexed by a scan over an mmap of the file (only the per-chunk byte spans are kept) and
+# then parsed one chunk at a time; region saves are read chunk by chunk from their offset tables.
+MAX_PROBLEMS_SHOWN = 20 # Per kind of problem, the rest are only counted
+
+
+def open_save_for_reading(save_path, problems=None, indexed_save=None): # -> (world_settings, chunk positions, read_chunk(chunk_pos, problems))
+    # indexed_save: what index_json_save(save_path) returned, for callers that need the chunk index too
+    world_settings, chunk_index = indexed_save if indexed_save is not None else index_json_save(save_path, problems)
+    if world_settings.get("storage", "json") == "region":
+        region_store = RegionStore(region_dir_for_save(save_path), world_settings["chunk_size"],
+                                   COMPRESSION_NAMES[world_settings.get("region_compression", "zlib")])
+        region_store.decoded.limit = 0 # Every chunk is visited once, caching them would only cost memory
+        return world_settings, region_store.chunk_positions(), lambda chunk_pos, _problems=None: region_store.read_chunk(chunk_pos)
+    return world_settings, sorted(chunk_index), lambda chunk_pos, chunk_problems=None: read_json_chunk(
+        save_path, chunk_index[chunk_pos], chunk_problems)
+
+
+def _block_type_name(block_value):
+    if block_value is None:
+        return '(removed)' # Delta saves record removed blocks as null
+    if isinstance(block_value, dict):
+        return block_value.get('type', '(dict without type)')
+    return block_value
+
+
+def _format_bytes(byte_count):
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if byte_count < 1024 or unit == 'GB':
+            return f"{byte_count:.1f} {unit}" if unit != 'B' else f"{byte_count} B"
+        byte_count /= 1024
+
+
+def command_convert(args):
+    save_path = save_path_for_name(args.save)
+    output_path = save_path_for_name(args.output) if args.output else save_path
+    world_settings, chunk_index = index_json_save(save_path)
+    if world_settings.get("storage", "json") == "region":
+        print(f"[CONVERT] '{save_path}' already keeps its chunks in region files.")
+        return 0
+    if output_path != save_path and os.path.exists(output_path):
+        print(f"[CONVERT] '{output_path}' already exists.")
+        return 1
+    start_time = time.time()
+    report_state = {'last_time': start_time}
+
+    def report_progress(chunks_done, chunk_count):
+        if time.time() - report_state['last_time'] > 1.0 or chunks_done == chunk_count:
+            report_state['last_time'] = time.time()
+            print(f"[CONVERT] {chunks_done}/{chunk_count} chunks", flush=True)
+
+    source_size = os.path.getsize(save_path)
+    previous_meta = read_world_meta(save_path) or {} # Play time etc. carry over to the converted save
+    converted_count = convert_json_save_to_regions(save_path, COMPRESSION_NAMES[args.compression],
+                                                   output_path, report_progress)
+    region_size = sum(stored_len for _, stored_len, _, _ in
+                      RegionStore(region_dir_for_save(output_path), world_settings["chunk_size"]).stored_entries())
+    converted_settings, _ = index_json_save(output_path)
+    write_world_meta(output_path, world_meta_from_settings(
+        converted_settings, converted_count, previous_meta.get("play_time_seconds", 0.0), previous_meta.get("edit_count", 0),
+        previous_meta.get("thumbnail") if output_path == save_path else None))
+    print(f"[CONVERT] {converted_count} chunks in {time.time() - start_time:.1f}s: {_format_bytes(source_size)} of JSON "
+          f"-> {_format_bytes(region_size)} in {region_dir_for_save(output_path)}")
+    return 0
+
+
+def command_inspect(args):
+    save_path = save_path_for_name(args.save)
+    indexed_save = index_json_save(save_path) # Settings and, for JSON storage, the chunk spans measured below
+    world_settings, chunk_positions, read_chunk = open_save_for_reading(save_path, indexed_save=indexed_save)
+    chunk_size = world_settings.get("chunk_size")
+    print(f"[INSPECT] {save_path}")
+    for setting_key in sorted(world_settings):
+        print(f"    {setting_key}: {world_settings[setting_key]}")
+
+    storage = world_settings.get("storage", "json")
+    if storage == "region":
+        stored_entries = RegionStore(region_dir_for_save(save_path), chunk_size).stored_entries()
+        region_paths = {region_path for _, _, _, region_path in stored_entries}
+        stored_sizes = [stored_len for _, stored_len, _, _ in stored_entries]
+        print(f"[INSPECT] {_format_bytes(os.path.getsize(save_path))} manifest, {len(region_paths)} region files, "
+              f"{_format_bytes(sum(os.path.getsize(region_path) for region_path in region_paths))} on disk")
+    else:
+        _, chunk_index = indexed_save
+        stored_sizes = [chunk_span[1] - chunk_span[0] for chunk_span in chunk_index.values()]
+        print(f"[INSPECT] {_format_bytes(os.path.getsize(save_path))} JSON")
+    if stored_sizes:
+        print(f"[INSPECT] Stored chunk size: avg {_format_bytes(sum(stored_sizes) // len(stored_sizes))}, "
+              f"max {_format_bytes(max(stored_sizes))}")
+
+    block_histogram = {}
+    block_count = 0
+    y_range = None
+    x_range = z_range = None
+    for chunk_pos in chunk_positions: # One chunk in memory at a time
+        x_range = (min(x_range[0], chunk_pos[0]), max(x_range[1], chunk_pos[0])) if x_range else (chunk_pos[0], chunk_pos[0])
+        z_range = (min(z_range[0], chunk_pos[1]), max(z_range[1], chunk_pos[1])) if z_range else (chunk_pos[1], chunk_pos[1])
+        for (_, by, _), block_value in read_chunk(chunk_pos).items():
+            block_type = _block_type_name(block_value)
+            block_histogram[block_type] = block_histogram.get(block_type, 0) + 1
+            block_count += 1
+            y_range = (min(y_range[0], by), max(y_range[1], by)) if y_range else (by, by)
+
+    print(f"[INSPECT] {len(chunk_positions)} chunks, {block_count} blocks")
+    if chunk_positions:
+        print(f"[INSPECT] Chunks span x {x_range[0]}..{x_range[1] + (chunk_size or 0) - 1}, "
+              f"z {z_range[0]}..{z_range[1] + (chunk_size or 0) - 1}" + (f", y {y_range[0]}..{y_range[1]}" if y_range else ""))
+    for block_type, type_count in sorted(block_histogram.items(), key=lambda item: -item[1]):
+        print(f"    {block_type:<20} {type_count:>10}  {type_count * 100 / block_count:5.1f}%")
+    return 0
+
+
+def command_validate(args):
+    # Reports what load_world_from_file would silently skip or misread, grouped by kind of problem
+    save_path = save_path_for_name(args.save)
+    problems_by_kind = {}
+
+    def report(kind, problem_text):
+        problems_by_kind.setdefault(kind, []).append(problem_text)
+
+    index_problems = []
+    world_settings, chunk_positions, read_chunk = open_save_for_reading(save_path, index_problems)
+    for problem_text in index_problems:
+        report('chunk keys', problem_text)
+    chunk_size = world_settings.get("chunk_size")
+    save_format = world_settings.get("save_format", "full")
+    if not chunk_size:
+        report('settings', "no chunk_size recorded or inferable")
+    if world_settings.get("storage", "json") == "region":
+        region_store = RegionStore(region_dir_for_save(save_path), chunk_size)
+        for problem_text in region_store.check():
+            report('region files', problem_text)
+
+    outside_count = 0 # Blocks stored outside their chunk's columns (the loader keeps them, trees can spill)
+    for chunk_pos in chunk_positions:
+        if chunk_size and (chunk_pos[0] % chunk_size or chunk_pos[1] % chunk_size):
+            report('chunk keys', f"chunk {chunk_pos} is not aligned to the chunk size {chunk_size}")
+        block_problems = []
+        try:
+            chunk_blocks = read_chunk(chunk_pos, block_problems)
+        except Exception as e_read:
+            report('unreadable chunks', f"chunk {chunk_pos}: {e_read}")
+            continue
+        for problem_text in block_problems:
+            report('block keys', f"chunk {chunk_pos}: {problem_text}")
+        for (bx, by, bz), block_value in chunk_blocks.items():
+            if block_value is None:
+                if save_format != "delta":
+                    report('block values', f"chunk {chunk_pos}: null block at {(bx, by, bz)} in a full save")
+            elif isinstance(block_value, dict):
+                if not isinstance(block_value.get('type'), str):
+                    report('block values', f"chunk {chunk_pos}: block at {(bx, by, bz)} has no 'type': {block_value}")
+            elif not isinstance(block_value, str):
+                report('block values', f"chunk {chunk_pos}: block at {(bx, by, bz)} is {block_value!r}")
+            if chunk_size and not (chunk_pos[0] <= bx < chunk_pos[0] + chunk_size and chunk_pos[1] <= bz < chunk_pos[1] + chunk_size):
+                outside_count += 1
+
+    print(f"[VALIDATE] {save_path}: {len(chunk_positions)} chunks checked")
+    if outside_count:
+        print(f"[VALIDATE] Note: {outside_count} blocks are stored outside their chunk's columns")
+    if save_format == "delta" and chunk_positions and chunk_size:
+        # Saving or unloading an edited chunk diffs it against its pristine terrain, read from the generation cache
+        generation_cache = GenerationCache()
+        world_seed = world_settings.get("world_seed", DEFAULT_WORLD_SEED)
+        cached_count = sum(1 for chunk_pos in chunk_positions if generation_cache.has_chunk(world_seed, chunk_pos, chunk_size))
+        if not cached_count:
+            print(f"[VALIDATE] Note: none of the saved chunks have their pristine terrain in the generation cache "
+                  f"({generation_cache.cache_dir}); the game stores it there whenever it saves a chunk")
+    for kind, problem_texts in problems_by_kind.items():
+        print(f"[VALIDATE] {len(problem_texts)} problems with {kind}:")
+        for problem_text in problem_texts[:MAX_PROBLEMS_SHOWN]:
+            print(f"    {problem_text}")
+        if len(problem_texts) > MAX_PROBLEMS_SHOWN:
+            print(f"    ... and {len(problem_texts) - MAX_PROBLEMS_SHOWN} more")
+    if not problems_by_kind:
+        print("[VALIDATE] No problems found.")
+    return 1 if problems_by_kind else 0
+
+
+#############################################
+# 3) Command Line
+#############################################
+def build_arg_parser():
+    arg_parser = argparse.ArgumentParser(description="Offline tools for VoxWorld saves.")
+    sub_parsers = arg_parser.add_subparsers(dest='command', required=True)
+
+    pregen_parser = sub_parsers.add_parser('pregen', help="pre-generate an area of a world into region files")
+    pregen_parser.add_argument('save', help="save name in save/ (e.g. my_world), created if missing, resumed if present")
+    pregen_parser.add_argument('--seed', help="world seed (number or text, blank = random) for a new save")
+    pregen_parser.add_argument('--radius', type=int, required=True, help="radius in chunks around the center")
+    pregen_parser.add_argument('--shape', choices=('square', 'circle'), default='square')
+    pregen_parser.add_argument('--center', type=int, nargs=2, default=(0, 0), metavar=('X', 'Z'), help="center in blocks")
+    pregen_parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    pregen_parser.add_argument('--compression', choices=sorted(COMPRESSION_NAMES), default='zlib')
+    pregen_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    pregen_parser.set_defaults(handler=command_pregen)
+
+    convert_parser = sub_parsers.add_parser('convert', help="move a JSON save's chunks into region files")
+    convert_parser.add_argument('save', help="save name in save/")
+    convert_parser.add_argument('--output', help="write a new save under this name instead of converting in place")
+    convert_parser.add_argument('--compression', choices=sorted(COMPRESSION_NAMES), default='zlib')
+    convert_parser.set_defaults(handler=command_convert)
+
+    inspect_parser = sub_parsers.add_parser('inspect', help="print settings, file statistics and a block histogram")
+    inspect_parser.add_argument('save', help="save name in save/")
+    inspect_parser.set_defaults(handler=command_inspect)
+
+    validate_parser = sub_parsers.add_parser('validate', help="report malformed chunk/block keys and broken chunks")
+    validate_parser.add_argument('save', help="save name in save/")
+    validate_parser.set_defaults(handler=command_validate)
+    return arg_parser
+
+
+if __name__ == '__main__':
+    parsed_args = build_arg_parser().parse_args()
+    sys.exit(parsed_args.handler(parsed_args))